@@ -0,0 +1,132 @@
+import asyncio
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from app.main import process_file, process_text
+from app.utils.logger import get_logger
+from app.utils.security import validate_path_safely
+
+logger = get_logger(__name__)
+
+def _job_name(value: str) -> str:
+    # Output directory name derived from a job id or input file name
+    name = re.sub(r"[^A-Za-z0-9_.\-]", "_", os.path.splitext(os.path.basename(value))[0])
+    return name.strip(".") or "job"
+
+def discover_jobs(spec: str, output_root: str) -> List[Dict]:
+    """
+    Builds the batch job list from a directory, a glob pattern or a JSONL file.
+
+    JSONL lines are objects with an optional "id" (or "request_id"), and either an
+    "input" path or inline dump text in "text" (or "body"); "output" overrides the
+    default output directory of <output_root>/<id>.
+
+    Returns:
+        List of job dicts with 'id', 'input' or 'text', and 'output'.
+    """
+    if os.path.isdir(spec):
+        paths = sorted(os.path.join(spec, name) for name in os.listdir(spec)
+                       if os.path.isfile(os.path.join(spec, name)))
+        jobs = [{"id": _job_name(path), "input": path} for path in paths]
+    elif spec.endswith(".jsonl") and os.path.isfile(spec):
+        jobs = []
+        with open(spec, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                job = {"id": _job_name(str(record.get("id") or record.get("request_id") or f"job-{line_no}"))}
+                if record.get("input"):
+                    job["input"] = record["input"]
+                elif record.get("text", record.get("body")) is not None:
+                    job["text"] = record.get("text", record.get("body"))
+                else:
+                    logger.warning(f"Skipping JSONL job on line {line_no}: no 'input' or 'text'")
+                    continue
+                if record.get("output"):
+                    job["output"] = record["output"]
+                jobs.append(job)
+    else:
+        jobs = [{"id": _job_name(path), "input": path} for path in sorted(glob.glob(spec)) if os.path.isfile(path)]
+
+    # Disambiguate ids so that jobs never share an output directory
+    seen: Dict[str, int] = {}
+    for job in jobs:
+        count = seen.get(job["id"], 0)
+        seen[job["id"]] = count + 1
+        if count:
+            job["id"] = f"{job['id']}-{count}"
+        job.setdefault("output", os.path.join(output_root, job["id"]))
+
+    logger.info(f"Discovered {len(jobs)} batch job(s) from {spec}")
+    return jobs
+
+async def _run_job(job: Dict, semaphore: asyncio.Semaphore, slice_executor) -> Dict:
+    result = {"id": job["id"], "input": job.get("input"), "output": job["output"], "status": "ok"}
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            if "input" in job:
+                result["input_bytes"] = os.path.getsize(job["input"]) if os.path.isfile(job["input"]) else 0
+                summary = await process_file(job["input"], job["output"], slice_executor=slice_executor)
+            else:
+                if not validate_path_safely(job["output"]):
+                    raise ValueError(f"Invalid output path: {job['output']}")
+                result["input_bytes"] = len(job["text"].encode("utf-8"))
+                summary = await process_text(job["text"], job["output"], slice_executor=slice_executor)
+            result.update(summary)
+        except Exception as ex:
+            result["status"] = "error"
+            result["error"] = str(ex)
+            logger.error(f"Batch job {job['id']} failed: {ex}")
+        result["seconds"] = round(time.perf_counter() - started, 4)
+
+    logger.info(f"Batch job {result['id']}: {result['status']} ({result.get('files', 0)} files, {result['seconds']}s)",
+                extra={"sampled": True})
+    return result
+
+async def run_batch(jobs: List[Dict], concurrency: int, workers: Optional[int] = None) -> Dict:
+    """
+    Runs process_file/process_text over all jobs with at most `concurrency` jobs in
+    flight; LLM calls share the pooled gateway. CPU-bound slicing runs in a process pool
+    of `workers` processes (0 or None = one per CPU, negative = inline).
+
+    Returns:
+        Summary dict with per-job 'results' and aggregate throughput figures.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    executor = None
+    if workers is None or workers >= 0:
+        executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(_run_job(job, semaphore, executor) for job in jobs))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    elapsed = time.perf_counter() - started
+
+    succeeded = [r for r in results if r["status"] == "ok"]
+    total_files = sum(r.get("files", 0) for r in succeeded)
+    total_bytes = sum(r.get("input_bytes", 0) for r in succeeded)
+    summary = {
+        "jobs": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "files": total_files,
+        "input_bytes": total_bytes,
+        "seconds": round(elapsed, 4),
+        "files_per_second": round(total_files / elapsed, 2) if elapsed else 0.0,
+        "mb_per_second": round(total_bytes / (1024 * 1024) / elapsed, 3) if elapsed else 0.0,
+        "results": results,
+    }
+    logger.info(
+        f"Batch finished: {summary['succeeded']}/{summary['jobs']} jobs, {total_files} files in "
+        f"{summary['seconds']}s ({summary['files_per_second']} files/s, {summary['mb_per_second']} MB/s)"
+    )
+    return summary
@@ -1,11 +1,136 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+def _load_dotenv():
+    """
+    Loads the nearest `.env` file, searched from this package's directory upwards like
+    python-dotenv does, without overriding variables that are already set. python-dotenv
+    itself is only imported when there is such a file, which keeps it off the startup
+    path of deployments configured through the environment alone.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
+_load_dotenv()
 
 class Settings:
     # Externalize configuration via env vars for security and flexibility
     LLM_API_KEY: str = os.getenv("LLM_API_KEY", "")
     LLM_ENDPOINT: str = os.getenv("LLM_ENDPOINT", "https://llm.api/endpoint")  # Placeholder endpoint
 
+    # Logging: default level plus per-prefix overrides ("app.core=DEBUG,app.service=WARNING").
+    # With LOG_ASYNC, records are queued (at most LOG_QUEUE_SIZE, extra ones are dropped) and
+    # written by a background thread in batches of LOG_BATCH_SIZE or every LOG_FLUSH_INTERVAL
+    # seconds. Per-file messages are sampled: the first LOG_SAMPLE_BURST per call site, then
+    # one in every LOG_SAMPLE_EVERY.
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS: str = os.getenv("LOG_LEVELS", "")
+    LOG_ASYNC: bool = os.getenv("LOG_ASYNC", "true").lower() == "true"
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_BATCH_SIZE: int = int(os.getenv("LOG_BATCH_SIZE", "64"))
+    LOG_FLUSH_INTERVAL: float = float(os.getenv("LOG_FLUSH_INTERVAL", "0.2"))
+    LOG_SAMPLE_BURST: int = int(os.getenv("LOG_SAMPLE_BURST", "20"))
+    LOG_SAMPLE_EVERY: int = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+
+    # Shared LLM gateway connection pool and in-flight request limit
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    LLM_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30.0"))
+    LLM_MAX_IN_FLIGHT: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+
+    # Gateway resilience: jittered exponential backoff retries, optional hedged requests
+    # once a request outlives the given latency percentile, and a circuit breaker
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_BACKOFF_BASE: float = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    LLM_BACKOFF_MAX: float = float(os.getenv("LLM_BACKOFF_MAX", "8.0"))
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    LLM_CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30.0"))
+
+    # Single-flight coalescing: concurrent boundary requests with an identical payload
+    # share one in-flight LLM call and its result
+    LLM_COALESCE_ENABLED: bool = os.getenv("LLM_COALESCE_ENABLED", "true").lower() == "true"
+
+    # Request a streamed (Ollama-style `stream: true`) response and slice entries as they arrive
+    LLM_STREAMING: bool = os.getenv("LLM_STREAMING", "false").lower() == "true"
+
+    # Windowed boundary detection: inputs larger than one window are split on line
+    # boundaries into overlapping windows that are sent to the LLM concurrently
+    BOUNDARY_WINDOW_SIZE: int = int(os.getenv("BOUNDARY_WINDOW_SIZE", "10000"))
+    BOUNDARY_WINDOW_OVERLAP: int = int(os.getenv("BOUNDARY_WINDOW_OVERLAP", "1000"))
+    BOUNDARY_MAX_CONCURRENCY: int = int(os.getenv("BOUNDARY_MAX_CONCURRENCY", "4"))
+
+    # Prompt compaction: above PROMPT_COMPACTION_MIN_CHARS, send the LLM a line-numbered
+    # skeleton of candidate header lines instead of the raw text and map line ranges back
+    PROMPT_COMPACTION_ENABLED: bool = os.getenv("PROMPT_COMPACTION_ENABLED", "false").lower() == "true"
+    PROMPT_COMPACTION_MIN_CHARS: int = int(os.getenv("PROMPT_COMPACTION_MIN_CHARS", "10000"))
+
+    # Deterministic marker recognizer that runs before the LLM; the LLM is only used when
+    # no grammar covers at least RECOGNIZER_MIN_COVERAGE of the input
+    RECOGNIZER_ENABLED: bool = os.getenv("RECOGNIZER_ENABLED", "true").lower() == "true"
+    RECOGNIZER_MIN_COVERAGE: float = float(os.getenv("RECOGNIZER_MIN_COVERAGE", "0.6"))
+
+    # Template induction: inputs that need the LLM also get the LLM to describe their delimiter
+    # format as a header/footer regex. Templates that reproduce the LLM manifest locally are kept
+    # in TEMPLATE_REGISTRY_FILE (the TEMPLATE_REGISTRY_MAX_ENTRIES most recent) and recognized
+    # like the built-in grammars in later runs, without any LLM call
+    TEMPLATE_INDUCTION_ENABLED: bool = os.getenv("TEMPLATE_INDUCTION_ENABLED", "false").lower() == "true"
+    TEMPLATE_REGISTRY_FILE: str = os.getenv("TEMPLATE_REGISTRY_FILE", ".chaostocode_cache/templates.json")
+    TEMPLATE_REGISTRY_MAX_ENTRIES: int = int(os.getenv("TEMPLATE_REGISTRY_MAX_ENTRIES", "32"))
+
+    # Fuzzy fallback for LLM markers that do not occur verbatim: normalized, truncated and
+    # edit-distance matching (at most MARKER_FUZZY_MAX_DISTANCE_RATIO edits per character)
+    MARKER_FUZZY_ENABLED: bool = os.getenv("MARKER_FUZZY_ENABLED", "true").lower() == "true"
+    MARKER_FUZZY_MAX_DISTANCE_RATIO: float = float(os.getenv("MARKER_FUZZY_MAX_DISTANCE_RATIO", "0.2"))
+
+    # Content-addressed manifest cache: in-memory LRU entries plus an on-disk tier
+    # evicted oldest-first beyond MANIFEST_CACHE_MAX_BYTES
+    MANIFEST_CACHE_ENABLED: bool = os.getenv("MANIFEST_CACHE_ENABLED", "true").lower() == "true"
+    MANIFEST_CACHE_DIR: str = os.getenv("MANIFEST_CACHE_DIR", ".chaostocode_cache/manifests")
+    MANIFEST_CACHE_MAX_ENTRIES: int = int(os.getenv("MANIFEST_CACHE_MAX_ENTRIES", "256"))
+    MANIFEST_CACHE_MAX_BYTES: int = int(os.getenv("MANIFEST_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Incremental mode: state of the previous run (chunk digests, spans, file hashes) is
+    # kept in this file inside the output directory
+    INCREMENTAL_STATE_FILE: str = os.getenv("INCREMENTAL_STATE_FILE", ".chaostocode_state.json")
+
+    # Parallel slicing: LLM manifests of inputs of at least SLICE_PARALLEL_MIN_BYTES are
+    # resolved by searching markers in shards on SLICE_WORKERS processes (0 = one per CPU)
+    SLICE_WORKERS: int = int(os.getenv("SLICE_WORKERS", "0"))
+    SLICE_PARALLEL_MIN_BYTES: int = int(os.getenv("SLICE_PARALLEL_MIN_BYTES", str(32 * 1024 * 1024)))
+
+    # Chunked input mode: the dump is read and sliced INPUT_CHUNK_SIZE bytes at a time
+    INPUT_CHUNK_SIZE: int = int(os.getenv("INPUT_CHUNK_SIZE", str(1024 * 1024)))
+
+    # Output: sink for extracted files (dir, tar, zip or cas content-addressed store) and
+    # size of the dedicated thread pool that writes files into an output directory
+    OUTPUT_SINK: str = os.getenv("OUTPUT_SINK", "dir")
+    OUTPUT_WRITE_WORKERS: int = int(os.getenv("OUTPUT_WRITE_WORKERS", "8"))
+
+    # Profiling mode (--profile): functions and allocation sites listed in the summary
+    PROFILE_TOP_N: int = int(os.getenv("PROFILE_TOP_N", "20"))
+
+    # Batch mode: jobs processed concurrently, and process pool size for slicing (0 = CPU count)
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    BATCH_SLICE_WORKERS: int = int(os.getenv("BATCH_SLICE_WORKERS", "0"))
+
+    # HTTP service mode: concurrent extractions, queued requests beyond which new requests
+    # are rejected with 503, and the maximum accepted upload size
+    SERVICE_HOST: str = os.getenv("SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT: int = int(os.getenv("SERVICE_PORT", "8765"))
+    SERVICE_MAX_CONCURRENCY: int = int(os.getenv("SERVICE_MAX_CONCURRENCY", "4"))
+    SERVICE_MAX_QUEUE: int = int(os.getenv("SERVICE_MAX_QUEUE", "32"))
+    SERVICE_MAX_BODY_BYTES: int = int(os.getenv("SERVICE_MAX_BODY_BYTES", str(64 * 1024 * 1024)))
+
 settings = Settings()
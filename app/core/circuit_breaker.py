@@ -0,0 +1,65 @@
+import time
+from app.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a request is refused because the circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and requests are
+    refused for `reset_timeout` seconds. The circuit then becomes half-open and lets a
+    single trial request through: success closes it, failure opens it again. A trial
+    that ends without an outcome (e.g. it was cancelled) must be released with
+    release_trial, or the circuit would stay half-open and refuse every request.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = settings.LLM_CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        # Half-open: allow exactly one trial request at a time
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("LLM circuit breaker closed after successful trial request.")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def release_trial(self):
+        """Gives up a half-open trial without an outcome; the next request becomes the trial."""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"LLM circuit breaker opened after {self.consecutive_failures} consecutive failures.")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
@@ -1,17 +1,65 @@
 import asyncio
+import copy
+import hashlib
+import json
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
 import httpx
 from app.config import settings
-from app.utils.security import sanitize_text_input, validate_json_manifest
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.manifest_stream import IncrementalManifestParser, extract_stream_text
+from app.utils.security import sanitize_text_input, validate_json_manifest, validate_manifest_entry
 from app.utils.logger import get_logger
+from app.utils.metrics import metrics
 
 logger = get_logger(__name__)
 
+# Status codes worth retrying: rate limiting and server-side failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Number of recent request latencies kept to derive the hedging threshold
+LATENCY_WINDOW = 200
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt or completion (about four characters per token)."""
+    return (len(text) + 3) // 4
+
 class LLMGateway:
     """
     Gateway to communicate with the LLM securely and asynchronously.
     Handles input validation and retries with backoff.
+
+    The gateway is a long-lived resource: its pooled HTTP/2 client keeps connections warm
+    across requests and an in-flight semaphore bounds concurrent requests. Use it as an
+    async context manager, or share the process-wide instance from get_shared_gateway().
+
+    Transport errors, 429 and 5xx responses are retried with jittered exponential backoff.
+    When hedging is enabled, a duplicate request is sent once the first one has been
+    outstanding longer than the configured latency percentile, and the first successful
+    response wins. A circuit breaker refuses requests with CircuitOpenError while the
+    endpoint is unhealthy so callers can take their fallback path immediately.
+
+    stream_boundary_request() asks for a streamed response and yields each validated
+    manifest entry as soon as its JSON object is complete.
+
+    With coalescing enabled, concurrent post_boundary_request() calls with the same
+    payload share a single in-flight LLM call (single flight): the first caller starts
+    it, later callers wait for its result, which each of them receives as its own copy.
+    The shared call is shielded, so a caller that is cancelled does not cancel it for
+    the others.
     """
-    def __init__(self, endpoint: str = settings.LLM_ENDPOINT, api_key: str = settings.LLM_API_KEY):
+    def __init__(self, endpoint: str = settings.LLM_ENDPOINT, api_key: str = settings.LLM_API_KEY,
+                 max_connections: int = settings.LLM_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                 max_in_flight: int = settings.LLM_MAX_IN_FLIGHT,
+                 max_retries: int = settings.LLM_MAX_RETRIES,
+                 backoff_base: float = settings.LLM_BACKOFF_BASE,
+                 backoff_max: float = settings.LLM_BACKOFF_MAX,
+                 hedge_enabled: bool = settings.LLM_HEDGE_ENABLED,
+                 coalesce: bool = settings.LLM_COALESCE_ENABLED,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
         self.endpoint = endpoint
         self.api_key = api_key
         self.headers = {
@@ -19,9 +67,39 @@ class LLMGateway:
             "Content-Type": "application/json"
         }
         self.timeout = httpx.Timeout(10.0, connect=5.0)
-        self.client = httpx.AsyncClient(timeout=self.timeout, http2=True)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        )
+        self.client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=True, transport=transport)
+        self._in_flight = asyncio.Semaphore(max(1, max_in_flight))
+
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = settings.LLM_HEDGE_PERCENTILE
+        self.hedge_min_samples = settings.LLM_HEDGE_MIN_SAMPLES
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.retry_count = 0
+        self.hedge_count = 0
+        self.coalesce = coalesce
+        self._flights: Dict[Tuple[str, Callable], asyncio.Task] = {}
+
+    async def __aenter__(self) -> "LLMGateway":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.client.is_closed
 
-    async def post_boundary_request(self, prompt: str) -> dict:
+    async def post_boundary_request(self, prompt: str,
+                                    validator: Callable[[Any], bool] = validate_json_manifest) -> dict:
         # Validate and sanitize prompt before sending
         sanitized_prompt = sanitize_text_input(prompt)
         payload = {
@@ -29,25 +107,233 @@ class LLMGateway:
             "max_tokens": 1500,
             "temperature": 0.0
         }
+        if not self.coalesce:
+            return await self._post_payload(payload, validator)
 
-        # Retry logic with exponential backoff handled at caller level if needed
+        key = (_payload_hash(payload), validator)
+        flight = self._flights.get(key)
+        if flight is not None:
+            metrics.inc("llm_coalesced_total")
+            logger.info("Joined an identical in-flight LLM boundary request.", extra={"sampled": True})
+            return copy.deepcopy(await asyncio.shield(flight))
+
+        flight = asyncio.ensure_future(self._post_payload(payload, validator))
+        self._flights[key] = flight
+        flight.add_done_callback(lambda done: self._land(key, done))
+        return copy.deepcopy(await asyncio.shield(flight))
+
+    def _land(self, key: Tuple[str, Callable], flight: asyncio.Task):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception as retrieved in case every caller was cancelled meanwhile
+        if not flight.cancelled():
+            flight.exception()
+
+    async def _post_payload(self, payload: dict, validator: Callable[[Any], bool]) -> dict:
+        sanitized_prompt = payload["prompt"]
+        status = "error"
         try:
-            response = await self.client.post(self.endpoint, json=payload, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
+            with metrics.timer("llm") as fields:
+                response = await self._send_with_retries(payload)
+                data = response.json()
+                fields.update(prompt_tokens=estimate_tokens(sanitized_prompt),
+                              completion_tokens=estimate_tokens(response.text))
+            metrics.inc("llm_prompt_tokens_total", fields["prompt_tokens"])
+            metrics.inc("llm_completion_tokens_total", fields["completion_tokens"])
 
             # Validate manifest JSON structure
-            if not validate_json_manifest(data):
+            if not validator(data):
                 logger.error("Invalid JSON manifest structure received from LLM")
                 raise ValueError("Invalid JSON manifest from LLM")
 
+            status = "ok"
             return data
+        except CircuitOpenError:
+            status = "circuit_open"
+            raise
         except httpx.HTTPStatusError as e:
             logger.error(f"LLM HTTP error: {e.response.status_code} {e.response.text}")
             raise
         except Exception as e:
             logger.error(f"Unexpected error communicating with LLM: {e}")
             raise
+        finally:
+            metrics.inc("llm_requests_total", status=status)
+
+    async def stream_boundary_request(self, prompt: str,
+                                      entry_validator: Callable[[Any], bool] = validate_manifest_entry
+                                      ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of post_boundary_request for Ollama-style `stream: true` APIs.
+        Yields manifest entries incrementally, each checked with `entry_validator`.
+        Failures before the first entry are retried like regular requests; once entries
+        have been yielded they are not.
+        """
+        payload = {
+            "prompt": sanitize_text_input(prompt),
+            "max_tokens": 1500,
+            "temperature": 0.0,
+            "stream": True
+        }
+        attempt = 0
+        yielded = 0
+        metrics.inc("llm_requests_total", status="stream")
+        metrics.inc("llm_prompt_tokens_total", estimate_tokens(payload["prompt"]))
+
+        while True:
+            if not self.circuit_breaker.allow_request():
+                metrics.inc("llm_circuit_open_total")
+                raise CircuitOpenError(f"LLM circuit breaker is open for {self.endpoint}")
+            parser = IncrementalManifestParser()
+            try:
+                async with self._in_flight:
+                    async with self.client.stream("POST", self.endpoint, json=payload, headers=self.headers) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            text = extract_stream_text(line) if line else None
+                            if not text:
+                                continue
+                            metrics.inc("llm_completion_tokens_total", estimate_tokens(text))
+                            for entry in parser.feed(text):
+                                if not entry_validator(entry):
+                                    logger.error("Invalid manifest entry streamed from LLM")
+                                    raise ValueError("Invalid JSON manifest from LLM")
+                                yielded += 1
+                                yield entry
+                            if parser.done:
+                                break
+                self.circuit_breaker.record_success()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRYABLE_STATUS_CODES
+                if retryable:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()  # The endpoint answered; the request was bad
+                if not retryable or yielded or attempt >= self.max_retries:
+                    logger.error(f"LLM streaming error: {e!r}")
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                self.retry_count += 1
+                metrics.inc("llm_retries_total")
+                logger.warning(f"LLM stream failed ({e!r}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
+            except BaseException:
+                # Cancelled, or the consumer stopped iterating: no outcome for the breaker
+                self.circuit_breaker.release_trial()
+                raise
+            if not parser.in_array:
+                raise ValueError("Invalid JSON manifest from LLM")
+            return
+
+    async def _send_with_retries(self, payload: dict) -> httpx.Response:
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                metrics.inc("llm_circuit_open_total")
+                raise CircuitOpenError(f"LLM circuit breaker is open for {self.endpoint}")
+            try:
+                response = await self._send_hedged(payload)
+                self.circuit_breaker.record_success()
+                return response
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRYABLE_STATUS_CODES
+                if retryable:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()  # The endpoint answered; the request was bad
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                self.retry_count += 1
+                metrics.inc("llm_retries_total")
+                logger.warning(f"LLM request failed ({e!r}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception:
+                # Any other error (e.g. an undecodable response) still ends a half-open trial
+                self.circuit_breaker.record_failure()
+                raise
+            except BaseException:
+                self.circuit_breaker.release_trial()
+                raise
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = error.response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+        return delay
+
+    async def _send(self, payload: dict) -> httpx.Response:
+        async with self._in_flight:
+            started = time.monotonic()
+            response = await self.client.post(self.endpoint, json=payload, headers=self.headers)
+            response.raise_for_status()
+            self._latencies.append(time.monotonic() - started)
+            return response
+
+    def hedge_delay(self) -> Optional[float]:
+        """Latency percentile after which a hedged request is sent, or None if not hedging."""
+        if not self.hedge_enabled or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100.0))
+        return ordered[index]
+
+    async def _send_hedged(self, payload: dict) -> httpx.Response:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._send(payload)
+
+        pending = {asyncio.ensure_future(self._send(payload))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                self.hedge_count += 1
+                metrics.inc("llm_hedges_total")
+                logger.info(f"LLM request exceeded p{self.hedge_percentile:g} latency ({delay:.2f}s); sending hedge")
+                pending.add(asyncio.ensure_future(self._send(payload)))
+
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def close(self):
         await self.client.aclose()
+
+def _payload_hash(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+_shared_gateway: Optional[LLMGateway] = None
+
+def get_shared_gateway() -> LLMGateway:
+    """
+    Returns the process-wide gateway, creating it on first use (or after it was closed).
+    Must be called from within the event loop that will use it.
+    """
+    global _shared_gateway
+    if _shared_gateway is None or _shared_gateway.closed:
+        _shared_gateway = LLMGateway()
+    return _shared_gateway
+
+async def close_shared_gateway():
+    global _shared_gateway
+    if _shared_gateway is not None:
+        await _shared_gateway.close()
+        _shared_gateway = None
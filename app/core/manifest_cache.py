@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from app.config import settings
+from app.utils.logger import get_logger
+from app.utils.security import validate_json_manifest
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+class ManifestCache:
+    """
+    Content-addressed cache of boundary manifests.
+
+    Keys are SHA-256 digests of the prompt template, the LLM endpoint and the input text,
+    so any change to one of them is a miss. Lookups go through an in-memory LRU tier and
+    then a persistent on-disk tier (one JSON file per key) that is evicted oldest-first
+    once it grows past max_disk_bytes. Disk hits refresh the file's mtime.
+
+    Disk entries can be stale, truncated or tampered with, so they are checked with the
+    same validator as a fresh LLM answer for that prompt before they are used; invalid
+    or unreadable entries are deleted and count as a miss.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = settings.MANIFEST_CACHE_DIR,
+                 max_entries: int = settings.MANIFEST_CACHE_MAX_ENTRIES,
+                 max_disk_bytes: int = settings.MANIFEST_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max(1, max_entries)
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._disk_bytes = None
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(prompt_template: str, endpoint: str, text: str) -> str:
+        digest = hashlib.sha256()
+        for part in (prompt_template, endpoint, text):
+            encoded = str(part).encode("utf-8")
+            # Length-prefix each part so that different splits never collide
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    @property
+    def hits(self) -> int:
+        return self.stats["memory_hits"] + self.stats["disk_hits"]
+
+    @property
+    def misses(self) -> int:
+        return self.stats["misses"]
+
+    def get(self, key: str, validator: Callable[[Any], bool] = validate_json_manifest) -> Optional[List[Dict]]:
+        manifest = self._memory.get(key)
+        if manifest is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            metrics.inc("manifest_cache_hits_total", tier="memory")
+            return [dict(entry) for entry in manifest]
+
+        manifest = self._read_disk(key, validator)
+        if manifest is not None:
+            self.stats["disk_hits"] += 1
+            metrics.inc("manifest_cache_hits_total", tier="disk")
+            self._remember(key, manifest)
+            return [dict(entry) for entry in manifest]
+
+        self.stats["misses"] += 1
+        metrics.inc("manifest_cache_misses_total")
+        return None
+
+    def put(self, key: str, manifest: List[Dict]):
+        self._remember(key, [dict(entry) for entry in manifest])
+        if self.cache_dir:
+            try:
+                self._write_disk(key, manifest)
+            except OSError as e:
+                logger.warning(f"Could not persist manifest cache entry {key[:12]}: {e}")
+
+    def _remember(self, key: str, manifest: List[Dict]):
+        self._memory[key] = manifest
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str, validator: Callable[[Any], bool]) -> Optional[List[Dict]]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable manifest cache entry {key[:12]}: {e}")
+            self._discard(path)
+            return None
+        if not validator(manifest):
+            logger.warning(f"Discarding invalid manifest cache entry {key[:12]}")
+            self._discard(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return manifest
+
+    def _discard(self, path: str):
+        if self._disk_bytes is not None:
+            try:
+                self._disk_bytes -= os.path.getsize(path)
+            except OSError:
+                pass
+        self._remove(path)
+
+    def _write_disk(self, key: str, manifest: List[Dict]):
+        data = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        path = self._path(key)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        disk_bytes = self._current_disk_bytes()
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+        self._disk_bytes = disk_bytes - previous_size + len(data)
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _current_disk_bytes(self) -> int:
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+        return self._disk_bytes
+
+    def _disk_entries(self):
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_disk_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self.stats["evictions"] += 1
+        self._disk_bytes = total
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+_shared_cache: Optional[ManifestCache] = None
+
+def get_manifest_cache() -> ManifestCache:
+    """Returns the process-wide manifest cache, creating it on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ManifestCache()
+    return _shared_cache
@@ -0,0 +1,78 @@
+import json
+from typing import List, Optional
+
+class IncrementalManifestParser:
+    """
+    Incremental parser for a streamed JSON array of manifest objects.
+
+    Text is fed in arbitrary chunks (e.g. LLM tokens); every top-level object is parsed
+    and returned as soon as its closing brace arrives, so downstream stages can start
+    before the array is complete. Anything before the opening '[' (prose, code fences)
+    is ignored, as is everything after the closing ']'.
+    """
+
+    def __init__(self):
+        self.in_array = False
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buffer: List[str] = []
+
+    def feed(self, chunk: str) -> List[dict]:
+        entries = []
+        for char in chunk:
+            if self.done:
+                break
+            if not self.in_array:
+                if char == "[":
+                    self.in_array = True
+                continue
+            if self._depth == 0:
+                # Between elements: only the start of an object or the end of the array matter
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = ["{"]
+                elif char == "]":
+                    self.done = True
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    entries.append(json.loads("".join(self._buffer)))
+                    self._buffer = []
+        return entries
+
+def extract_stream_text(line: str) -> Optional[str]:
+    """
+    Returns the generated text carried by one line of a streamed LLM response.
+
+    Ollama-style NDJSON envelopes carry text in "response" (generate API) or
+    "message.content" (chat API); any other line is treated as raw generated text.
+    Returns None for the final `"done": true` envelope without text.
+    """
+    try:
+        envelope = json.loads(line)
+    except ValueError:
+        return line + "\n"
+    if not isinstance(envelope, dict) or not ({"response", "message", "done"} & envelope.keys()):
+        return line + "\n"
+    if "response" in envelope:
+        return envelope["response"] or None
+    message = envelope.get("message")
+    if isinstance(message, dict) and message.get("content"):
+        return message["content"]
+    return None
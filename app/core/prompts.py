@@ -20,3 +20,49 @@ Example JSON output:
   }
 ]
 """
+
+LLM_SKELETON_BOUNDARY_PROMPT = """
+You are an analyst AI that identifies code boundaries in a software project dump.
+You are given a skeleton of the dump instead of its full text: every candidate header
+line is shown with its 1-based line number as "L<number>: <line>", and runs of body
+lines are elided as "... (<count> lines elided)".
+
+Your task is to output a JSON array where each entry contains:
+- filename (relative path)
+- start_line (line number of the first line of the file's content, after its header)
+- end_line (line number of the last line of the file's content, before the next header or end marker)
+
+Do not rewrite or generate code, only identify these line ranges precisely.
+
+Example JSON output:
+[
+  {
+    "filename": "module1.py",
+    "start_line": 4,
+    "end_line": 5
+  }
+]
+"""
+
+LLM_TEMPLATE_INDUCTION_PROMPT = """
+You are an analyst AI that describes the delimiter format of a software project dump.
+The dump concatenates several files; each file is introduced by a header line that names it
+and may be closed by a footer line. Describe this format as literal text (not regular
+expressions) and output a single JSON object with:
+- header_prefix (exact text of a header line before the file path)
+- header_suffix (exact text of a header line after the file path, "" if none)
+- footer_prefix (exact text a footer line starts with; null if files are not closed by a footer)
+- footer_suffix (exact text a footer line ends with after the prefix and path, "" if none)
+- footer_path (true if the footer line repeats the file path between prefix and suffix)
+
+Do not output any file content.
+
+Example JSON output:
+{
+  "header_prefix": "### START ",
+  "header_suffix": "",
+  "footer_prefix": "### END ",
+  "footer_suffix": "",
+  "footer_path": true
+}
+"""
@@ -1,33 +1,276 @@
 import asyncio
 import json
-from app.core.llm_gateway import LLMGateway
-from app.core.prompts import LLM_BOUNDARY_DETECTION_PROMPT
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+from app.config import settings
+from app.core.manifest_cache import ManifestCache, get_manifest_cache
+from app.core.prompts import (LLM_BOUNDARY_DETECTION_PROMPT, LLM_SKELETON_BOUNDARY_PROMPT,
+                              LLM_TEMPLATE_INDUCTION_PROMPT)
+from app.engine.prompt_compactor import LineIndex, build_skeleton, map_line_ranges
+from app.utils.security import (validate_json_manifest, validate_line_entry, validate_line_manifest,
+                                validate_manifest_entry, validate_template_spec)
 from app.utils.logger import get_logger
+from app.utils.profiler import profile_await
+
+if TYPE_CHECKING:
+    from app.core.llm_gateway import LLMGateway
 
 logger = get_logger(__name__)
 
+def split_into_windows(raw_text: str, window_size: int, overlap: int) -> List[Tuple[int, str]]:
+    """
+    Split text into overlapping windows that start and end on line boundaries.
+
+    Returns:
+        List of (offset, window_text) tuples in document order.
+    """
+    if window_size <= 0:
+        raise ValueError("window_size must be positive")
+    if len(raw_text) <= window_size:
+        return [(0, raw_text)]
+
+    overlap = max(0, min(overlap, window_size // 2))
+    windows = []
+    start = 0
+    text_len = len(raw_text)
+
+    while start < text_len:
+        end = min(start + window_size, text_len)
+        if end < text_len:
+            # Cut after the last complete line; a single overlong line is cut hard
+            cut = raw_text.rfind("\n", start, end)
+            if cut > start:
+                end = cut + 1
+        windows.append((start, raw_text[start:end]))
+        if end >= text_len:
+            break
+
+        # Next window starts on the first line beginning inside the overlap region
+        next_start = end
+        if overlap:
+            line_break = raw_text.find("\n", end - overlap, end - 1)
+            if line_break != -1 and line_break + 1 > start:
+                next_start = line_break + 1
+        start = next_start
+
+    return windows
+
+def merge_manifests(partial_manifests: List[List[Dict]]) -> List[Dict]:
+    """
+    Merge per-window manifests in window order, dropping duplicate files reported
+    by more than one (overlapping) window.
+    """
+    merged = []
+    seen = set()
+    for manifest in partial_manifests:
+        for entry in manifest:
+            filename = entry.get("filename")
+            if filename in seen:
+                continue
+            seen.add(filename)
+            merged.append(entry)
+    return merged
+
+def get_shared_gateway() -> "LLMGateway":
+    """
+    The process-wide gateway. Its module is imported here, on first use, so that runs
+    answered by the recognizer or the manifest cache never load httpx.
+    """
+    from app.core import llm_gateway
+
+    return llm_gateway.get_shared_gateway()
+
 class BoundaryDetector:
     """
     Uses the LLMGateway to detect boundaries in raw text input by invoking the LLM with
     a prompt that instructs it to identify code boundaries in JSON format.
+
+    Inputs larger than one window are split into overlapping line-aligned windows which
+    are sent concurrently (bounded by BOUNDARY_MAX_CONCURRENCY) and merged into one manifest.
+
+    The detector does not own its gateway: by default it uses the shared, pooled gateway
+    whose lifecycle is managed by the caller. The shared gateway (and with it httpx) is
+    only imported and created on the first window that misses the manifest cache.
+
+    Each window's manifest is looked up in the ManifestCache first, keyed by the prompt
+    template, the endpoint and the window text, so repeated (or partly unchanged) dumps
+    skip the network for every window that was seen before.
+
+    With prompt compaction enabled, large inputs are sent as a line-numbered skeleton of
+    candidate header lines; the LLM answers with line ranges that are mapped back to
+    exact offsets through a LineIndex.
+
+    request_template() asks the LLM for the delimiter format of an input instead of its
+    boundaries; see TemplateRegistry for how the answer is verified and reused.
     """
 
-    def __init__(self):
-        self.llm_gateway = LLMGateway()
+    def __init__(self, llm_gateway: Optional["LLMGateway"] = None,
+                 window_size: int = settings.BOUNDARY_WINDOW_SIZE,
+                 window_overlap: int = settings.BOUNDARY_WINDOW_OVERLAP,
+                 max_concurrency: int = settings.BOUNDARY_MAX_CONCURRENCY,
+                 manifest_cache: Optional[ManifestCache] = None,
+                 compaction: Optional[bool] = None):
+        self._llm_gateway = llm_gateway
+        if manifest_cache is None and settings.MANIFEST_CACHE_ENABLED:
+            manifest_cache = get_manifest_cache()
+        self.manifest_cache = manifest_cache
+        self.compaction = settings.PROMPT_COMPACTION_ENABLED if compaction is None else compaction
+        self.window_size = window_size
+        self.window_overlap = window_overlap
+        self.max_concurrency = max(1, max_concurrency)
+
+    @property
+    def llm_gateway(self) -> "LLMGateway":
+        if self._llm_gateway is None:
+            self._llm_gateway = get_shared_gateway()
+        return self._llm_gateway
+
+    @property
+    def endpoint(self) -> str:
+        # Part of the cache key; known without creating the shared gateway
+        return settings.LLM_ENDPOINT if self._llm_gateway is None else self._llm_gateway.endpoint
+
+    def _prompt_windows(self, raw_text: str) -> Tuple[Optional[LineIndex], List[Tuple[int, str]]]:
+        """
+        Windows of the text to send: of its skeleton when compaction applies (with the
+        LineIndex that maps line ranges back), otherwise of the raw text.
+        """
+        if self.compaction and len(raw_text) >= settings.PROMPT_COMPACTION_MIN_CHARS:
+            line_index = LineIndex(raw_text)
+            skeleton = build_skeleton(line_index)
+            logger.info(f"Compacted prompt text from {len(raw_text)} to {len(skeleton)} characters "
+                        f"(~{len(raw_text) // 4} -> ~{len(skeleton) // 4} tokens).")
+            return line_index, split_into_windows(skeleton, self.window_size, self.window_overlap)
+        return None, split_into_windows(raw_text, self.window_size, self.window_overlap)
 
     async def detect_boundaries(self, raw_text: str) -> list:
-        # Compose prompt with instructions and the raw input context (limited if needed)
-        prompt = LLM_BOUNDARY_DETECTION_PROMPT + "\n\n" + raw_text[:10000]  # limit length for LLM
+        line_index, windows = self._prompt_windows(raw_text)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def detect_window(window_text: str) -> list:
+            async with semaphore:
+                if line_index is not None:
+                    return await self._detect_window(window_text, LLM_SKELETON_BOUNDARY_PROMPT, validate_line_manifest)
+                return await self._detect_window(window_text)
 
         try:
-            response = await self.llm_gateway.post_boundary_request(prompt)
-            # response expected to be JSON array as per prompt instructions
-            boundaries = response if isinstance(response, list) else json.loads(response)
-            logger.info(f"Detected {len(boundaries)} boundaries in text.")
+            partial_manifests = await asyncio.gather(*(detect_window(text) for _, text in windows))
+            boundaries = merge_manifests(partial_manifests)
+            if line_index is not None:
+                boundaries = map_line_ranges(line_index, boundaries)
+            logger.info(f"Detected {len(boundaries)} boundaries in text across {len(windows)} window(s).")
+            if self.manifest_cache is not None:
+                logger.info(f"Manifest cache: {self.manifest_cache.hits} hits, {self.manifest_cache.misses} misses.")
 
             return boundaries
         except Exception as ex:
             logger.error(f"Error detecting boundaries with LLM: {ex}", exc_info=True)
             raise
+
+    async def request_template(self, raw_text: str) -> Optional[Dict]:
+        """
+        Asks the LLM to describe the delimiter format of the first window of the input as
+        a header/footer regex template. Returns the validated template, or None if the LLM
+        could not provide one; a failed induction never fails the run.
+        """
+        sample = split_into_windows(raw_text, self.window_size, 0)[0][1]
+        prompt = LLM_TEMPLATE_INDUCTION_PROMPT + "\n\n" + sample
+        try:
+            return await profile_await("llm", self.llm_gateway.post_boundary_request(
+                prompt, validator=validate_template_spec))
+        except Exception as ex:
+            logger.warning(f"Could not induce a delimiter template: {ex}")
+            return None
+
+    async def stream_boundaries(self, raw_text: str) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of detect_boundaries: windows are streamed from the LLM
+        concurrently and each manifest entry is yielded as soon as it has been parsed,
+        skipping files already yielded by an overlapping window. Compaction and the
+        manifest cache apply as in detect_boundaries, with the same cache keys; with
+        compaction, each line-range entry is mapped to offsets as soon as it arrives.
+        """
+        line_index, windows = self._prompt_windows(raw_text)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        done_marker = object()
+
+        async def stream_window(window_text: str):
+            try:
+                async with semaphore:
+                    if line_index is None:
+                        async for entry in self._stream_window(window_text):
+                            await queue.put(entry)
+                        return
+                    async for entry in self._stream_window(window_text, LLM_SKELETON_BOUNDARY_PROMPT,
+                                                           validate_line_manifest, validate_line_entry):
+                        for mapped in map_line_ranges(line_index, [entry]):
+                            await queue.put(mapped)
+            except Exception as ex:
+                await queue.put(ex)
+            finally:
+                await queue.put(done_marker)
+
+        tasks = [asyncio.ensure_future(stream_window(text)) for _, text in windows]
+        seen = set()
+        remaining = len(tasks)
+        try:
+            while remaining:
+                item = await queue.get()
+                if item is done_marker:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    logger.error(f"Error streaming boundaries from LLM: {item}")
+                    raise item
+                elif item.get("filename") not in seen:
+                    seen.add(item.get("filename"))
+                    yield item
+            logger.info(f"Streamed {len(seen)} boundaries across {len(windows)} window(s).")
         finally:
-            await self.llm_gateway.close()
+            for task in tasks:
+                task.cancel()
+
+    async def _stream_window(self, window_text: str, prompt_template: str = LLM_BOUNDARY_DETECTION_PROMPT,
+                             validator=validate_json_manifest,
+                             entry_validator=validate_manifest_entry) -> AsyncIterator[Dict]:
+        cache_key = self._cache_key(window_text, prompt_template)
+        if cache_key is not None:
+            cached = self.manifest_cache.get(cache_key, validator)
+            if cached is not None:
+                for entry in cached:
+                    yield entry
+                return
+
+        prompt = prompt_template + "\n\n" + window_text
+        manifest = []
+        async for entry in self.llm_gateway.stream_boundary_request(prompt, entry_validator=entry_validator):
+            manifest.append(entry)
+            yield entry
+
+        if cache_key is not None:
+            self.manifest_cache.put(cache_key, manifest)
+
+    def _cache_key(self, window_text: str, prompt_template: str = LLM_BOUNDARY_DETECTION_PROMPT) -> Optional[str]:
+        if self.manifest_cache is None:
+            return None
+        return ManifestCache.make_key(prompt_template, self.endpoint, window_text)
+
+    async def _detect_window(self, window_text: str, prompt_template: str = LLM_BOUNDARY_DETECTION_PROMPT,
+                             validator=None) -> list:
+        cache_key = self._cache_key(window_text, prompt_template)
+        if cache_key is not None:
+            cached = self.manifest_cache.get(cache_key, validator or validate_json_manifest)
+            if cached is not None:
+                return cached
+
+        # Compose prompt with instructions and the raw input context of a single window
+        prompt = prompt_template + "\n\n" + window_text
+        if validator is not None:
+            response = await profile_await("llm", self.llm_gateway.post_boundary_request(prompt, validator=validator))
+        else:
+            response = await profile_await("llm", self.llm_gateway.post_boundary_request(prompt))
+        # response expected to be JSON array as per prompt instructions
+        manifest = response if isinstance(response, list) else json.loads(response)
+
+        if cache_key is not None:
+            self.manifest_cache.put(cache_key, manifest)
+        return manifest
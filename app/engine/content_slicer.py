@@ -1,20 +1,48 @@
-from typing import List, Dict
+from bisect import bisect_left
+from typing import List, Dict, Optional, Tuple, Union
+from app.config import settings
+from app.engine.marker_automaton import MarkerAutomaton
+from app.engine.marker_resolver import FuzzyMarkerResolver
+from app.engine.span_table import SpanTable
 from app.utils.logger import get_logger
+from app.utils.metrics import metrics
 
 logger = get_logger(__name__)
 
+# Whitespace as str characters and as byte values, used to trim spans in place
+_WHITESPACE = frozenset(" \t\r\n\f\v") | frozenset(b" \t\r\n\f\v")
+
+# LLM manifests arrive as JSON dicts; manifests built locally are already a SpanTable
+Manifest = Union[List[Dict], SpanTable]
+
 class ContentSlicer:
     """
     Uses the JSON manifest describing boundaries to slice the raw input text into separate files.
+
+    All start and end markers are located in a single pass with a MarkerAutomaton and then
+    resolved in document order, so slicing stays linear in the size of the input regardless
+    of the number of manifest entries.
+
+    Spans can also be resolved over a bytes-like buffer (bytes or mmap), in which case
+    markers are matched in their UTF-8 encoding and offsets are byte offsets.
+
+    Markers without a verbatim occurrence fall back to a FuzzyMarkerResolver (when
+    MARKER_FUZZY_ENABLED) instead of dropping the file.
+
+    Resolved spans are kept in a SpanTable; a manifest that already is a SpanTable (as
+    built by the MarkerRecognizer) needs no resolution at all.
     """
 
-    def slice_content(self, raw_text: str, manifest: List[Dict]) -> Dict[str, str]:
+    def slice_content(self, raw_text: str, manifest: Manifest) -> Dict[str, str]:
         """
         Slice the raw text according to the markers in the manifest.
 
         Args:
             raw_text: The full raw input text string.
             manifest: List of dicts, each with 'filename', 'start_marker', 'end_marker'.
+                Entries that already carry integer 'start'/'end' content offsets (as produced
+                by the MarkerRecognizer) are sliced directly without a marker search, and so
+                is a SpanTable.
 
         Returns:
             Dict mapping filenames to their extracted content strings.
@@ -22,23 +50,217 @@ class ContentSlicer:
 
         extracted_files = {}
 
+        with metrics.timer("slice") as fields:
+            for filename, start_idx, end_idx in self.resolve_spans(raw_text, manifest):
+                # Extract content between markers, stripping surrounding whitespace
+                extracted_files[filename] = raw_text[start_idx:end_idx].strip()
+            fields.update(entries=len(manifest), files=len(extracted_files))
+
+        metrics.inc("files_sliced_total", len(extracted_files))
+        metrics.inc("manifest_entries_dropped_total", len(manifest) - len(extracted_files))
+        logger.info(f"Sliced {len(extracted_files)} files from input text.")
+        return extracted_files
+
+    def slice_spans(self, buffer: Union[str, bytes], manifest: Manifest) -> SpanTable:
+        """
+        Zero-copy counterpart of slice_content: returns (filename, start, end) spans with
+        surrounding whitespace trimmed in place instead of copied content strings. A
+        filename that occurs more than once keeps its last span.
+        """
+        spans = SpanTable()
+        with metrics.timer("slice") as fields:
+            for filename, start_idx, end_idx in self.resolve_spans(buffer, manifest).last_per_filename():
+                spans.append(filename, *trim_span(buffer, start_idx, end_idx))
+            fields.update(entries=len(manifest), files=len(spans))
+
+        metrics.inc("files_sliced_total", len(spans))
+        metrics.inc("manifest_entries_dropped_total", len(manifest) - len(spans))
+        logger.info(f"Resolved {len(spans)} file spans from input buffer.")
+        return spans
+
+    def resolve_spans(self, raw_text: Union[str, bytes], manifest: Manifest) -> SpanTable:
+        """
+        Resolve manifest entries to (filename, start, end) content offsets in document order.
+
+        Repeated markers are matched to the next occurrence after the previously resolved
+        entry rather than always to the first occurrence in the text. Offsets outside the
+        text are dropped.
+        """
+        spans = SpanTable()
+        if isinstance(manifest, SpanTable):
+            spans.extend(manifest)
+            spans.sort()
+            return spans
+
+        marker_entries = []
+        length = len(raw_text)
         for item in manifest:
             filename = item.get("filename")
             start_marker = item.get("start_marker")
             end_marker = item.get("end_marker")
+            start_idx, end_idx = item.get("start"), item.get("end")
+
+            if filename and isinstance(start_idx, int) and isinstance(end_idx, int):
+                if 0 <= start_idx <= end_idx <= length:
+                    spans.append(filename, start_idx, end_idx)
+                else:
+                    logger.warning(f"Manifest offsets out of range for {filename}: {start_idx}-{end_idx}")
+                continue
 
             if not (filename and start_marker and end_marker):
                 logger.warning(f"Manifest entry missing required fields: {item}")
                 continue
 
-            try:
-                start_idx = raw_text.index(start_marker) + len(start_marker)
-                end_idx = raw_text.index(end_marker, start_idx)
-                # Extract content between markers, stripping trailing whitespace
-                content = raw_text[start_idx:end_idx].strip()
-                extracted_files[filename] = content
-            except ValueError as ve:
-                logger.error(f"Marker not found in raw_text for {filename}: {ve}")
+            if not isinstance(raw_text, str):
+                start_marker, end_marker = start_marker.encode("utf-8"), end_marker.encode("utf-8")
+            marker_entries.append((filename, start_marker, end_marker))
 
-        logger.info(f"Sliced {len(extracted_files)} files from input text.")
-        return extracted_files
+        if marker_entries:
+            markers = [marker for _, start, end in marker_entries for marker in (start, end)]
+            occurrences = self.find_occurrences(raw_text, markers)
+            resolver = FuzzyMarkerResolver(raw_text) if settings.MARKER_FUZZY_ENABLED else None
+            spans.extend(resolve_marker_spans(marker_entries, occurrences, resolver))
+
+        spans.sort()
+        return spans
+
+    def find_occurrences(self, raw_text: Union[str, bytes], markers: List) -> Dict:
+        """Marker -> ascending start offsets of every occurrence of each marker in the text."""
+        return MarkerAutomaton(markers).find_all(raw_text)
+
+class IncrementalSlicer:
+    """
+    Slices manifest entries one at a time as they arrive (e.g. streamed from the LLM).
+
+    Entries are expected roughly in document order, so each marker search starts from
+    the end of the previously resolved entry and the total work stays linear; an entry
+    whose start marker only occurs earlier falls back to a search from the beginning.
+    """
+
+    def __init__(self, raw_text: str):
+        self.raw_text = raw_text
+        self.cursor = 0
+        self.resolver = FuzzyMarkerResolver(raw_text) if settings.MARKER_FUZZY_ENABLED else None
+
+    def slice_entry(self, item: Dict) -> Optional[Tuple[str, str]]:
+        filename = item.get("filename")
+        start_marker = item.get("start_marker")
+        end_marker = item.get("end_marker")
+        start_idx, end_idx = item.get("start"), item.get("end")
+
+        if filename and isinstance(start_idx, int) and isinstance(end_idx, int):
+            return filename, self.raw_text[start_idx:end_idx].strip()
+
+        if not (filename and start_marker and end_marker):
+            logger.warning(f"Manifest entry missing required fields: {item}")
+            return None
+
+        start_pos = self.raw_text.find(start_marker, self.cursor)
+        if start_pos == -1:
+            start_pos = self.raw_text.find(start_marker)
+        content_start = start_pos + len(start_marker)
+        if start_pos == -1:
+            match = self._fuzzy_find(start_marker, self.cursor) or self._fuzzy_find(start_marker, 0)
+            if match is None:
+                logger.error(f"Marker not found in raw_text for {filename}: start marker {start_marker!r}")
+                return None
+            content_start = match[1]
+
+        end_pos = self.raw_text.find(end_marker, content_start)
+        if end_pos == -1:
+            match = self._fuzzy_find(end_marker, content_start)
+            if match is None:
+                logger.error(f"Marker not found in raw_text for {filename}: end marker {end_marker!r}")
+                return None
+            end_pos = match[0]
+
+        self.cursor = end_pos
+        return filename, self.raw_text[content_start:end_pos].strip()
+
+    def _fuzzy_find(self, marker: str, start: int) -> Optional[Tuple[int, int]]:
+        return self.resolver.find(marker, start) if self.resolver is not None else None
+
+def resolve_marker_spans(entries: List[Tuple], occurrences: Dict,
+                         resolver: Optional[FuzzyMarkerResolver] = None) -> SpanTable:
+    """
+    Resolve (filename, start_marker, end_marker) entries against precomputed marker
+    occurrences. Entries are matched in manifest order starting from a moving cursor;
+    an entry whose start marker only occurs before the cursor falls back to its first
+    unused occurrence so out-of-order manifests still resolve. Markers with no exact
+    occurrence are looked up in `resolver`, if given.
+    """
+    spans = SpanTable()
+    used_starts = set()
+    cursor = 0
+
+    for filename, start_marker, end_marker in entries:
+        starts = occurrences.get(start_marker) or []
+        start_pos = _next_unused(starts, bisect_left(starts, cursor), start_marker, used_starts)
+        if start_pos is None:
+            start_pos = _next_unused(starts, 0, start_marker, used_starts)
+        content_start = start_pos + len(start_marker) if start_pos is not None else None
+        if start_pos is None and resolver is not None:
+            match = resolver.find(start_marker, cursor) or resolver.find(start_marker, 0)
+            if match is not None:
+                start_pos, content_start = match
+        if start_pos is None:
+            logger.error(f"Marker not found in raw_text for {filename}: start marker {start_marker!r}")
+            continue
+
+        ends = occurrences.get(end_marker) or []
+        end_index = bisect_left(ends, content_start)
+        if end_index < len(ends):
+            end_pos = ends[end_index]
+        else:
+            match = resolver.find(end_marker, content_start) if resolver is not None else None
+            if match is None:
+                logger.error(f"Marker not found in raw_text for {filename}: end marker {end_marker!r}")
+                continue
+            end_pos = match[0]
+
+        used_starts.add((start_marker, start_pos))
+        spans.append(filename, content_start, end_pos)
+        # The end marker may double as the next entry's start marker, so do not skip past it
+        cursor = end_pos
+
+    return spans
+
+def trim_span(buffer: Union[str, bytes], start: int, end: int) -> Tuple[int, int]:
+    """Shrink [start, end) so that it excludes leading and trailing whitespace."""
+    while start < end and buffer[start] in _WHITESPACE:
+        start += 1
+    while end > start and buffer[end - 1] in _WHITESPACE:
+        end -= 1
+    return start, end
+
+def encode_offsets(text: str, manifest: List[Dict]) -> List[Dict]:
+    """
+    Converts the character offsets (`start`/`end`) of manifest entries into byte offsets
+    of the UTF-8 encoding of `text`, for manifests built on the decoded text of a
+    bytes-like buffer. Entries without offsets are copied unchanged. Linear in the text:
+    the offsets are visited in ascending order and only the text between them is encoded.
+    """
+    offsets = sorted({item[key] for item in manifest for key in ("start", "end")
+                      if isinstance(item.get(key), int) and 0 <= item[key] <= len(text)})
+    byte_offsets = {}
+    char_position = byte_position = 0
+    for offset in offsets:
+        byte_position += len(text[char_position:offset].encode("utf-8"))
+        char_position = offset
+        byte_offsets[offset] = byte_position
+
+    converted = []
+    for item in manifest:
+        item = dict(item)
+        for key in ("start", "end"):
+            if item.get(key) in byte_offsets:
+                item[key] = byte_offsets[item[key]]
+        converted.append(item)
+    return converted
+
+def _next_unused(positions: List[int], index: int, marker, used: set):
+    while index < len(positions):
+        if (marker, positions[index]) not in used:
+            return positions[index]
+        index += 1
+    return None
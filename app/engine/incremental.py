@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.engine.span_table import SpanTable
+from app.utils.logger import get_logger
+from app.utils.security import validate_span_table
+
+logger = get_logger(__name__)
+
+# Version 2 stores the spans as SpanTable columns
+STATE_VERSION = 2
+# Chunks end after a line where the low bits of the rolling hash are zero (about every
+# 32 lines), but never span fewer than MIN_CHUNK_LINES or more than MAX_CHUNK_LINES lines
+CHUNK_MASK = 0x1F
+MIN_CHUNK_LINES = 4
+MAX_CHUNK_LINES = 256
+
+Chunk = Tuple[int, int, str]
+
+def chunk_text(text: str) -> List[Chunk]:
+    """
+    Content-defined chunking at line granularity: a gear-style rolling hash over line
+    CRCs picks chunk boundaries, so an edit only changes the chunks around it and the
+    chunks after it resynchronise. Returns (start, end, digest) tuples.
+    """
+    chunks = []
+    start = position = lines = 0
+    rolling = 0
+    for line in text.splitlines(keepends=True):
+        position += len(line)
+        lines += 1
+        rolling = ((rolling << 1) + zlib.crc32(line.encode("utf-8"))) & 0xFFFFFFFF
+        if lines >= MAX_CHUNK_LINES or (lines >= MIN_CHUNK_LINES and rolling & CHUNK_MASK == 0):
+            chunks.append((start, position, _digest(text[start:position])))
+            start, lines, rolling = position, 0, 0
+    if start < len(text):
+        chunks.append((start, len(text), _digest(text[start:])))
+    return chunks
+
+def _digest(chunk: str) -> str:
+    return hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).hexdigest()
+
+class IncrementalState:
+    """
+    What a previous run left next to its output: the input's chunks, the resolved
+    content spans and the content hash of every written file.
+    """
+
+    def __init__(self, chunks: List[Chunk], spans: SpanTable, files: Dict[str, str]):
+        self.chunks = chunks
+        self.spans = spans
+        self.files = files
+
+    @staticmethod
+    def path(output_dir: str) -> str:
+        return os.path.join(output_dir, settings.INCREMENTAL_STATE_FILE)
+
+    @classmethod
+    def load(cls, output_dir: str) -> Optional["IncrementalState"]:
+        try:
+            with open(cls.path(output_dir), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != STATE_VERSION:
+                return None
+            chunks = [tuple(chunk) for chunk in data["chunks"]]
+            spans = SpanTable.from_columns(data["spans"]["filenames"], data["spans"]["starts"], data["spans"]["ends"])
+            if not validate_span_table(spans, chunks[-1][1] if chunks else 0):
+                raise ValueError("spans outside the recorded input")
+            return cls(chunks, spans, dict(data["files"]))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable incremental state in {output_dir}: {e}")
+            return None
+
+    def save(self, output_dir: str):
+        os.makedirs(output_dir, exist_ok=True)
+        data = {"version": STATE_VERSION, "chunks": self.chunks, "spans": self.spans.to_columns(), "files": self.files}
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path(output_dir))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+def plan_reuse(previous: IncrementalState, new_chunks: List[Chunk],
+               text_length: int) -> Tuple[SpanTable, List[Tuple[int, int, int]]]:
+    """
+    Diffs the new input's chunks against the previous run's.
+
+    A previous span is reused (shifted to its new offset) when everything from the end
+    of the preceding span to the start of the following one, i.e. the file's header,
+    content and footer, lies in unchanged chunks that moved together.
+
+    Every stretch of the new text not covered by a reused span and its header is returned
+    as a (start, end, scan_end) region that needs boundary detection again. scan_end
+    extends the region up to the next reused span so that the footer of the region's last
+    file is part of the scanned text; only spans starting before `end` belong to it.
+    """
+    runs = _unchanged_runs(previous.chunks, new_chunks)
+    run_starts = [old_start for old_start, _, _ in runs]
+    old_length = previous.chunks[-1][1] if previous.chunks else 0
+    spans = SpanTable(previous.spans)
+    spans.sort()
+
+    reused = SpanTable()
+    covered: List[Tuple[int, int]] = []
+    segment_start = 0
+    for position, (filename, start, end) in enumerate(spans):
+        segment_end = spans.starts[position + 1] if position + 1 < len(spans) else old_length
+        index = bisect_right(run_starts, segment_start) - 1
+        if index >= 0:
+            old_start, old_end, delta = runs[index]
+            if segment_start >= old_start and max(end, segment_end) <= old_end:
+                reused.append(filename, start + delta, end + delta)
+                covered.append((segment_start + delta, end + delta))
+        segment_start = max(segment_start, end)
+
+    reused_starts = sorted(reused.starts) + [text_length]
+    regions = []
+    cursor = 0
+    for start, end in sorted(covered) + [(text_length, text_length)]:
+        if start > cursor:
+            # The following reused span's content starts after its header; scan up to there
+            scan_end = reused_starts[bisect_left(reused_starts, start)]
+            regions.append((cursor, start, scan_end))
+        cursor = max(cursor, end)
+    return reused, regions
+
+def _unchanged_runs(old_chunks: List[Chunk], new_chunks: List[Chunk]) -> List[Tuple[int, int, int]]:
+    # Pair identical chunks in order, then merge pairs that are adjacent in both texts
+    available = defaultdict(deque)
+    for start, end, digest in old_chunks:
+        available[digest].append((start, end))
+
+    runs: List[List[int]] = []
+    for new_start, new_end, digest in new_chunks:
+        if not available[digest]:
+            continue
+        old_start, old_end = available[digest].popleft()
+        delta = new_start - old_start
+        if runs and runs[-1][1] == old_start and runs[-1][2] == delta:
+            runs[-1][1] = old_end
+        else:
+            runs.append([old_start, old_end, delta])
+    runs.sort()
+    return [tuple(run) for run in runs]
@@ -0,0 +1,103 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+Text = Union[str, bytes]
+
+# Longest marker prefix used to build the skip regex that jumps between candidate positions
+SKIP_PREFIX_LENGTH = 8
+
+class MarkerAutomaton:
+    """
+    Aho-Corasick automaton that finds every occurrence of a fixed set of markers in a
+    single left-to-right pass over the text.
+
+    Works on `str` or on bytes-like buffers (bytes, mmap) as long as the markers have
+    the same type as the text being scanned. While the automaton sits in its root state
+    it jumps straight to the next position where a marker prefix occurs using a compiled
+    regex, so runs of text that cannot start a marker are skipped at C speed.
+    """
+
+    def __init__(self, markers: Iterable[Text]):
+        self.markers: List[Text] = []
+        marker_ids: Dict[Text, int] = {}
+        for marker in markers:
+            if marker and marker not in marker_ids:
+                marker_ids[marker] = len(self.markers)
+                self.markers.append(marker)
+
+        self._goto: List[Dict] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Sequence[int]] = [()]
+        self._build()
+        self._skip = self._build_skip_regex()
+
+    def _build(self):
+        # Trie of all markers
+        for marker_id, marker in enumerate(self.markers):
+            state = 0
+            for symbol in marker:
+                next_state = self._goto[state].get(symbol)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][symbol] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] = self._out[state] + (marker_id,)
+
+        # Breadth-first failure links, merging outputs along the failure chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and symbol not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fallback = self._goto[fail].get(symbol, 0)
+                self._fail[next_state] = fallback if fallback != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def _build_skip_regex(self):
+        if not self.markers:
+            return None
+        prefixes = sorted({marker[:SKIP_PREFIX_LENGTH] for marker in self.markers}, key=len, reverse=True)
+        if isinstance(prefixes[0], str):
+            return re.compile("|".join(re.escape(prefix) for prefix in prefixes))
+        return re.compile(b"|".join(re.escape(bytes(prefix)) for prefix in prefixes))
+
+    def find_all(self, text: Text, start: int = 0, end: Optional[int] = None) -> Dict[Text, List[int]]:
+        """
+        Return a mapping of marker -> ascending list of start offsets in `text`.
+        With `start`/`end`, only text[start:end] is scanned (without copying it) and
+        offsets are still relative to the whole text.
+        """
+        occurrences: Dict[Text, List[int]] = {marker: [] for marker in self.markers}
+        if self._skip is None:
+            return occurrences
+
+        goto, fail, out, markers = self._goto, self._fail, self._out, self.markers
+        hits = [occurrences[marker] for marker in markers]
+        lengths = [len(marker) for marker in markers]
+        search = self._skip.search
+        state = 0
+        position = start
+        text_len = len(text) if end is None else min(end, len(text))
+
+        while position < text_len:
+            if state == 0:
+                match = search(text, position, text_len)
+                if match is None:
+                    break
+                position = match.start()
+            symbol = text[position]
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            for marker_id in out[state]:
+                hits[marker_id].append(position - lengths[marker_id] + 1)
+            position += 1
+
+        return occurrences
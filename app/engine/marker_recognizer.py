@@ -0,0 +1,230 @@
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from app.config import settings
+from app.engine.span_table import SpanTable
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Language tags that chat-style dumps leave behind on the line after a section header
+LANGUAGE_TAGS = (
+    "bash", "c", "cpp", "csharp", "css", "csv", "dart", "go", "gradle", "groovy", "html",
+    "ini", "java", "javascript", "js", "json", "kotlin", "markdown", "md", "php", "plaintext",
+    "properties", "python", "py", "ruby", "rust", "sh", "shell", "sql", "swift", "text", "toml",
+    "ts", "tsx", "typescript", "txt", "xml", "yaml", "yml",
+)
+_LANGUAGE_TAG_LINE = r"(?:(?:" + "|".join(LANGUAGE_TAGS) + r")[ \t]*(?:\n|\Z))?"
+
+_NON_WHITESPACE = {str: re.compile(r"\S"), bytes: re.compile(rb"\S")}
+# Whitespace as str characters and as byte values, so one lookup serves both input types
+_WHITESPACE = frozenset(" \t\r\n\f\v") | frozenset(b" \t\r\n\f\v")
+
+Text = Union[str, bytes]
+
+class GrammarScan:
+    """
+    Result of one grammar scan: the content spans as a SpanTable, plus the offsets where
+    each section starts (its header) and ends (after its footer, if it has one) in two
+    parallel columns, which is all the coverage computation needs.
+    """
+
+    __slots__ = ("spans", "section_starts", "section_ends")
+
+    def __init__(self):
+        self.spans = SpanTable()
+        self.section_starts = array("q")
+        self.section_ends = array("q")
+
+    def append(self, filename: str, start: int, end: int, section_start: int, section_end: int):
+        self.spans.append(filename, start, end)
+        self.section_starts.append(section_start)
+        self.section_ends.append(section_end)
+
+    def sections(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.section_starts, self.section_ends)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+class MarkerGrammar:
+    """
+    A deterministic delimiter grammar recognized with a single compiled regex.
+
+    The pattern alternates between a `header` branch, which must capture the file path
+    in a `path` group, and an optional `footer` branch, which may capture `end_path`.
+    Sections without a footer run until the next header or the end of the text.
+
+    Grammars scan either `str` or bytes-like input (bytes, mmap); for bytes-like input
+    the offsets are byte offsets and the pattern is compiled from its UTF-8 encoding.
+    """
+
+    def __init__(self, name: str, header_pattern: str, footer_pattern: Optional[str] = None,
+                 footer_required: bool = False):
+        self.name = name
+        self.footer_required = footer_required
+        branches = [f"(?P<header>{header_pattern})"]
+        if footer_pattern:
+            branches.append(f"(?P<footer>{footer_pattern})")
+        self.pattern = re.compile("|".join(branches), re.MULTILINE)
+        self._byte_pattern = None
+
+    @property
+    def byte_pattern(self):
+        if self._byte_pattern is None:
+            self._byte_pattern = re.compile(self.pattern.pattern.encode("utf-8"), re.MULTILINE)
+        return self._byte_pattern
+
+    def scan(self, raw_text: Text) -> GrammarScan:
+        """
+        Scan the text once and append each recognized section straight to a GrammarScan;
+        no per-entry objects are built. Markers are not kept: they are the first line at
+        the section start and at the content end (see MarkerRecognizer.recognize).
+        """
+        result = GrammarScan()
+        # (filename, content start, section start) of the section awaiting its end
+        open_section = None
+        pattern = self.pattern if isinstance(raw_text, str) else self.byte_pattern
+
+        for match in pattern.finditer(raw_text):
+            if match.group("header") is not None:
+                if open_section is not None:
+                    if self.footer_required:
+                        logger.debug(f"Grammar {self.name}: section {open_section[0]} has no footer")
+                    else:
+                        filename, start, section_start = open_section
+                        result.append(filename, start, match.start(), section_start, match.start())
+                open_section = (_decode(match.group("path")).strip(), match.end(), match.start())
+            elif open_section is not None:
+                end_path = match.groupdict().get("end_path")
+                if end_path is not None and _decode(end_path).strip() != open_section[0]:
+                    continue
+                filename, start, section_start = open_section
+                result.append(filename, start, match.start(), section_start, match.end())
+                open_section = None
+
+        if open_section is not None and not self.footer_required:
+            filename, start, section_start = open_section
+            result.append(filename, start, len(raw_text), section_start, len(raw_text))
+        return result
+
+def _decode(value: Text) -> str:
+    return value if isinstance(value, str) else value.decode("utf-8", errors="replace")
+
+def _first_line(text: Text) -> str:
+    return _decode(text).strip().split("\n", 1)[0].strip()
+
+def _line_at(raw_text: Text, offset: int) -> str:
+    """The stripped line starting at `offset`, or "" at the end of the text."""
+    line_end = raw_text.find("\n" if isinstance(raw_text, str) else b"\n", offset)
+    return _first_line(raw_text[offset:line_end if line_end != -1 else len(raw_text)])
+
+DEFAULT_GRAMMARS = [
+    # --- FILE: path ---   (section runs until the next header)
+    MarkerGrammar(
+        "file_header",
+        r"^-{3,}[ \t]*FILE:[ \t]*(?P<path>[^\n]+?)[ \t]*-{3,}[ \t]*(?:\n|\Z)(?:[ \t]*\n)*" + _LANGUAGE_TAG_LINE,
+    ),
+    # ### START path ... ### END path
+    MarkerGrammar(
+        "start_end",
+        r"^#{2,}[ \t]*START[ \t]+(?P<path>[^\n]+?)[ \t]*(?:\n|\Z)",
+        r"^#{2,}[ \t]*END[ \t]+(?P<end_path>[^\n]+?)[ \t]*$",
+        footer_required=True,
+    ),
+    # ## path  followed by a fenced code block
+    MarkerGrammar(
+        "markdown_fence",
+        r"^#{1,6}[ \t]+(?:File:[ \t]*)?`?(?P<path>(?=[^\s`]*[./])[\w.\-/]+)`?[ \t]*\n(?:[ \t]*\n)*"
+        r"[ \t]*```[^\n]*\n",
+        r"^[ \t]*```[ \t]*$",
+        footer_required=True,
+    ),
+]
+
+class MarkerRecognizer:
+    """
+    LLM-free fast path: recognizes regular delimiter grammars with compiled regexes and
+    builds the boundary manifest locally. Returns None when no grammar covers enough of
+    the input, in which case the caller falls back to the BoundaryDetector.
+
+    `recognize_spans` returns the content spans as the SpanTable the grammars fill in,
+    which is all slicing and writing need; only `recognize` builds the manifest as dicts,
+    markers included, for callers that want it as JSON.
+    """
+
+    def __init__(self, grammars: Optional[Iterable[MarkerGrammar]] = None,
+                 min_coverage: float = settings.RECOGNIZER_MIN_COVERAGE):
+        self.grammars = list(grammars) if grammars is not None else list(DEFAULT_GRAMMARS)
+        self.min_coverage = min_coverage
+
+    def register(self, grammar: MarkerGrammar):
+        self.grammars.append(grammar)
+
+    def recognize(self, raw_text: Text) -> Optional[List[Dict]]:
+        result = self._best_scan(raw_text)
+        if result is None:
+            return None
+        return [
+            {
+                "filename": filename,
+                "start_marker": _line_at(raw_text, section_start),
+                "end_marker": _line_at(raw_text, end),
+                "start": start,
+                "end": end,
+            }
+            for (filename, start, end), section_start in zip(result.spans, result.section_starts)
+        ]
+
+    def recognize_spans(self, raw_text: Text) -> Optional[SpanTable]:
+        result = self._best_scan(raw_text)
+        return result.spans if result is not None else None
+
+    def _best_scan(self, raw_text: Text) -> Optional[GrammarScan]:
+        best, best_coverage, best_name = None, 0.0, None
+
+        for grammar in self.grammars:
+            result = grammar.scan(raw_text)
+            if not result:
+                continue
+            coverage = self.coverage(raw_text, result.sections())
+            if coverage > best_coverage or (coverage == best_coverage and best is not None
+                                            and len(result) > len(best)):
+                best, best_coverage, best_name = result, coverage, grammar.name
+
+        if best is None or best_coverage < self.min_coverage:
+            logger.info(f"No marker grammar matched with sufficient coverage (best: {best_coverage:.2f}).")
+            return None
+
+        logger.info(f"Grammar '{best_name}' recognized {len(best)} files "
+                    f"with coverage {best_coverage:.2f}.")
+        return best
+
+    @staticmethod
+    def coverage(raw_text: Text, sections: Iterable[Tuple[int, int]]) -> float:
+        """
+        Fraction of the input that belongs to the given (section start, section end)
+        ranges. Whitespace-only gaps between sections count as covered. Gaps are measured
+        in place without copying.
+        """
+        if not len(raw_text):
+            return 0.0
+        uncovered = 0
+        cursor = 0
+        for section_start, section_end in sections:
+            uncovered += _non_blank_length(raw_text, cursor, section_start)
+            cursor = max(cursor, section_end)
+        uncovered += _non_blank_length(raw_text, cursor, len(raw_text))
+        return 1.0 - uncovered / len(raw_text)
+
+def _non_blank_length(raw_text: Text, start: int, end: int) -> int:
+    """Length of text[start:end] once leading and trailing whitespace are removed."""
+    if start >= end:
+        return 0
+    match = _NON_WHITESPACE[str if isinstance(raw_text, str) else bytes].search(raw_text, start, end)
+    if match is None:
+        return 0
+    last = end
+    while last > match.start() and raw_text[last - 1] in _WHITESPACE:
+        last -= 1
+    return last - match.start()
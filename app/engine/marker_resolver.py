@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple, Union
+from app.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Text = Union[str, bytes]
+
+# Quote variants the LLM tends to swap; all are folded to a single apostrophe
+_QUOTES = str.maketrans({"‘": "'", "’": "'", "“": "'", "”": "'", '"': "'", "`": "'"})
+# Lines longer than this are never marker lines and are left out of the index
+MAX_INDEXED_LINE = 256
+# Shortest normalized marker accepted for substring (truncation) matching
+MIN_PARTIAL_LENGTH = 6
+# Trigrams occurring on more lines than this are too common to select candidates with
+MAX_POSTINGS = 4096
+# Most candidates verified with the edit-distance check per marker
+MAX_CANDIDATES = 64
+
+def normalize_marker(text: str) -> str:
+    """Whitespace-, quote- and case-insensitive form of a marker or line."""
+    return "".join(text.translate(_QUOTES).split()).casefold()
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)} or {text}
+
+def bounded_levenshtein(a: str, b: str, bound: int) -> Optional[int]:
+    """
+    Edit distance between a and b, or None as soon as it is known to exceed `bound`.
+    Only a diagonal band of width 2 * bound + 1 of the DP table is computed.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    inf = bound + 1
+    previous = [j if j <= bound else inf for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - bound), min(len(b), i + bound)
+        current = [inf] * (len(b) + 1)
+        current[0] = i if i <= bound else inf
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if min(current[low - 1:high + 1]) > bound:
+            return None
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= bound else None
+
+class FuzzyMarkerResolver:
+    """
+    Fallback for markers the LLM reproduced slightly wrong (changed whitespace or quotes,
+    truncation, a typo), so that the entry still resolves without another LLM call.
+
+    Markers are matched against whole lines of the text, tried in order:
+      1. normalized equality (whitespace-, quote- and case-insensitive), via a hash index
+      2. the normalized marker contained in a normalized line (truncated markers)
+      3. bounded Levenshtein distance against candidate lines that share trigrams
+
+    The line and trigram indexes are built once on the first lookup, so each lookup
+    only touches the lines that share rare trigrams with the marker. Works over str or
+    bytes-like buffers; offsets are in the units of the buffer.
+    """
+
+    def __init__(self, buffer: Text, max_distance_ratio: float = settings.MARKER_FUZZY_MAX_DISTANCE_RATIO):
+        self.buffer = buffer
+        self.max_distance_ratio = max_distance_ratio
+        self._line_starts: List[int] = []
+        self._line_ends: List[int] = []
+        self._normalized: List[str] = []
+        self._by_normalized: Dict[str, List[int]] = {}
+        self._by_trigram: Dict[str, List[int]] = {}
+        self._indexed = False
+
+    def find(self, marker: Text, start: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Returns the (start, end) offsets of the best matching line(s) at or after `start`,
+        or None. For a multi-line marker the span covers as many lines as the marker has.
+        """
+        if isinstance(marker, bytes):
+            marker = marker.decode("utf-8", errors="replace")
+        marker_lines = [normalize_marker(line) for line in marker.splitlines()]
+        marker_lines = [line for line in marker_lines if line]
+        if not marker_lines:
+            return None
+        self._build_index()
+
+        line_id = self._match_line(marker_lines[0], bisect_left(self._line_starts, start))
+        if line_id is None:
+            return None
+        last_id = self._following_line(line_id, len(marker_lines) - 1)
+        logger.info(f"Resolved marker {marker!r} by fuzzy match to line {self._normalized[line_id]!r}",
+                    extra={"sampled": True})
+        return self._line_starts[line_id], self._line_ends[last_id]
+
+    def _match_line(self, target: str, first_id: int) -> Optional[int]:
+        # 1. Normalized exact match
+        exact = self._by_normalized.get(target, [])
+        index = bisect_left(exact, first_id)
+        if index < len(exact):
+            return exact[index]
+
+        bound = int(len(target) * self.max_distance_ratio)
+        candidates = self._candidates(target, first_id, min_shared=len(_trigrams(target)) - 3 * max(bound, 1))
+
+        # 2. Marker truncated or embedded in a longer line
+        if len(target) >= MIN_PARTIAL_LENGTH:
+            contained = [line_id for line_id, _ in candidates if target in self._normalized[line_id]]
+            if contained:
+                return min(contained)
+
+        # 3. Bounded edit distance; ties go to the earliest line
+        best = None
+        for line_id, _ in candidates[:MAX_CANDIDATES]:
+            distance = bounded_levenshtein(target, self._normalized[line_id], bound)
+            if distance is not None and (best is None or (distance, line_id) < best):
+                best = (distance, line_id)
+        return best[1] if best else None
+
+    def _candidates(self, target: str, first_id: int, min_shared: int) -> List[Tuple[int, int]]:
+        postings = [self._by_trigram.get(gram, []) for gram in _trigrams(target)]
+        selective = [lines for lines in postings if len(lines) <= MAX_POSTINGS] or postings
+        shared = Counter()
+        for lines in selective:
+            shared.update(lines[bisect_left(lines, first_id):])
+        threshold = max(1, min(min_shared, len(selective)))
+        ranked = [(line_id, count) for line_id, count in shared.items() if count >= threshold]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+    def _following_line(self, line_id: int, extra_lines: int) -> int:
+        while extra_lines and line_id + 1 < len(self._normalized):
+            line_id += 1
+            if self._normalized[line_id]:
+                extra_lines -= 1
+        return line_id
+
+    def _build_index(self):
+        if self._indexed:
+            return
+        buffer = self.buffer
+        newline = "\n" if isinstance(buffer, str) else b"\n"
+        by_normalized = defaultdict(list)
+        by_trigram = defaultdict(list)
+
+        position = 0
+        length = len(buffer)
+        while position <= length:
+            end = buffer.find(newline, position)
+            if end == -1:
+                end = length
+            line_id = len(self._line_starts)
+            self._line_starts.append(position)
+            self._line_ends.append(end)
+
+            normalized = ""
+            if end - position <= MAX_INDEXED_LINE * 4:
+                line = buffer[position:end]
+                if not isinstance(line, str):
+                    line = bytes(line).decode("utf-8", errors="replace")
+                normalized = normalize_marker(line)
+                if len(normalized) > MAX_INDEXED_LINE:
+                    normalized = ""
+            self._normalized.append(normalized)
+            if normalized:
+                by_normalized[normalized].append(line_id)
+                for gram in _trigrams(normalized):
+                    by_trigram[gram].append(line_id)
+            position = end + 1
+
+        self._by_normalized = dict(by_normalized)
+        self._by_trigram = dict(by_trigram)
+        self._indexed = True
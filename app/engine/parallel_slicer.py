@@ -0,0 +1,191 @@
+import os
+import mmap
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from app.config import settings
+from app.engine.content_slicer import ContentSlicer, Manifest
+from app.engine.marker_automaton import MarkerAutomaton
+from app.engine.span_table import SpanTable
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Shards per worker process, so that uneven marker density still balances out
+SHARDS_PER_WORKER = 4
+# Characters encoded at a time when a str input is copied into the shared source
+ENCODE_CHUNK_CHARS = 1 << 20
+# tmpfs directory for the shared copy of str inputs (POSIX shared memory on Linux)
+SHARED_MEMORY_DIR = "/dev/shm"
+
+Source = Tuple[str, str]
+
+class ParallelSlicer(ContentSlicer):
+    """
+    ContentSlicer that runs the marker search of large inputs on all cores.
+
+    The input is partitioned into shards at line boundaries. Every shard is scanned by a
+    MarkerAutomaton in a worker process over the shared input: the input file itself when
+    the buffer is the mmap of `source_path`, otherwise a copy of the input in a shared
+    memory block, so the text is never pickled. A str input is encoded chunk by chunk
+    straight into a file in shared memory (tmpfs) that the parent and the workers map,
+    so its bytes exist only once. Each scan reads one marker length past the end of its
+    shard so that markers straddling a shard boundary are found exactly once. The
+    per-shard occurrences are concatenated in document order and resolved into spans
+    exactly as ContentSlicer does.
+
+    The markers reach each worker once, through the pool initializer, which builds the
+    worker's automaton; only with a caller-provided executor are they sent per shard.
+
+    Inputs below `min_bytes`, manifests without marker entries (the recognizer's offsets
+    need no search) and calls from inside a worker process stay sequential.
+    """
+
+    def __init__(self, source_path: Optional[str] = None, workers: int = settings.SLICE_WORKERS,
+                 min_bytes: int = settings.SLICE_PARALLEL_MIN_BYTES, executor: Optional[Executor] = None):
+        self.source_path = source_path
+        self.workers = workers or os.cpu_count() or 1
+        self.min_bytes = min_bytes
+        self.executor = executor
+
+    def slice_content(self, raw_text: str, manifest: Manifest) -> Dict[str, str]:
+        if not self._is_parallel(len(raw_text), manifest):
+            return super().slice_content(raw_text, manifest)
+        # Searched as UTF-8 bytes so that workers can share the input; spans are decoded back
+        with _encoded_source(raw_text) as (path, buffer):
+            slicer = ParallelSlicer(source_path=path, workers=self.workers, min_bytes=self.min_bytes,
+                                    executor=self.executor)
+            spans = slicer.slice_spans(buffer, manifest)
+            return {filename: buffer[start:end].decode("utf-8").strip() for filename, start, end in spans}
+
+    def find_occurrences(self, raw_text: Union[str, bytes], markers: List) -> Dict:
+        if isinstance(raw_text, str) or len(raw_text) < self.min_bytes or self.workers < 2 or _in_worker():
+            return super().find_occurrences(raw_text, markers)
+
+        unique = list(dict.fromkeys(marker for marker in markers if marker))
+        if not unique:
+            return {}
+        overlap = max(len(marker) for marker in unique) - 1
+        shards = split_shards(raw_text, self.workers * SHARDS_PER_WORKER)
+        logger.info(f"Searching {len(unique)} markers in {len(shards)} shards on {self.workers} processes.")
+
+        occurrences: Dict = {marker: [] for marker in unique}
+        source_path = self.source_path if isinstance(raw_text, mmap.mmap) else None
+        with _shared_source(raw_text, source_path) as source, self._pool(unique) as (executor, initialized):
+            # Workers of our own pool got the markers from the initializer; a caller's executor
+            # has to receive them with every shard
+            shard_markers = None if initialized else unique
+            futures = [executor.submit(_find_in_shard, source, start, end, min(end + overlap, len(raw_text)),
+                                       shard_markers)
+                       for start, end in shards]
+            # Shards are in document order, so concatenating keeps every list ascending
+            for future in futures:
+                for marker, positions in zip(unique, future.result()):
+                    occurrences[marker].extend(positions)
+        return occurrences
+
+    def _is_parallel(self, length: int, manifest: Manifest) -> bool:
+        if isinstance(manifest, SpanTable):
+            return False
+        has_markers = any(not (isinstance(item.get("start"), int) and isinstance(item.get("end"), int))
+                          for item in manifest)
+        has_offsets = any(isinstance(item.get("start"), int) for item in manifest)
+        return has_markers and not has_offsets and length >= self.min_bytes and self.workers > 1 and not _in_worker()
+
+    @contextmanager
+    def _pool(self, markers: List[bytes]) -> Iterator[Tuple[Executor, bool]]:
+        if self.executor is not None:
+            yield self.executor, False
+            return
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(markers,)) as executor:
+            yield executor, True
+
+def split_shards(buffer: Union[bytes, mmap.mmap], count: int) -> List[Tuple[int, int]]:
+    """Splits [0, len(buffer)) into up to `count` contiguous ranges that end at line starts."""
+    length = len(buffer)
+    bounds = [0]
+    for index in range(1, count):
+        cut = buffer.find(b"\n", max(bounds[-1], length * index // count)) + 1
+        if cut <= bounds[-1] or cut >= length:
+            continue
+        bounds.append(cut)
+    bounds.append(length)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def _in_worker() -> bool:
+    # Worker processes (of this pool or of batch mode) never start a nested pool.
+    # multiprocessing is only imported once an input is large enough to be sharded.
+    import multiprocessing
+
+    return multiprocessing.parent_process() is not None
+
+@contextmanager
+def _encoded_source(text: str) -> Iterator[Tuple[str, mmap.mmap]]:
+    """
+    UTF-8 encoding of `text` in a temporary file in shared memory (falling back to the
+    default temporary directory), written chunk by chunk so that no full bytes copy is
+    ever built in this process. Yields the file's path and a read-only map of it.
+    """
+    import tempfile
+
+    directory = SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None
+    with tempfile.NamedTemporaryFile(dir=directory, prefix="chaostocode-", suffix=".txt") as f:
+        for index in range(0, len(text), ENCODE_CHUNK_CHARS):
+            f.write(text[index:index + ENCODE_CHUNK_CHARS].encode("utf-8"))
+        if not f.tell():
+            # mmap cannot map an empty file
+            f.write(b"\n")
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield f.name, buffer
+
+@contextmanager
+def _shared_source(buffer, source_path: Optional[str]) -> Iterator[Source]:
+    if source_path is not None:
+        yield "file", source_path
+        return
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(buffer)))
+    try:
+        block.buf[:len(buffer)] = buffer
+        yield "shm", block.name
+    finally:
+        block.close()
+        block.unlink()
+
+# The automaton of a worker process, built once from the markers of its pool
+_worker_automaton: Optional[MarkerAutomaton] = None
+
+def _init_worker(markers: List[bytes]):
+    global _worker_automaton
+    _worker_automaton = MarkerAutomaton(markers)
+
+def _find_in_shard(source: Source, start: int, end: int, stop: int,
+                   markers: Optional[List[bytes]] = None) -> List[List[int]]:
+    """
+    Worker: occurrences of each marker starting inside [start, end), scanning up to
+    `stop` so that markers crossing `end` are complete. Runs in a child process. The
+    markers come from _init_worker, or with the shard when the pool was not ours.
+    """
+    global _worker_automaton
+    if markers is not None and (_worker_automaton is None or _worker_automaton.markers != markers):
+        _worker_automaton = MarkerAutomaton(markers)
+    automaton = _worker_automaton
+    markers = automaton.markers
+
+    kind, name = source
+    if kind == "file":
+        with open(name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            found = automaton.find_all(buffer, start, stop)
+    else:
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            found = automaton.find_all(block.buf, start, stop)
+        finally:
+            block.close()
+    return [[position for position in found[marker] if position < end] for marker in markers]
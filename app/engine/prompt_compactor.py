@@ -0,0 +1,107 @@
+import re
+from array import array
+from bisect import bisect_right
+from typing import Dict, List
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Lines that look like section delimiters: headings, rules, fences, comment banners, tags
+_DELIMITER_LINE = re.compile(r"^\s*(?:#{1,6}\s|-{3,}|={3,}|\*{3,}|/{2,}\s*[=\-#*]|<{2,}|>{2,}|\[\[|```|~~~|<!--)")
+# Lines that consist of a path, optionally labelled and decorated: "File: src/app.py", "*app.py*:"
+_PATH_LINE = re.compile(r"^[\W_]*(?:[A-Za-z ]{1,12}:\s*)?[\w.\-]*(?:/[\w.\-]+)*\.[A-Za-z][A-Za-z0-9]{0,9}[\W_]*$")
+# Candidate lines longer than this are unlikely headers (and are truncated in the skeleton)
+MAX_CANDIDATE_LENGTH = 160
+
+class LineIndex:
+    """
+    Offset index of the lines of a text: maps 1-based line numbers to character offsets
+    and back with a binary search.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        starts = array("q", [0])
+        position = text.find("\n")
+        while position != -1:
+            starts.append(position + 1)
+            position = text.find("\n", position + 1)
+        # A trailing newline does not start another line
+        if len(starts) > 1 and starts[-1] == len(text):
+            starts.pop()
+        self._starts = starts
+
+    @property
+    def line_count(self) -> int:
+        return len(self._starts)
+
+    def line_start(self, line_no: int) -> int:
+        return self._starts[line_no - 1]
+
+    def line_end(self, line_no: int) -> int:
+        """Offset just past the line's content, excluding its newline."""
+        if line_no < len(self._starts):
+            return self._starts[line_no] - 1
+        return len(self.text) - 1 if self.text.endswith("\n") else len(self.text)
+
+    def line(self, line_no: int) -> str:
+        return self.text[self.line_start(line_no):self.line_end(line_no)]
+
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self._starts, offset)
+
+def is_candidate_header(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > MAX_CANDIDATE_LENGTH:
+        return False
+    if _DELIMITER_LINE.match(line):
+        return True
+    # Short lines that name a file, e.g. "File: src/app.py" or "src/app.py:"
+    return _PATH_LINE.match(stripped) is not None
+
+def build_skeleton(index: LineIndex, context_lines: int = 1) -> str:
+    """
+    Builds a line-numbered skeleton of the text: candidate header lines (plus
+    `context_lines` lines after each) are kept as "L<n>: <line>" and every other run
+    of lines is collapsed into a single "... (<count> lines elided)" marker.
+    """
+    out: List[str] = []
+    keep_until = 0
+    elided = 0
+
+    for line_no in range(1, index.line_count + 1):
+        line = index.line(line_no)
+        if is_candidate_header(line):
+            keep_until = line_no + context_lines
+        if line_no <= keep_until:
+            if elided:
+                out.append(f"... ({elided} lines elided)")
+                elided = 0
+            out.append(f"L{line_no}: {line[:MAX_CANDIDATE_LENGTH]}")
+        else:
+            elided += 1
+
+    if elided:
+        out.append(f"... ({elided} lines elided)")
+    out.append(f"(end of text, {index.line_count} lines)")
+    return "\n".join(out)
+
+def map_line_ranges(index: LineIndex, entries: List[Dict]) -> List[Dict]:
+    """
+    Maps LLM line-range entries back to exact content offsets. Entries with out-of-range
+    or inverted line numbers are dropped.
+    """
+    manifest = []
+    for entry in entries:
+        start_line, end_line = entry["start_line"], min(entry["end_line"], index.line_count)
+        if start_line > end_line or start_line > index.line_count:
+            logger.warning(f"Dropping line range {start_line}-{entry['end_line']} for {entry['filename']}")
+            continue
+        manifest.append({
+            "filename": entry["filename"],
+            "start_marker": index.line(start_line - 1) if start_line > 1 else "",
+            "end_marker": index.line(end_line + 1) if end_line < index.line_count else "",
+            "start": index.line_start(start_line),
+            "end": index.line_end(end_line),
+        })
+    return manifest
@@ -0,0 +1,99 @@
+import sys
+from array import array
+from operator import le
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Span = Tuple[str, int, int]
+
+class SpanTable:
+    """
+    Compact, column-oriented list of resolved (filename, start, end) content spans.
+
+    Offsets live in two `array('q')` columns and filenames are interned, so a manifest
+    of 100k+ files costs a few machine words per entry instead of one dict (or tuple)
+    per entry, and creates almost no objects for the garbage collector to track.
+    Iterating yields plain (filename, start, end) tuples, so code written against
+    lists of span tuples works unchanged. Dict manifests (JSON) are only built at the
+    LLM boundary; everything after it passes tables around.
+    """
+
+    __slots__ = ("filenames", "starts", "ends")
+
+    def __init__(self, spans: Optional[Iterable[Span]] = None):
+        self.filenames: List[str] = []
+        self.starts = array("q")
+        self.ends = array("q")
+        if spans is not None:
+            self.extend(spans)
+
+    def append(self, filename: str, start: int, end: int):
+        self.filenames.append(sys.intern(filename))
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def extend(self, spans: Iterable[Span]):
+        if isinstance(spans, SpanTable):
+            self.filenames.extend(spans.filenames)
+            self.starts.extend(spans.starts)
+            self.ends.extend(spans.ends)
+            return
+        for filename, start, end in spans:
+            self.append(filename, start, end)
+
+    @classmethod
+    def from_columns(cls, filenames: List[str], starts: Iterable[int], ends: Iterable[int]) -> "SpanTable":
+        table = cls()
+        table.filenames = [sys.intern(filename) for filename in filenames]
+        table.starts = array("q", starts)
+        table.ends = array("q", ends)
+        if not len(table.filenames) == len(table.starts) == len(table.ends):
+            raise ValueError("Span table columns differ in length")
+        return table
+
+    def to_columns(self) -> Dict[str, list]:
+        """JSON-serializable columns, the inverse of from_columns."""
+        return {"filenames": self.filenames, "starts": self.starts.tolist(), "ends": self.ends.tolist()}
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def __iter__(self) -> Iterator[Span]:
+        return zip(self.filenames, self.starts, self.ends)
+
+    def __getitem__(self, index: int) -> Span:
+        return self.filenames[index], self.starts[index], self.ends[index]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SpanTable):
+            return NotImplemented
+        return self.filenames == other.filenames and self.starts == other.starts and self.ends == other.ends
+
+    def __repr__(self) -> str:
+        return f"SpanTable({len(self)} spans)"
+
+    def sort(self):
+        """Sorts in place by start offset; spans with equal starts keep their order."""
+        starts = self.starts
+        if all(map(le, starts, starts[1:])):
+            return
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        self.filenames = [self.filenames[i] for i in order]
+        self.starts = array("q", (starts[i] for i in order))
+        self.ends = array("q", (self.ends[i] for i in order))
+
+    def last_per_filename(self) -> "SpanTable":
+        """
+        One span per filename: the last one, at the position where the filename first
+        appeared (what assigning every span into a dict keyed by filename gives).
+        """
+        # Updating a key keeps its insertion position, i.e. the first appearance
+        last: Dict[str, int] = {}
+        for index, filename in enumerate(self.filenames):
+            last[filename] = index
+        if len(last) == len(self):
+            return self
+        return SpanTable.from_columns(list(last), (self.starts[i] for i in last.values()),
+                                      (self.ends[i] for i in last.values()))
+
+    def content_bytes(self) -> int:
+        return sum(self.ends) - sum(self.starts)
@@ -0,0 +1,182 @@
+from typing import Iterable, Iterator, Optional, Tuple
+from app.config import settings
+from app.engine.marker_recognizer import DEFAULT_GRAMMARS, MarkerGrammar, MarkerRecognizer, _decode
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Longest header or footer (in bytes) that is guaranteed to be recognized when it
+# straddles a chunk edge; this much of every chunk is carried over to the next one
+MAX_MARKER_SPAN = 64 * 1024
+
+_OPEN, _DATA, _CLOSE = "open", "data", "close"
+
+class IncompleteSegmentError(ValueError):
+    """Raised at the end of a StreamSegment whose section was never closed."""
+
+def select_grammar(prefix: bytes, eof: bool, grammars: Optional[Iterable[MarkerGrammar]] = None,
+                   min_coverage: float = settings.RECOGNIZER_MIN_COVERAGE) -> Optional[MarkerGrammar]:
+    """
+    Picks the grammar that covers the most of the first chunk of a stream, like
+    MarkerRecognizer does for a whole text. Unless the chunk is the whole input, a
+    section that is still open at the end of the chunk counts as covered, since its
+    footer may only arrive in a later chunk.
+    """
+    best, best_coverage = None, 0.0
+    for grammar in grammars if grammars is not None else DEFAULT_GRAMMARS:
+        result = grammar.scan(prefix)
+        sections = list(result.sections())
+        if not eof and grammar.footer_required:
+            headers = [match.start() for match in grammar.byte_pattern.finditer(prefix)
+                       if match.group("header") is not None]
+            last_closed = sections[-1][1] if sections else 0
+            if headers and headers[-1] >= last_closed:
+                sections.append((headers[-1], len(prefix)))
+        if not sections:
+            continue
+        coverage = MarkerRecognizer.coverage(prefix, sections)
+        if coverage > best_coverage:
+            best, best_coverage = grammar, coverage
+    if best is None or best_coverage < min_coverage:
+        logger.info(f"No marker grammar matched the stream prefix with sufficient coverage (best: {best_coverage:.2f}).")
+        return None
+    logger.info(f"Streaming with grammar '{best.name}' (prefix coverage {best_coverage:.2f}).")
+    return best
+
+class StreamSegment:
+    """
+    One extracted file of a stream: iterating it yields the file content as byte pieces,
+    with surrounding whitespace trimmed, pulled from the input as the consumer asks for
+    them. `complete` is set once the section has been closed by its footer (or by the
+    next header, for grammars without footers). Iteration ends with IncompleteSegmentError
+    for a section that is never closed, so that writers discard what they wrote of it.
+    """
+
+    def __init__(self, filename: str, events: Iterator[Tuple[str, object]]):
+        self.filename = filename
+        self.complete = False
+        self.size = 0
+        self._events = events
+        self._exhausted = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        started = False
+        pending = b""
+        for piece in self._raw_pieces():
+            if not started:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                started = True
+            body = piece.rstrip()
+            if body:
+                if pending:
+                    self.size += len(pending)
+                    yield pending
+                self.size += len(body)
+                yield body
+                pending = piece[len(body):]
+            else:
+                pending += piece
+        if not self.complete:
+            raise IncompleteSegmentError(f"Section {self.filename} has no footer")
+
+    def _raw_pieces(self) -> Iterator[bytes]:
+        if self._exhausted:
+            return
+        for kind, value in self._events:
+            if kind == _DATA:
+                yield value
+            else:
+                self.complete = value
+                break
+        self._exhausted = True
+
+    def drain(self):
+        for _ in self._raw_pieces():
+            pass
+
+class StreamingSlicer:
+    """
+    Slices a dump that arrives as a sequence of byte chunks without ever holding more
+    than one chunk (plus MAX_MARKER_SPAN of carry-over) in memory.
+
+    The grammar's compiled byte pattern is run over each chunk prepended with the
+    unconsumed tail of the previous one. Matches that end close to the end of the buffer
+    are deferred to the next round, since more input could still change them, so a
+    marker split across a chunk edge is recognized exactly as in MarkerRecognizer. The
+    currently open section is carried across chunks as state, and its content is handed
+    out piece by piece through StreamSegment generators.
+    """
+
+    def __init__(self, grammar: MarkerGrammar, max_marker_span: int = MAX_MARKER_SPAN):
+        self.grammar = grammar
+        self.max_marker_span = max_marker_span
+
+    def segments(self, chunks: Iterable[bytes]) -> Iterator[StreamSegment]:
+        """
+        Yields a StreamSegment per section in input order. Each segment must be consumed
+        (or is drained) before the next one is produced.
+        """
+        events = self._events(chunks)
+        for kind, value in events:
+            if kind != _OPEN:
+                continue
+            segment = StreamSegment(value, events)
+            yield segment
+            segment.drain()
+
+    def _events(self, chunks: Iterable[bytes]) -> Iterator[Tuple[str, object]]:
+        pattern = self.grammar.byte_pattern
+        footer_required = self.grammar.footer_required
+        open_name: Optional[str] = None
+        carry = b""
+
+        for chunk, eof in _with_eof(chunks):
+            buffer = carry + chunk if carry else chunk
+            if eof:
+                safe = len(buffer)
+            else:
+                # Only a line start at least max_marker_span before the end is a safe cut
+                safe = buffer.rfind(b"\n", 0, max(0, len(buffer) - self.max_marker_span)) + 1
+            position = 0
+
+            for match in pattern.finditer(buffer):
+                if match.end() > safe and not eof:
+                    safe = min(safe, match.start())
+                    break
+                if match.group("header") is not None:
+                    if open_name is not None:
+                        if not footer_required:
+                            yield _DATA, buffer[position:match.start()]
+                        yield _CLOSE, not footer_required
+                    open_name = _decode(match.group("path")).strip()
+                    yield _OPEN, open_name
+                elif open_name is not None:
+                    end_path = match.groupdict().get("end_path")
+                    if end_path is not None and _decode(end_path).strip() != open_name:
+                        continue
+                    yield _DATA, buffer[position:match.start()]
+                    yield _CLOSE, True
+                    open_name = None
+                position = match.end()
+
+            if open_name is not None and position < safe:
+                yield _DATA, buffer[position:safe]
+            carry = buffer[safe:]
+
+        if open_name is not None:
+            yield _CLOSE, not footer_required
+
+def _with_eof(chunks: Iterable[bytes]) -> Iterator[Tuple[bytes, bool]]:
+    # Pairs each chunk with whether it is the last one
+    iterator = iter(chunks)
+    previous = next(iterator, None)
+    if previous is None:
+        yield b"", True
+        return
+    for chunk in iterator:
+        if chunk:
+            yield previous, False
+            previous = chunk
+    yield previous, True
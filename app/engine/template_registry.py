@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.engine.content_slicer import ContentSlicer, Manifest
+from app.engine.marker_recognizer import MarkerGrammar, MarkerRecognizer
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+from app.utils.security import validate_template_spec
+
+logger = get_logger(__name__)
+
+TEMPLATE_KEYS = ("header_prefix", "header_suffix", "footer_prefix", "footer_suffix", "footer_path")
+# The only variable part of a template: a lazy, single-line path. Everything around it is
+# escaped literal text, so a template scans in time linear in the input whatever the LLM says
+_PATH = r"(?P<{group}>[^\n]+?)"
+
+def template_name(spec: Dict) -> str:
+    """Stable name of a template, derived from its literals."""
+    digest = hashlib.sha256(json.dumps([spec.get(key) for key in TEMPLATE_KEYS]).encode("utf-8"))
+    return f"template-{digest.hexdigest()[:12]}"
+
+def template_patterns(spec: Dict) -> Tuple[str, Optional[str]]:
+    """Header and footer regexes of a validated template spec."""
+    header = (r"^" + re.escape(spec["header_prefix"]) + _PATH.format(group="path")
+              + re.escape(spec.get("header_suffix") or "") + r"[ \t]*(?:\n|\Z)")
+    if spec.get("footer_prefix") is None:
+        return header, None
+    footer_path = _PATH.format(group="end_path") if spec.get("footer_path") else ""
+    footer = (r"^" + re.escape(spec["footer_prefix"]) + footer_path
+              + re.escape(spec.get("footer_suffix") or "") + r"[ \t]*$")
+    return header, footer
+
+def grammar_from_spec(spec: Dict) -> MarkerGrammar:
+    header, footer = template_patterns(spec)
+    return MarkerGrammar(spec["name"], header, footer, footer_required=footer is not None)
+
+def verify_template(grammar: MarkerGrammar, raw_text: str, manifest: Manifest,
+                    min_coverage: float = settings.RECOGNIZER_MIN_COVERAGE) -> bool:
+    """
+    A template is only trusted if recognizing `raw_text` with it alone reaches the usual
+    coverage and slices exactly the files, with exactly the contents, of `manifest`.
+    """
+    expected = ContentSlicer().slice_content(raw_text, manifest)
+    spans = MarkerRecognizer([grammar], min_coverage=min_coverage).recognize_spans(raw_text)
+    if not expected or spans is None:
+        return False
+    return ContentSlicer().slice_content(raw_text, spans) == expected
+
+class TemplateRegistry:
+    """
+    Registry of delimiter templates induced by the LLM, persisted as one JSON file.
+
+    Each template describes the delimiter format of a dump generator as literal header
+    and footer text around the file path (see validate_template_spec); its grammar is
+    built from escaped literals, never from a regex written by the LLM. Templates are
+    only added after verify_template has reproduced the LLM manifest with them, so a
+    later dump from the same generator can be sliced by the MarkerRecognizer without
+    any LLM call. Re-learning a template moves it to the end; beyond max_entries the
+    least recently learned ones are dropped, since every template costs one regex scan
+    of the input on each run. learn() may be called from worker threads.
+    """
+
+    def __init__(self, path: Optional[str] = settings.TEMPLATE_REGISTRY_FILE,
+                 max_entries: int = settings.TEMPLATE_REGISTRY_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._specs: Optional[List[Dict]] = None
+        self._grammars: Optional[List[MarkerGrammar]] = None
+        self._lock = threading.Lock()
+
+    def specs(self) -> List[Dict]:
+        if self._specs is None:
+            self._specs = self._load()
+        return self._specs
+
+    def grammars(self) -> List[MarkerGrammar]:
+        if self._grammars is None:
+            self._grammars = [grammar_from_spec(spec) for spec in self.specs()]
+        return self._grammars
+
+    def learn(self, spec: Optional[Dict], raw_text: str, manifest: Manifest) -> Optional[MarkerGrammar]:
+        """
+        Verifies an induced template against the manifest the LLM produced for the same
+        text and registers it. Returns its grammar, or None if it was rejected.
+        """
+        if spec is None or not validate_template_spec(spec):
+            return None
+        spec = {key: spec.get(key) for key in TEMPLATE_KEYS}
+        spec["footer_path"] = bool(spec["footer_path"]) and spec["footer_prefix"] is not None
+        spec["name"] = template_name(spec)
+        grammar = grammar_from_spec(spec)
+        if not verify_template(grammar, raw_text, manifest):
+            logger.info(f"Induced template {spec['name']} does not reproduce the LLM manifest; discarded.")
+            metrics.inc("templates_induced_total", status="rejected")
+            return None
+
+        with self._lock:
+            specs = [existing for existing in self.specs() if existing["name"] != spec["name"]]
+            specs.append(spec)
+            self._specs = specs[-self.max_entries:]
+            self._grammars = None
+            logger.info(f"Registered delimiter template {spec['name']} ({len(self._specs)} known).")
+            if self.path:
+                try:
+                    self._save()
+                except OSError as e:
+                    logger.warning(f"Could not persist template registry {self.path}: {e}")
+        metrics.inc("templates_induced_total", status="accepted")
+        return grammar
+
+    def _load(self) -> List[Dict]:
+        if not self.path:
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                specs = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable template registry {self.path}: {e}")
+            return []
+        if not isinstance(specs, list):
+            return []
+        # The file may have been edited by hand: re-validate every template
+        return [spec for spec in specs if validate_template_spec(spec) and isinstance(spec.get("name"), str)]
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._specs, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+_shared_registry: Optional[TemplateRegistry] = None
+
+def get_template_registry() -> TemplateRegistry:
+    """Returns the process-wide template registry, loading it on first use."""
+    global _shared_registry
+    if _shared_registry is None:
+        _shared_registry = TemplateRegistry()
+    return _shared_registry
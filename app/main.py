@@ -1,52 +1,437 @@
 import os
 import sys
 import asyncio
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from itertools import chain
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 from app.config import settings
-from app.engine.boundary_detector import BoundaryDetector
-from app.engine.content_slicer import ContentSlicer
-from app.utils.file_io import read_input_file, write_output_files
+from app.core.circuit_breaker import CircuitOpenError
+from app.engine.content_slicer import ContentSlicer, IncrementalSlicer, Manifest, encode_offsets
+from app.engine.incremental import IncrementalState, chunk_text, plan_reuse
+from app.engine.marker_recognizer import DEFAULT_GRAMMARS, MarkerGrammar, MarkerRecognizer
+from app.engine.parallel_slicer import ParallelSlicer
+from app.engine.span_table import SpanTable
+from app.engine.stream_slicer import StreamSegment, StreamingSlicer, select_grammar
+from app.utils.file_io import (STDIN_PATH, content_hash, iter_chunks, open_input_mmap, open_input_stream,
+                               read_input_file, write_output_files)
 from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+from app.utils.output_sinks import SINKS, OutputSink, open_sink
 from app.utils.security import validate_path_safely
 
 logger = get_logger(__name__)
 
-async def process_file(input_filepath: str, output_dir: str):
+async def detect_manifest(raw_text) -> Manifest:
+    """
+    Step 1 & 2: Build the manifest locally when the input uses a known marker grammar
+    (as a SpanTable of content offsets), otherwise use the LLM to generate a JSON manifest
+    of boundaries asynchronously. Accepts `str` or a bytes-like buffer; the LLM path
+    decodes a bytes-like buffer.
+    """
+    with metrics.timer("detect") as fields:
+        json_manifest, fields["source"] = await _detect_manifest(raw_text)
+        fields["entries"] = len(json_manifest)
+    metrics.inc("manifests_total", source=fields["source"])
+    return json_manifest
+
+def _template_grammars() -> List[MarkerGrammar]:
+    if not settings.TEMPLATE_INDUCTION_ENABLED:
+        return []
+    from app.engine.template_registry import get_template_registry
+
+    return get_template_registry().grammars()
+
+def _recognize_spans(raw_text) -> Tuple[Optional[SpanTable], str]:
+    """
+    Tries the built-in marker grammars, then the delimiter templates induced by the LLM
+    in earlier runs. Returns the spans (None if nothing matched) and their source.
+    """
+    if not settings.RECOGNIZER_ENABLED:
+        return None, "recognizer"
+    spans = MarkerRecognizer().recognize_spans(raw_text)
+    if spans is not None:
+        logger.info("Obtained span manifest from marker recognizer.")
+        return spans, "recognizer"
+    templates = _template_grammars()
+    spans = MarkerRecognizer(templates).recognize_spans(raw_text) if templates else None
+    if spans is not None:
+        logger.info("Obtained span manifest from an induced delimiter template.")
+    return spans, "template"
+
+async def _detect_manifest(raw_text) -> Tuple[Manifest, str]:
+    # A regex scan of the whole input per grammar: keep it off the event loop, which may
+    # be serving other requests meanwhile; only the LLM fallback below runs on the loop
+    loop = asyncio.get_running_loop()
+    json_manifest, source = await loop.run_in_executor(None, _recognize_spans, raw_text)
+    if json_manifest is not None:
+        return json_manifest, source
+
+    buffer = raw_text
+    if not isinstance(raw_text, str):
+        raw_text = raw_text[:].decode("utf-8")
+    # The LLM path (detector, manifest cache, gateway) is only imported when it is taken
+    from app.engine.boundary_detector import BoundaryDetector
+
+    boundary_detector = BoundaryDetector()
+    template_request = None
+    if settings.TEMPLATE_INDUCTION_ENABLED and settings.RECOGNIZER_ENABLED:
+        # Asked alongside the boundaries, so that induction adds no latency to the run
+        template_request = asyncio.ensure_future(boundary_detector.request_template(raw_text))
+    try:
+        json_manifest = await boundary_detector.detect_boundaries(raw_text)
+        if template_request is not None:
+            from app.engine.template_registry import get_template_registry
+
+            # Verification scans the whole input twice; keep it off the event loop
+            await loop.run_in_executor(
+                None, get_template_registry().learn, await template_request, raw_text, json_manifest)
+    except CircuitOpenError:
+        # The LLM endpoint is unhealthy: accept any grammar match rather than failing the run
+        json_manifest = await loop.run_in_executor(None, MarkerRecognizer(min_coverage=0.0).recognize_spans, buffer)
+        if not json_manifest:
+            raise
+        logger.warning("LLM circuit open; using best-effort marker recognizer manifest.")
+        return json_manifest, "fallback"
+    finally:
+        if template_request is not None:
+            template_request.cancel()
+    logger.info("Obtained JSON manifest with boundaries from LLM.")
+    if buffer is not raw_text:
+        # Offsets mapped from line ranges index the decoded text; the caller slices the bytes
+        json_manifest = encode_offsets(raw_text, json_manifest)
+    return json_manifest, "llm"
+
+def slice_text(raw_text: str, json_manifest: Manifest) -> Dict[str, str]:
+    """
+    Step 3 & 4: Slice content using Python engine. Module-level so that batch mode can
+    run it in a process pool. Marker search for large inputs is spread over processes.
+    """
+    return ParallelSlicer().slice_content(raw_text, json_manifest)
+
+async def extract_text(raw_text: str, slice_executor: Optional[Executor] = None) -> Dict[str, str]:
+    """
+    Detects boundaries and slices text that is already in memory, without writing anything.
+
+    Args:
+        slice_executor: Optional executor (e.g. a process pool) for the CPU-bound slicing step.
+
+    Returns:
+        Dict mapping filenames to their extracted content strings.
+    """
+    if not raw_text.strip():
+        raise ValueError("Input text is empty.")
+
+    json_manifest = await detect_manifest(raw_text)
+
+    if slice_executor is not None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(slice_executor, slice_text, raw_text, json_manifest)
+    return slice_text(raw_text, json_manifest)
+
+async def stream_extracted_files(raw_text: str) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Streaming counterpart of extract_text: yields (filename, content) pairs as soon as
+    each manifest entry has been parsed from the streamed LLM response, so slicing and
+    writing start before the LLM has finished.
+    """
+    if not raw_text.strip():
+        raise ValueError("Input text is empty.")
+
+    loop = asyncio.get_running_loop()
+    json_manifest, _ = await loop.run_in_executor(None, _recognize_spans, raw_text)
+    if json_manifest is not None:
+        for item in slice_text(raw_text, json_manifest).items():
+            yield item
+        return
+
+    from app.engine.boundary_detector import BoundaryDetector
+
+    slicer = IncrementalSlicer(raw_text)
+    yielded = False
+    try:
+        async for entry in BoundaryDetector().stream_boundaries(raw_text):
+            sliced = slicer.slice_entry(entry)
+            if sliced is not None:
+                yielded = True
+                yield sliced
+    except CircuitOpenError:
+        json_manifest = None if yielded else await loop.run_in_executor(
+            None, MarkerRecognizer(min_coverage=0.0).recognize_spans, raw_text)
+        if not json_manifest:
+            raise
+        logger.warning("LLM circuit open; using best-effort marker recognizer manifest.")
+        for item in slice_text(raw_text, json_manifest).items():
+            yield item
+
+async def process_text(raw_text: str, output_dir: str, slice_executor: Optional[Executor] = None,
+                       stream: bool = False, incremental: bool = False, sink: str = "dir") -> dict:
+    """
+    Runs detection, slicing and writing for text that is already in memory.
+
+    Args:
+        stream: Stream the LLM manifest and write each file as soon as its entry arrives.
+        incremental: Reuse the previous run's boundaries for unchanged parts of the input
+            and only rewrite files whose content changed.
+        sink: Output sink, one of SINKS: a directory tree (`dir`), a single `tar` or `zip`
+            archive, or a content-addressed store (`cas`).
+
+    Returns:
+        Summary dict with the number of files written and their total size in bytes.
+    """
+    if incremental:
+        if sink != "dir":
+            raise ValueError("Incremental mode requires the dir output sink.")
+        return await _process_text_incremental(raw_text, output_dir)
+    if stream:
+        return await _process_text_streaming(raw_text, output_dir, sink)
+
+    files_content = await extract_text(raw_text, slice_executor=slice_executor)
+
+    # Write sliced content into files
+    async with open_sink(sink, output_dir) as out:
+        await out.write_files(files_content)
+    logger.info(f"Successfully wrote extracted files to: {output_dir}")
+    return {"files": len(files_content), "bytes": sum(len(content.encode("utf-8")) for content in files_content.values())}
+
+async def _process_text_streaming(raw_text: str, output_dir: str, sink: str = "dir") -> dict:
+    started = time.perf_counter()
+    files = 0
+    total_bytes = 0
+    async with open_sink(sink, output_dir) as out:
+        async for filename, content in stream_extracted_files(raw_text):
+            await out.write_files({filename: content})
+            if not files:
+                logger.info(f"First file written {time.perf_counter() - started:.3f}s after detection started.")
+            files += 1
+            total_bytes += len(content.encode("utf-8"))
+
+    logger.info(f"Successfully wrote {files} streamed files to: {output_dir}")
+    return {"files": files, "bytes": total_bytes}
+
+async def _process_text_incremental(raw_text: str, output_dir: str) -> dict:
+    if not raw_text.strip():
+        raise ValueError("Input text is empty.")
+
+    chunks = chunk_text(raw_text)
+    previous = IncrementalState.load(output_dir)
+    if previous is None:
+        reused, regions = SpanTable(), [(0, len(raw_text), len(raw_text))]
+    else:
+        reused, regions = plan_reuse(previous, chunks, len(raw_text))
+    regions = [region for region in regions if raw_text[region[0]:region[2]].strip()]
+    logger.info(f"Incremental run: reusing {len(reused)} file spans, re-detecting {len(regions)} region(s) "
+                f"({sum(end - start for start, end, _ in regions)} of {len(raw_text)} characters).")
+
+    # Detect boundaries in the changed regions only and shift their spans to full-text offsets
+    spans = SpanTable(reused)
+    manifests = await asyncio.gather(*(detect_manifest(raw_text[start:scan_end]) for start, _, scan_end in regions))
+    slicer = ContentSlicer()
+    for (start, end, scan_end), json_manifest in zip(regions, manifests):
+        for filename, span_start, span_end in slicer.resolve_spans(raw_text[start:scan_end], json_manifest):
+            if span_start < end - start:
+                spans.append(filename, start + span_start, start + span_end)
+    spans.sort()
+
+    files_content = {filename: raw_text[start:end].strip() for filename, start, end in spans}
+    written = await write_output_files(files_content, output_dir, previous.files if previous else None)
+    IncrementalState(chunks, spans, {filename: content_hash(content) for filename, content in files_content.items()}
+                     ).save(output_dir)
+
+    logger.info(f"Incremental run wrote {written} of {len(files_content)} files to: {output_dir}")
+    return {"files": len(files_content), "written": written, "reused": len(reused),
+            "bytes": sum(len(content.encode("utf-8")) for content in files_content.values())}
+
+async def process_file(input_filepath: str, output_dir: str, zero_copy: bool = False,
+                       slice_executor: Optional[Executor] = None, stream: bool = False,
+                       incremental: bool = False, sink: str = "dir", chunked: bool = False) -> dict:
+    """
+    Runs the full pipeline for an input file, or for standard input when input_filepath
+    is STDIN_PATH ("-").
+
+    Args:
+        zero_copy: Memory-map the input and write byte spans without decoding them.
+        chunked: Read and slice the input in INPUT_CHUNK_SIZE chunks, so memory is bounded
+            by the chunk size and the largest file rather than by the size of the dump.
+    """
     # Validate paths for security
     if not validate_path_safely(input_filepath) or not validate_path_safely(output_dir):
         logger.error(f"Invalid characters or path traversal detected in paths: {input_filepath}, {output_dir}")
         raise ValueError("Invalid paths provided.")
 
+    if chunked:
+        return await _process_file_chunked(input_filepath, output_dir, sink)
+    if zero_copy and input_filepath == STDIN_PATH:
+        raise ValueError("Standard input cannot be memory-mapped; use --chunked instead of --zero-copy.")
+    if zero_copy and not incremental:
+        return await _process_file_zero_copy(input_filepath, output_dir, sink)
+
     # Read input raw text
     raw_text = await read_input_file(input_filepath)
     logger.info("Successfully read the input file.")
 
-    # Step 1 & 2: Use LLM to generate JSON manifest of boundaries asynchronously
-    boundary_detector = BoundaryDetector()
-    json_manifest = await boundary_detector.detect_boundaries(raw_text)
-    logger.info("Obtained JSON manifest with boundaries from LLM.")
+    return await process_text(raw_text, output_dir, slice_executor=slice_executor, stream=stream,
+                              incremental=incremental, sink=sink)
 
-    # Step 3 & 4: Slice content using Python engine
-    content_slicer = ContentSlicer()
-    files_content = content_slicer.slice_content(raw_text, json_manifest)
+async def _process_file_zero_copy(input_filepath: str, output_dir: str, sink: str = "dir") -> dict:
+    # Memory-map the input; recognition, slicing and writing all work on byte spans of the map
+    buffer = open_input_mmap(input_filepath)
+    try:
+        logger.info("Successfully memory-mapped the input file.")
+        json_manifest = await detect_manifest(buffer)
+        spans = ParallelSlicer(source_path=input_filepath).slice_spans(buffer, json_manifest)
+        async with open_sink(sink, output_dir) as out:
+            await out.write_spans(buffer, spans)
+        logger.info(f"Successfully wrote extracted files to: {output_dir}")
+        return {"files": len(spans), "bytes": spans.content_bytes()}
+    finally:
+        buffer.close()
 
-    # Write sliced content into files
-    await write_output_files(files_content, output_dir)
-    logger.info(f"Successfully wrote extracted files to: {output_dir}")
+async def _process_file_chunked(input_filepath: str, output_dir: str, sink: str = "dir",
+                                chunk_size: Optional[int] = None) -> dict:
+    chunk_size = chunk_size or settings.INPUT_CHUNK_SIZE
+    loop = asyncio.get_running_loop()
+    with open_input_stream(input_filepath) as f:
+        first = await loop.run_in_executor(None, f.read, chunk_size)
+        metrics.inc("input_bytes_total", len(first))
+        eof = len(first) < chunk_size
+        grammar = None
+        if settings.RECOGNIZER_ENABLED and first.strip():
+            grammar = select_grammar(first, eof, DEFAULT_GRAMMARS + _template_grammars())
+        if grammar is None:
+            # Only a marker grammar can be applied chunk by chunk; the LLM needs the whole text
+            logger.warning("No marker grammar recognized at the start of the input; reading it into memory.")
+            rest = await loop.run_in_executor(None, f.read) if not eof else b""
+            metrics.inc("input_bytes_total", len(rest))
+            return await process_text((first + rest).decode("utf-8"), output_dir, sink=sink)
+
+        segments = StreamingSlicer(grammar).segments(chain([first], iter_chunks(f, chunk_size)))
+        with metrics.timer("stream") as fields:
+            async with open_sink(sink, output_dir) as out:
+                summary = await loop.run_in_executor(None, _write_segments, segments, out)
+            fields.update(summary)
+
+    logger.info(f"Successfully wrote {summary['files']} files from chunked input to: {output_dir}")
+    return summary
+
+def _write_segments(segments: Iterable[StreamSegment], out: OutputSink) -> dict:
+    # Runs in a worker thread: reading, slicing and writing proceed one segment at a time
+    files = written = total_bytes = 0
+    for segment in segments:
+        try:
+            size = out.write_segment(segment)
+        except ValueError as e:
+            logger.warning(f"Dropped {segment.filename}: {e}")
+            metrics.inc("manifest_entries_dropped_total")
+            continue
+        except OSError as e:
+            logger.error(f"Error writing file {segment.filename}: {e}")
+            metrics.inc("write_errors_total")
+            continue
+        files += 1
+        total_bytes += segment.size
+        if size is None:
+            metrics.inc("files_skipped_total")
+        else:
+            written += 1
+            metrics.inc("output_bytes_total", size)
+    metrics.inc("files_sliced_total", files)
+    metrics.inc("files_written_total", written)
+    return {"files": files, "written": written, "bytes": total_bytes}
+
+async def _run_and_close(coro):
+    # The pooled gateway lives for the whole run and is closed once at shutdown. It is
+    # only imported by the first LLM call, so there is nothing to close when none was made.
+    try:
+        return await coro
+    finally:
+        llm_gateway = sys.modules.get("app.core.llm_gateway")
+        if llm_gateway is not None:
+            await llm_gateway.close_shared_gateway()
+
+def serve(argv: Optional[list] = None):
+    """
+    Entry point for the long-running HTTP service (`python -m app.main serve`).
+    """
+    import argparse
+    from app.service import run_service
+
+    parser = argparse.ArgumentParser(description="Zero-Copy Slicer HTTP service for chaostocode")
+    parser.add_argument("--host", type=str, default=settings.SERVICE_HOST, help="Interface to bind")
+    parser.add_argument("--port", type=int, default=settings.SERVICE_PORT, help="Port to listen on")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_run_and_close(run_service(args.host, args.port)))
+    except KeyboardInterrupt:
+        logger.info("Service stopped.")
 
 def main():
     import argparse
 
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        return serve(sys.argv[2:])
+
     parser = argparse.ArgumentParser(description="Zero-Copy Slicer application for chaostocode")
-    parser.add_argument("--input", type=str, default="input_data/dump.txt", help="Path to the raw input text file")
+    parser.add_argument("--input", type=str, default="input_data/dump.txt",
+                        help="Path to the raw input text file, or - to read standard input")
     parser.add_argument("--output", type=str, default="output_sliced_files/", help="Directory to output sliced files")
+    parser.add_argument("--sink", choices=SINKS, default=settings.OUTPUT_SINK,
+                        help="Write a directory tree, a single .tar/.zip archive at --output, "
+                             "or a deduplicating content-addressed store")
+    parser.add_argument("--zero-copy", action="store_true",
+                        help="Memory-map the input and write byte spans without decoding or copying content")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Read the input in fixed-size chunks and write each file as it is recognized, "
+                             "so memory is bounded by the chunk size and the largest file")
+    parser.add_argument("--stream", action="store_true", default=settings.LLM_STREAMING,
+                        help="Stream the LLM manifest and write files as soon as each entry arrives")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-detect only the parts of the input that changed since the last run into --output")
+    parser.add_argument("--metrics-out", type=str, default=None,
+                        help="Write a JSON summary of stage timings and counters to this file")
+    parser.add_argument("--profile", type=str, nargs="?", const="profile", default=None, metavar="DIR",
+                        help="Profile the run (cProfile, per-stage timings, LLM wait vs run time) and write "
+                             "cpu.prof, profile.json and summary.txt to DIR (default: profile)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="With --profile, also trace per-stage peak allocations with tracemalloc (slow)")
+    parser.add_argument("--batch", type=str, default=None,
+                        help="Process many dumps: a directory, a glob pattern or a JSONL job list")
+    parser.add_argument("--batch-concurrency", type=int, default=settings.BATCH_MAX_CONCURRENCY,
+                        help="Maximum number of batch jobs in flight at once")
+    parser.add_argument("--workers", type=int, default=settings.BATCH_SLICE_WORKERS,
+                        help="Process pool size for batch slicing (0 = one per CPU)")
 
     args = parser.parse_args()
 
+    profiler = None
+    if args.profile:
+        from app.utils.profiler import PipelineProfiler
+
+        profiler = PipelineProfiler(args.profile, trace_memory=args.profile_memory)
     try:
-        asyncio.run(process_file(args.input, args.output))
+        with profiler or nullcontext():
+            _run(args)
     except Exception as ex:
         logger.error(f"Fatal error in processing file: {ex}", exc_info=True)
         sys.exit(1)
+    finally:
+        if args.metrics_out:
+            metrics.write_summary(args.metrics_out)
+
+def _run(args):
+    if args.batch:
+        from app.batch import discover_jobs, run_batch
+
+        jobs = discover_jobs(args.batch, args.output)
+        summary = asyncio.run(_run_and_close(run_batch(jobs, args.batch_concurrency, args.workers)))
+        if summary["failed"]:
+            sys.exit(1)
+        return
+    asyncio.run(_run_and_close(process_file(args.input, args.output, zero_copy=args.zero_copy,
+                                            stream=args.stream, incremental=args.incremental,
+                                            sink=args.sink, chunked=args.chunked)))
 
 if __name__ == "__main__":
     main()
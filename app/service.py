@@ -0,0 +1,243 @@
+import asyncio
+import io
+import json
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from app.config import settings
+from app.main import extract_text
+from app.utils.file_io import safe_relative_path
+from app.utils.logger import get_logger
+from app.utils.metrics import METRIC_PREFIX, metrics
+
+logger = get_logger(__name__)
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+    502: "Bad Gateway", 503: "Service Unavailable",
+}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class ExtractionService:
+    """
+    Minimal asyncio HTTP/1.1 server exposing the extraction pipeline.
+
+    Endpoints:
+        POST /extract[?format=json|tar]  body is the raw dump; returns the sliced files
+        GET  /healthz                    liveness plus queue statistics
+        GET  /metrics                    stage timings and counters in Prometheus text format
+
+    The process keeps the pooled LLM gateway, the manifest cache and the compiled marker
+    grammars warm between requests. At most `max_concurrency` extractions run at once;
+    up to `max_queue` further requests wait, and anything beyond that is rejected with
+    503 and Retry-After so that callers back off instead of piling up. A request takes
+    its queue position before its body is read, so slow uploads count against the limit.
+
+    Slicing is CPU-bound and runs on a pool of `max_concurrency` threads rather than on
+    the event loop, which would stall every other connection while a large input is
+    sliced. Large inputs can still fan out to processes through the ParallelSlicer, and
+    stage metrics stay in this process. Call close() to shut the pool down.
+    """
+
+    def __init__(self, max_concurrency: int = settings.SERVICE_MAX_CONCURRENCY,
+                 max_queue: int = settings.SERVICE_MAX_QUEUE,
+                 max_body_bytes: int = settings.SERVICE_MAX_BODY_BYTES):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_body_bytes = max_body_bytes
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.active = 0
+        self.queued = 0
+        self.stats = {"requests": 0, "rejected": 0, "errors": 0}
+        self._slice_executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="slice")
+
+    def close(self):
+        self._slice_executor.shutdown(wait=True)
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        logger.info(f"Extraction service listening on {addresses}")
+        return server
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, target, headers = await self._read_head(reader)
+            path, query = _split_target(target)
+            self.stats["requests"] += 1
+
+            if path == "/healthz":
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                await self._send_json(writer, 200, {"status": "ok", "active": self.active, "queued": self.queued})
+            elif path == "/metrics":
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                await self._send_metrics(writer)
+            elif path == "/extract":
+                if method != "POST":
+                    raise HTTPError(405, "Use POST")
+                await self._handle_extract(reader, writer, headers, query)
+            else:
+                raise HTTPError(404, f"Unknown path: {path}")
+        except HTTPError as e:
+            await self._send_error(writer, e.status, e.message)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as ex:
+            self.stats["errors"] += 1
+            logger.error(f"Unhandled service error: {ex}", exc_info=True)
+            await self._send_error(writer, 500, "Internal error")
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _handle_extract(self, reader, writer, headers: Dict[str, str], query: Dict[str, str]):
+        output_format = query.get("format", "json")
+        if output_format not in ("json", "tar"):
+            raise HTTPError(400, "format must be 'json' or 'tar'")
+        if "content-length" not in headers:
+            raise HTTPError(411, "Content-Length required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "Content-Length must be a non-negative integer")
+        if length > self.max_body_bytes:
+            raise HTTPError(413, f"Body exceeds {self.max_body_bytes} bytes")
+
+        # Backpressure: reject instead of queueing without bound. The queue position is taken
+        # before the body is read, so that uploads still in progress count against the limit
+        if self.active + self.queued >= self.max_concurrency + self.max_queue:
+            self.stats["rejected"] += 1
+            raise HTTPError(503, "Service busy, retry later")
+        self.queued += 1
+        waiting = True
+        try:
+            body = await reader.readexactly(length)
+            try:
+                raw_text = body.decode("utf-8")
+            except UnicodeDecodeError:
+                raise HTTPError(400, "Body must be UTF-8 text")
+            if not raw_text.strip():
+                raise HTTPError(400, "Input text is empty.")
+
+            started = time.perf_counter()
+            async with self._slots:
+                self.queued -= 1
+                waiting = False
+                self.active += 1
+                try:
+                    files_content = await extract_text(raw_text, slice_executor=self._slice_executor)
+                except ValueError as e:
+                    # The input was checked above; what is left is an unusable LLM answer
+                    logger.error(f"Extraction failed on the LLM manifest: {e}")
+                    raise HTTPError(502, f"Upstream LLM returned an unusable manifest: {e}")
+                finally:
+                    self.active -= 1
+        finally:
+            if waiting:
+                self.queued -= 1
+        logger.info(f"Extracted {len(files_content)} files in {time.perf_counter() - started:.3f}s")
+
+        if output_format == "tar":
+            await self._send_tar(writer, files_content)
+        else:
+            await self._send_json(writer, 200, {"count": len(files_content), "files": files_content})
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str]]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return parts[0].upper(), parts[1], headers
+
+    async def _send_json(self, writer, status: int, payload: dict, extra_headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body))}
+        headers.update(extra_headers or {})
+        writer.write(_head(status, headers) + body)
+        await writer.drain()
+
+    async def _send_metrics(self, writer):
+        service_lines = [f"# TYPE {METRIC_PREFIX}service_{name} gauge\n{METRIC_PREFIX}service_{name} {value}"
+                         for name, value in (("active", self.active), ("queued", self.queued))]
+        service_lines += [f"# TYPE {METRIC_PREFIX}service_{name}_total counter\n{METRIC_PREFIX}service_{name}_total {value}"
+                          for name, value in sorted(self.stats.items())]
+        body = (metrics.to_prometheus() + "\n".join(service_lines) + "\n").encode("utf-8")
+        headers = {"Content-Type": "text/plain; version=0.0.4", "Content-Length": str(len(body))}
+        writer.write(_head(200, headers) + body)
+        await writer.drain()
+
+    async def _send_error(self, writer, status: int, message: str):
+        extra = {"Retry-After": "1"} if status == 503 else None
+        try:
+            await self._send_json(writer, status, {"error": message}, extra)
+        except ConnectionError:
+            pass
+
+    async def _send_tar(self, writer, files_content: Dict[str, str]):
+        # Stream the archive with chunked encoding, one member at a time
+        writer.write(_head(200, {"Content-Type": "application/x-tar", "Transfer-Encoding": "chunked"}))
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w|") as archive:
+            for filename, content in files_content.items():
+                name = safe_relative_path(filename)
+                if name is None:
+                    logger.warning(f"Skipping unsafe archive member name: {filename}")
+                    continue
+                data = content.encode("utf-8")
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                archive.addfile(info, io.BytesIO(data))
+                await _write_chunk(writer, buffer)
+        await _write_chunk(writer, buffer)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+async def _write_chunk(writer, buffer: io.BytesIO):
+    data = buffer.getvalue()
+    if data:
+        writer.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        buffer.seek(0)
+        buffer.truncate()
+        await writer.drain()
+
+def _head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    lines.append("Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+def _split_target(target: str) -> Tuple[str, Dict[str, str]]:
+    parts = urlsplit(target)
+    return parts.path, {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+async def run_service(host: str, port: int, service: Optional[ExtractionService] = None):
+    service = service or ExtractionService()
+    server = await service.start(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
@@ -1,46 +1,289 @@
 import os
+import sys
+import mmap
 import asyncio
+import filecmp
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sized, Tuple
+from app.config import settings
 from app.utils.logger import get_logger
+from app.utils.metrics import metrics
 
 logger = get_logger(__name__)
 
+# Input path that stands for standard input, for use in shell pipes
+STDIN_PATH = "-"
+
+# Attempts at a fresh random temporary file name before giving up, as tempfile does
+_TEMP_NAME_ATTEMPTS = 100
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
 async def read_input_file(file_path: str) -> str:
     """
     Reads input text file asynchronously and returns its content.
-    Validates file path to avoid path traversal attacks.
+    Validates file path to avoid path traversal attacks. STDIN_PATH reads standard input.
     """
+    loop = asyncio.get_event_loop()
+    if file_path == STDIN_PATH:
+        with metrics.timer("read") as fields:
+            content = await loop.run_in_executor(None, sys.stdin.read)
+            fields["bytes"] = len(content.encode("utf-8"))
+        metrics.inc("input_bytes_total", fields["bytes"])
+        return content
+
     if not os.path.isfile(file_path):
         raise FileNotFoundError(f"Input file not found: {file_path}")
 
-    loop = asyncio.get_event_loop()
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
+        with metrics.timer("read") as fields, open(file_path, "r", encoding="utf-8") as f:
             content = await loop.run_in_executor(None, f.read)
+            fields["bytes"] = os.path.getsize(file_path)
+        metrics.inc("input_bytes_total", fields["bytes"])
         return content
     except Exception as e:
         logger.error(f"Error reading input file {file_path}: {e}")
         raise
 
-async def write_output_files(files_content: dict, output_dir: str):
+def open_input_mmap(file_path: str) -> mmap.mmap:
     """
-    Writes multiple files asynchronously to the output directory.
-    Creates the directory if it doesn't exist.
+    Memory-maps the input file read-only so that it can be scanned and sliced without
+    decoding it or copying it onto the heap. The caller is responsible for closing it.
     """
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir, exist_ok=True)
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Input file not found: {file_path}")
+    if os.path.getsize(file_path) == 0:
+        raise ValueError(f"Input file is empty: {file_path}")
 
-    loop = asyncio.get_event_loop()
+    metrics.inc("input_bytes_total", os.path.getsize(file_path))
+    with open(file_path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def open_input_stream(file_path: str) -> BinaryIO:
+    """
+    Opens the input for chunked binary reading; STDIN_PATH opens standard input without
+    taking ownership of it, so closing the returned file leaves stdin open.
+    """
+    if file_path == STDIN_PATH:
+        return os.fdopen(sys.stdin.fileno(), "rb", closefd=False)
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Input file not found: {file_path}")
+    return open(file_path, "rb")
+
+def iter_chunks(f: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """Yields fixed-size chunks of a binary file (the last one may be shorter) until EOF."""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        metrics.inc("input_bytes_total", len(chunk))
+        yield chunk
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def get_write_executor() -> ThreadPoolExecutor:
+    """
+    Dedicated, bounded thread pool for output writes, so that extracting thousands of
+    files neither floods the default executor nor opens unbounded files at once.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, settings.OUTPUT_WRITE_WORKERS),
+                                           thread_name_prefix="output-writer")
+        return _executor
+
+def safe_relative_path(filename: str) -> Optional[str]:
+    """
+    Normalizes a manifest filename to a relative POSIX path (`app/build.gradle.kts`), or
+    returns None for names that would escape the output: absolute paths, drive letters
+    and `..` components.
+    """
+    name = os.path.normpath(filename.replace("\\", "/")).replace(os.sep, "/")
+    if name.startswith(("/", "../")) or name in ("..", ".", "") or ":" in name:
+        return None
+    return name
+
+def _output_paths(filenames: Iterable[str], output_dir: str) -> Dict[str, str]:
+    """
+    Maps each filename to its path inside output_dir, dropping unsafe names, and creates
+    every needed directory in one pass before any file is written.
+    """
+    paths = {}
+    for filename in filenames:
+        name = safe_relative_path(filename)
+        if name is None:
+            logger.warning(f"Skipping unsafe output path: {filename}")
+            metrics.inc("write_errors_total")
+            continue
+        paths[filename] = os.path.join(output_dir, *name.split("/"))
+
+    directories = {output_dir} | {os.path.dirname(path) for path in paths.values()}
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+    return paths
+
+async def write_output_files(files_content: dict, output_dir: str,
+                             previous_hashes: Optional[Dict[str, str]] = None) -> int:
+    """
+    Writes multiple files to the output directory, keeping their relative directory
+    structure. Each file is written atomically (temporary file plus rename) on the
+    dedicated writer pool, and files whose existing content is identical are left alone.
+
+    With `previous_hashes` (filename -> content hash from an earlier run), files whose
+    content hash is unchanged and whose output file still exists are skipped without
+    being read.
+
+    Returns:
+        Number of files written.
+    """
+    paths = _output_paths(files_content, output_dir)
+    loop = asyncio.get_running_loop()
+    executor = get_write_executor()
     tasks = []
 
-    for filename, content in files_content.items():
-        safe_path = os.path.join(output_dir, os.path.basename(filename))  # Sanitize filename
-        tasks.append(loop.run_in_executor(None, _write_file, safe_path, content))
+    with metrics.timer("write") as fields:
+        for filename, path in paths.items():
+            content = files_content[filename]
+            if (previous_hashes is not None and previous_hashes.get(filename) == content_hash(content)
+                    and os.path.isfile(path)):
+                metrics.inc("files_skipped_total")
+                continue
+            tasks.append(loop.run_in_executor(executor, _write_file, path, content))
+
+        written = _collect(await asyncio.gather(*tasks, return_exceptions=True))
+        fields.update(files=len(written), bytes=sum(written))
+    metrics.inc("files_written_total", len(written))
+    metrics.inc("output_bytes_total", sum(written))
+    return len(written)
+
+async def write_output_spans(buffer, spans: Iterable[Tuple[str, int, int]], output_dir: str) -> int:
+    """
+    Writes (filename, start, end) byte spans of the input buffer straight to the output
+    directory, without decoding or re-encoding the content. Same layout, atomicity and
+    unchanged-file skipping as write_output_files.
+
+    Returns:
+        Number of files written.
+    """
+    # A SpanTable (or any sized collection) can be iterated twice without a copy
+    if not isinstance(spans, Sized):
+        spans = list(spans)
+    paths = _output_paths((filename for filename, _, _ in spans), output_dir)
+    loop = asyncio.get_running_loop()
+    executor = get_write_executor()
+
+    with metrics.timer("write") as fields:
+        tasks = [loop.run_in_executor(executor, _write_span, paths[filename], buffer, start, end)
+                 for filename, start, end in spans if filename in paths]
+        written = _collect(await asyncio.gather(*tasks, return_exceptions=True))
+        fields.update(files=len(written), bytes=sum(written))
+    metrics.inc("files_written_total", len(written))
+    metrics.inc("output_bytes_total", sum(written))
+    return len(written)
 
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+def _collect(results: list) -> List[int]:
+    # Writers return the number of bytes written, or None when the file was unchanged
+    written = []
     for res in results:
         if isinstance(res, Exception):
             logger.error(f"Error writing file: {res}")
+            metrics.inc("write_errors_total")
+        elif res is None:
+            metrics.inc("files_skipped_total")
+        else:
+            written.append(res)
+    return written
+
+def _write_span(path, buffer, start, end):
+    # The memoryview must be released before the underlying mmap can be closed
+    with memoryview(buffer) as view:
+        return write_atomic(path, view[start:end])
 
 def _write_file(path, content):
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
+    return write_atomic(path, content.encode("utf-8"))
+
+def write_atomic(path, data) -> Optional[int]:
+    """
+    Writes bytes to path through a temporary file in the same directory and a rename, so
+    readers never see a partial file. Returns the size written, or None if the file
+    already had exactly this content.
+    """
+    if _unchanged(path, data):
+        return None
+    temp_path, size = _write_temp(path, (data,))
+    _commit(temp_path, path)
+    return size
+
+def write_atomic_pieces(path, pieces: Iterable[bytes]) -> Optional[int]:
+    """
+    Streaming variant of write_atomic: the pieces are written as they are produced, so
+    the content is never held in memory as a whole. Unchanged files are detected after
+    the fact by comparing the temporary file with the existing one. An exception raised
+    by `pieces` discards the temporary file and leaves any existing file untouched.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path, size = _write_temp(path, pieces)
+    try:
+        same = os.stat(path).st_size == size and filecmp.cmp(temp_path, path, shallow=False)
+    except OSError:
+        same = False
+    if same:
+        os.remove(temp_path)
+        return None
+    _commit(temp_path, path)
+    return size
+
+def _create_temp(directory: str) -> Tuple[int, str]:
+    """
+    Creates a new temporary file in `directory` with mode 0666, which the kernel narrows
+    by the process umask, so it ends up with the permissions a plain open() would give
+    it. Unlike tempfile.mkstemp (always 0600), no chmod and no umask lookup are needed.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0) | getattr(os, "O_CLOEXEC", 0)
+    for _ in range(_TEMP_NAME_ATTEMPTS):
+        temp_path = os.path.join(directory, f".{os.urandom(8).hex()}.tmp")
+        try:
+            return os.open(temp_path, flags, 0o666), temp_path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No unused temporary file name found in {directory}")
+
+def _write_temp(path, pieces: Iterable) -> Tuple[str, int]:
+    fd, temp_path = _create_temp(os.path.dirname(path) or ".")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for piece in pieces:
+                size += f.write(piece)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    return temp_path, size
+
+def _commit(temp_path, path):
+    try:
+        os.replace(temp_path, path)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _unchanged(path, data) -> bool:
+    # A size check first, so that only same-sized existing files are read and compared
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
@@ -1,18 +1,204 @@
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line. Structured values passed as
+    `extra={"fields": {...}}` are added as top-level keys next to the message.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            for key, value in fields.items():
+                entry.setdefault(key, value)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Thins out high-volume per-file messages: records logged with `extra={"sampled": True}`
+    below WARNING are passed for the first `burst` occurrences of each call site and then
+    only every `every`-th time. A string instead of True samples by that key rather than
+    by call site. Warnings, errors and unflagged records always pass.
+    """
+
+    def __init__(self, burst: int, every: int):
+        super().__init__()
+        self.burst = burst
+        self.every = max(1, every)
+        self._counts: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sampled = getattr(record, "sampled", False)
+        if record.levelno >= logging.WARNING or not sampled:
+            return True
+        site = (record.pathname, record.lineno, sampled if isinstance(sampled, str) else None)
+        with self._lock:
+            count = self._counts.get(site, 0) + 1
+            self._counts[site] = count
+        return count <= self.burst or (count - self.burst) % self.every == 0
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hands records to the background writer without blocking the caller. The message is
+    rendered and exception info is formatted in the caller, since neither arguments nor
+    tracebacks are safe to share across threads. When the queue is full the record is
+    dropped and counted instead of stalling the event loop. Once the writer has stopped
+    (at interpreter exit) records are written synchronously.
+    """
+
+    def __init__(self, log_queue: queue.Queue, writer: "BatchingLogWriter"):
+        super().__init__(log_queue)
+        self.writer = writer
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if not self.writer.is_alive():
+            self.writer.write([self.writer.formatter.format(record)])
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class BatchingLogWriter(threading.Thread):
+    """
+    Background thread that formats queued records and writes them to the stream in
+    batches: a batch is flushed once it holds `batch_size` lines or its oldest line is
+    `flush_interval` seconds old, whichever comes first.
+    """
+
+    def __init__(self, log_queue: queue.Queue, formatter: logging.Formatter, batch_size: int,
+                 flush_interval: float, stream=None):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = log_queue
+        self.formatter = formatter
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.stream = stream
+
+    def run(self):
+        batch: List[str] = []
+        deadline = 0.0
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, logging.LogRecord):
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                try:
+                    batch.append(self.formatter.format(item))
+                except Exception:
+                    pass
+                if len(batch) < self.batch_size:
+                    continue
+
+            self.write(batch)
+            batch = []
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                return
+
+    def write(self, batch: List[str]):
+        if not batch:
+            return
+        stream = self.stream or sys.stdout
+        try:
+            stream.write("\n".join(batch) + "\n")
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+
+_STOP = object()
+_lock = threading.Lock()
+_handler: Optional[logging.Handler] = None
+_writer: Optional[BatchingLogWriter] = None
+
+def _level_for(name: str) -> int:
+    # LOG_LEVELS entries ("app.core=DEBUG,app.service=WARNING") override LOG_LEVEL by logger prefix
+    level, matched = settings.LOG_LEVEL, ""
+    for item in settings.LOG_LEVELS.split(","):
+        prefix, _, value = item.partition("=")
+        prefix = prefix.strip()
+        if value and (name == prefix or name.startswith(prefix + ".")) and len(prefix) > len(matched):
+            level, matched = value.strip(), prefix
+    level = logging.getLevelName(level.upper())
+    return level if isinstance(level, int) else logging.INFO
+
+def _shared_handler() -> logging.Handler:
+    global _handler, _writer
+    with _lock:
+        if _handler is None:
+            if settings.LOG_ASYNC:
+                log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+                _writer = BatchingLogWriter(log_queue, JsonFormatter(), settings.LOG_BATCH_SIZE,
+                                            settings.LOG_FLUSH_INTERVAL)
+                _writer.start()
+                _handler = AsyncQueueHandler(log_queue, _writer)
+                atexit.register(shutdown_logging)
+            else:
+                _handler = logging.StreamHandler(sys.stdout)
+                _handler.setFormatter(JsonFormatter())
+            _handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_BURST, settings.LOG_SAMPLE_EVERY))
+        return _handler
+
+def flush_logs(timeout: float = 5.0):
+    """Blocks until every record queued so far has been written."""
+    if _writer is not None and _writer.is_alive():
+        done = threading.Event()
+        _writer.queue.put(done)
+        done.wait(timeout)
+
+def shutdown_logging(timeout: float = 5.0):
+    """Flushes and stops the background writer; later records are written synchronously."""
+    if _writer is not None and _writer.is_alive():
+        _writer.queue.put(_STOP)
+        _writer.join(timeout)
 
 def get_logger(name: str) -> logging.Logger:
     """
-    Returns a structured logger with INFO level and stdout handler.
-    Avoids logging sensitive data.
+    Returns a structured logger with the level configured in Settings (LOG_LEVEL, or a
+    LOG_LEVELS override for the logger's prefix).
+
+    All loggers share one handler. With LOG_ASYNC (the default) records are queued and a
+    background thread writes them to stdout in batches, so logging never blocks the event
+    loop on I/O. Avoids logging sensitive data.
     """
     logger = logging.getLogger(name)
     if not logger.hasHandlers():
-        logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "module": "%(name)s", "message": "%(message)s"}'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.setLevel(_level_for(name))
+        logger.addHandler(_shared_handler())
     return logger
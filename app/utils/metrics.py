@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Prefix of every exported Prometheus metric name
+METRIC_PREFIX = "chaostocode_"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class MetricsRegistry:
+    """
+    Process-wide counters and duration summaries for the pipeline stages.
+
+    Counters accumulate values such as bytes, files, tokens, retries and cache hits;
+    summaries record count, sum and max of observations such as stage durations. Both
+    are keyed by name plus labels and are safe to update from executor threads. The
+    registry can be exported as a JSON-friendly snapshot or in Prometheus text format.
+
+    Stage listeners (such as the profiler) are told when a timed stage starts and ends:
+    `stage_started(stage)` returns a token that is passed back to
+    `stage_finished(token, seconds)`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[str, Dict[LabelKey, list]] = {}
+        self._stage_listeners: List = []
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            summary = self._summaries.setdefault(name, {}).setdefault(key, [0, 0.0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = max(summary[2], value)
+
+    @contextmanager
+    def timer(self, stage: str, **fields) -> Iterator[dict]:
+        """
+        Times a pipeline stage into `stage_seconds{stage=...}` and logs the duration as
+        structured fields. The yielded dict can be filled with extra fields (bytes, files)
+        to include in the log record.
+        """
+        listeners = [(listener, listener.stage_started(stage)) for listener in self._stage_listeners]
+        started = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            elapsed = time.perf_counter() - started
+            for listener, token in listeners:
+                listener.stage_finished(token, elapsed)
+            self.observe("stage_seconds", elapsed, stage=stage)
+            logger.info(f"Stage {stage} finished in {elapsed:.4f}s",
+                        extra={"fields": dict(fields, stage=stage, seconds=round(elapsed, 6)), "sampled": f"stage:{stage}"})
+
+    def add_stage_listener(self, listener):
+        self._stage_listeners = self._stage_listeners + [listener]
+
+    def remove_stage_listener(self, listener):
+        self._stage_listeners = [other for other in self._stage_listeners if other is not listener]
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {name: {_label_text(key) or "total": value for key, value in series.items()}
+                        for name, series in self._counters.items()}
+            summaries = {name: {_label_text(key) or "total": {"count": count, "sum": round(total, 6), "max": round(peak, 6)}
+                                for key, (count, total, peak) in series.items()}
+                         for name, series in self._summaries.items()}
+        return {"counters": counters, "summaries": summaries}
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{_prometheus_labels(key)} {value:g}" for key, value in sorted(series.items()))
+            for name, series in sorted(self._summaries.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} summary")
+                for key, (count, total, peak) in sorted(series.items()):
+                    labels = _prometheus_labels(key)
+                    lines.append(f"{metric}_count{labels} {count}")
+                    lines.append(f"{metric}_sum{labels} {total:.6f}")
+                    lines.append(f"{metric}_max{labels} {peak:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_summary(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, sort_keys=True)
+        logger.info(f"Wrote metrics summary to {path}")
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _label_text(key: LabelKey) -> str:
+    return ",".join(f"{name}={value}" for name, value in key)
+
+def _prometheus_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+metrics = MetricsRegistry()
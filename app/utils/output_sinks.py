@@ -0,0 +1,272 @@
+import os
+import io
+import json
+import time
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Set, Tuple
+from app.utils.file_io import safe_relative_path, write_atomic, write_atomic_pieces, write_output_files, write_output_spans
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+SINKS = ("dir", "tar", "zip", "cas")
+# Name of the path -> object index written at the root of a content-addressed store
+CAS_INDEX_FILE = "index.json"
+
+class OutputSink(ABC):
+    """
+    Destination for extracted files. Sinks accept files as decoded text or as byte spans
+    of the input buffer, possibly over several calls (streaming mode), and must be closed
+    once all files have been written. Usable as an async context manager.
+
+    Chunked input mode instead hands over one segment at a time to `write_segment`: an
+    iterable of byte pieces with a `filename`, written synchronously from the thread that
+    reads the input. It returns the size written, or None if nothing had to be written,
+    and raises ValueError when the segment has to be dropped.
+    """
+
+    @abstractmethod
+    async def write_files(self, files_content: Dict[str, str]) -> int:
+        """Writes decoded files; returns the number of files written."""
+
+    @abstractmethod
+    async def write_spans(self, buffer, spans: Iterable[Tuple[str, int, int]]) -> int:
+        """Writes byte spans of `buffer`; returns the number of files written."""
+
+    @abstractmethod
+    def write_segment(self, segment) -> Optional[int]:
+        """Writes one chunked-mode segment; returns its size, or None if it was not needed."""
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+class DirectorySink(OutputSink):
+    """One file per entry under the output directory, preserving relative directories."""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+
+    async def write_files(self, files_content: Dict[str, str]) -> int:
+        return await write_output_files(files_content, self.output_dir)
+
+    async def write_spans(self, buffer, spans: Iterable[Tuple[str, int, int]]) -> int:
+        return await write_output_spans(buffer, spans, self.output_dir)
+
+    def write_segment(self, segment) -> Optional[int]:
+        # Streamed straight into the temporary file: memory stays bounded by a piece
+        name = _checked_name(segment.filename)
+        return write_atomic_pieces(os.path.join(self.output_dir, *name.split("/")), segment)
+
+class _SerialSink(OutputSink):
+    """
+    Base for sinks that write to a single archive or index: all work runs on one private
+    thread, so members are appended in order and the event loop is never blocked.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-sink")
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def write_files(self, files_content: Dict[str, str]) -> int:
+        items = [(filename, content.encode("utf-8")) for filename, content in files_content.items()]
+        return await self._write(items)
+
+    async def write_spans(self, buffer, spans: Iterable[Tuple[str, int, int]]) -> int:
+        # The memoryview must be released before the underlying mmap can be closed
+        with memoryview(buffer) as view:
+            return await self._write([(filename, view[start:end]) for filename, start, end in spans])
+
+    async def _write(self, items) -> int:
+        with metrics.timer("write") as fields:
+            written = await self._run(self._add_all, items)
+            fields.update(files=len(written), bytes=sum(written))
+        metrics.inc("files_written_total", len(written))
+        metrics.inc("output_bytes_total", sum(written))
+        return len(written)
+
+    def _add_all(self, items) -> list:
+        written = []
+        for filename, data in items:
+            name = safe_relative_path(filename)
+            if name is None:
+                logger.warning(f"Skipping unsafe output path: {filename}")
+                metrics.inc("write_errors_total")
+                continue
+            size = self._add(name, data)
+            if size is None:
+                metrics.inc("files_skipped_total")
+            else:
+                written.append(size)
+        return written
+
+    def write_segment(self, segment) -> Optional[int]:
+        # Archive headers and object names need the size and hash first, so the file is joined
+        name = _checked_name(segment.filename)
+        return self._add(name, b"".join(segment))
+
+    @abstractmethod
+    def _add(self, name: str, data) -> Optional[int]:
+        """Adds one member; returns its size, or None if it was already present."""
+
+    async def close(self):
+        try:
+            await self._run(self._finish)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def _finish(self):
+        pass
+
+# tarfile and zipfile are imported by the archive sinks only, keeping them out of the
+# startup path of directory output
+
+class TarSink(_SerialSink):
+    """Streams every file into a single uncompressed `.tar` archive."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        _make_parent(path)
+        import tarfile
+
+        self._archive = tarfile.open(path, mode="w|")
+
+    def _add(self, name: str, data) -> int:
+        import tarfile
+
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._archive.addfile(info, io.BytesIO(data) if isinstance(data, bytes) else _ViewReader(data))
+        return len(data)
+
+    def _finish(self):
+        self._archive.close()
+        logger.info(f"Wrote tar archive: {self.path}")
+
+class ZipSink(_SerialSink):
+    """Writes every file into a single deflate-compressed `.zip` archive."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        _make_parent(path)
+        import zipfile
+
+        self._archive = zipfile.ZipFile(path, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._names: Set[str] = set()
+
+    def _add(self, name: str, data) -> Optional[int]:
+        if name in self._names:
+            logger.warning(f"Duplicate zip member {name}; keeping the first one.")
+            return None
+        self._names.add(name)
+        import zipfile
+
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with self._archive.open(info, mode="w") as member:
+            member.write(data)
+        return len(data)
+
+    def _finish(self):
+        self._archive.close()
+        logger.info(f"Wrote zip archive: {self.path}")
+
+class ContentAddressedSink(_SerialSink):
+    """
+    Stores each distinct file content once, under `objects/<ab>/<sha256>`, plus an
+    `index.json` mapping every output path to its object hash and size. Identical files,
+    within a run and across runs into the same store, cost no write at all, and the
+    existing objects of a shard are listed with one directory read instead of one stat
+    per file.
+    """
+
+    def __init__(self, root: str):
+        super().__init__()
+        self.root = root
+        self.index: Dict[str, Dict[str, object]] = {}
+        self._known: Dict[str, Set[str]] = {}
+
+    def _add(self, name: str, data) -> Optional[int]:
+        digest = hashlib.sha256(data).hexdigest()
+        self.index[name] = {"sha256": digest, "size": len(data)}
+        shard_dir = os.path.join(self.root, "objects", digest[:2])
+        known = self._shard(digest[:2], shard_dir)
+        if digest in known:
+            return None
+        write_atomic(os.path.join(shard_dir, digest), data)
+        known.add(digest)
+        return len(data)
+
+    def _shard(self, shard: str, shard_dir: str) -> Set[str]:
+        known = self._known.get(shard)
+        if known is None:
+            os.makedirs(shard_dir, exist_ok=True)
+            known = self._known[shard] = set(os.listdir(shard_dir))
+        return known
+
+    def _finish(self):
+        os.makedirs(self.root, exist_ok=True)
+        payload = json.dumps({"files": self.index}, indent=2, sort_keys=True).encode("utf-8")
+        write_atomic(os.path.join(self.root, CAS_INDEX_FILE), payload)
+        objects = len({entry["sha256"] for entry in self.index.values()})
+        logger.info(f"Wrote content-addressed store with {len(self.index)} files in {objects} objects: {self.root}")
+
+class _ViewReader:
+    """Minimal file object over a memoryview, so tarfile copies spans without a bytes copy."""
+
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.position = 0
+
+    def read(self, size: int = -1):
+        end = len(self.view) if size < 0 else min(len(self.view), self.position + size)
+        chunk = self.view[self.position:end]
+        self.position = end
+        return chunk
+
+def _checked_name(filename: str) -> str:
+    name = safe_relative_path(filename)
+    if name is None:
+        raise ValueError(f"Unsafe output path: {filename}")
+    return name
+
+def _make_parent(path: str):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+def archive_path(output: str, kind: str) -> str:
+    """Archive file for an output location given as a directory (`out/` -> `out.tar`)."""
+    suffix = "." + kind
+    output = output.rstrip("/\\") or kind
+    return output if output.endswith(suffix) else output + suffix
+
+def open_sink(kind: str, output: str) -> OutputSink:
+    """
+    Creates the sink for `kind` (one of SINKS): `dir` and `cas` use `output` as the
+    directory, `tar` and `zip` write a single archive file at `output`.
+    """
+    if kind == "dir":
+        return DirectorySink(output)
+    if kind == "tar":
+        return TarSink(archive_path(output, kind))
+    if kind == "zip":
+        return ZipSink(archive_path(output, kind))
+    if kind == "cas":
+        return ContentAddressedSink(output)
+    raise ValueError(f"Unknown output sink: {kind} (expected one of {', '.join(SINKS)})")
@@ -0,0 +1,225 @@
+import io
+import json
+import os
+import threading
+import time
+from typing import Awaitable, Coroutine, Dict, List, Optional
+from app.config import settings
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Files written into the profile directory
+CPU_PROFILE_FILE = "cpu.prof"
+PROFILE_JSON_FILE = "profile.json"
+SUMMARY_FILE = "summary.txt"
+
+_active: Optional["PipelineProfiler"] = None
+
+class TimedCoroutine:
+    """
+    Awaitable wrapper that splits the wall time of a coroutine into the time spent
+    running its own code (every step the event loop drives it) and the time spent
+    suspended, waiting for I/O, locks or a free slot of a semaphore.
+    """
+
+    def __init__(self, coro):
+        self._coro = coro
+        self.run_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    @property
+    def wait_seconds(self) -> float:
+        return max(0.0, self.wall_seconds - self.run_seconds)
+
+    def __await__(self):
+        started = time.perf_counter()
+        value, error = None, None
+        try:
+            while True:
+                step = time.perf_counter()
+                try:
+                    if error is not None:
+                        yielded = self._coro.throw(error)
+                    else:
+                        yielded = self._coro.send(value)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    self.run_seconds += time.perf_counter() - step
+                try:
+                    value, error = (yield yielded), None
+                except BaseException as e:
+                    value, error = None, e
+        finally:
+            self.wall_seconds = time.perf_counter() - started
+
+class PipelineProfiler:
+    """
+    Profiling mode (`--profile`): records a cProfile of the event loop thread, the wall
+    time of every metrics stage and, with `trace_memory`, the peak traced allocation of
+    each stage plus a tracemalloc snapshot taken when the stage ends. Awaits wrapped
+    with `profile_await` are split into run and wait time.
+
+    On exit, the directory receives `cpu.prof` (pstats format), `profile.json` and a
+    short `summary.txt` of the hot spots. Use as a context manager around the run.
+    """
+
+    def __init__(self, profile_dir: str, trace_memory: bool = False, top: int = settings.PROFILE_TOP_N):
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.top = top
+        self.stages: Dict[str, Dict] = {}
+        self.awaits: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        # Open stage token -> [stage, traced memory at its start, highest traced memory
+        # since]; tracemalloc has one process-wide peak, which is reset at every stage start
+        self._open: Dict[int, List] = {}
+        self._next_token = 0
+        self._snapshots = {}
+        self._profile = None
+
+    def __enter__(self) -> "PipelineProfiler":
+        global _active
+        import cProfile
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if self.trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+        metrics.add_stage_listener(self)
+        self._profile = cProfile.Profile()
+        _active = self
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active
+        self._profile.disable()
+        _active = None
+        metrics.remove_stage_listener(self)
+        try:
+            self.write()
+        finally:
+            if self.trace_memory:
+                import tracemalloc
+
+                tracemalloc.stop()
+
+    def stage_started(self, stage: str) -> int:
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            current = self._fold_peak()
+            self._open[token] = [stage, current, current]
+            return token
+
+    def stage_finished(self, token: int, elapsed: float):
+        with self._lock:
+            self._fold_peak()
+            stage, start_memory, peak_memory = self._open.pop(token)
+            record = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            record["count"] += 1
+            record["seconds"] += elapsed
+            record["max_seconds"] = max(record["max_seconds"], elapsed)
+            if not self.trace_memory:
+                return
+            peak = peak_memory - start_memory
+            if peak < record.get("peak_bytes", -1):
+                return
+            record["peak_bytes"] = peak
+        import tracemalloc
+
+        # Outside the lock: a snapshot of a large heap takes a while
+        self._snapshots[stage] = tracemalloc.take_snapshot()
+
+    def record_await(self, label: str, timed: TimedCoroutine):
+        with self._lock:
+            record = self.awaits.setdefault(label, {"count": 0, "wall_seconds": 0.0, "run_seconds": 0.0,
+                                                    "wait_seconds": 0.0})
+            record["count"] += 1
+            record["wall_seconds"] += timed.wall_seconds
+            record["run_seconds"] += timed.run_seconds
+            record["wait_seconds"] += timed.wait_seconds
+
+    def _fold_peak(self) -> int:
+        # Credits the peak since the last reset to every open stage, then starts a new period
+        if not self.trace_memory:
+            return 0
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        for record in self._open.values():
+            record[2] = max(record[2], peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def write(self):
+        import pstats
+
+        self._profile.dump_stats(os.path.join(self.profile_dir, CPU_PROFILE_FILE))
+        stats = pstats.Stats(self._profile)
+        hot_spots = [
+            {"function": _function_name(func), "calls": calls, "self_seconds": round(self_time, 6),
+             "cumulative_seconds": round(cumulative, 6)}
+            for func, (_, calls, self_time, cumulative, _) in sorted(stats.stats.items(),
+                                                                     key=lambda item: item[1][2], reverse=True)[:self.top]
+        ]
+        allocations = {stage: [{"location": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                               for stat in snapshot.statistics("lineno")[:self.top]]
+                       for stage, snapshot in self._snapshots.items()}
+        for stage, snapshot in self._snapshots.items():
+            snapshot.dump(os.path.join(self.profile_dir, f"memory-{stage}.snapshot"))
+
+        report = {"stages": self.stages, "awaits": self.awaits, "hot_spots": hot_spots, "allocations": allocations}
+        with open(os.path.join(self.profile_dir, PROFILE_JSON_FILE), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        with open(os.path.join(self.profile_dir, SUMMARY_FILE), "w", encoding="utf-8") as f:
+            f.write(self.summary(stats, report))
+        logger.info(f"Wrote profile to {self.profile_dir}")
+
+    def summary(self, stats, report: Dict) -> str:
+        out = io.StringIO()
+        out.write("Stages (wall time)\n")
+        for stage, record in sorted(report["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True):
+            memory = f"  peak {record['peak_bytes'] / 1024:.1f} KiB" if "peak_bytes" in record else ""
+            out.write(f"  {stage:<12} {record['seconds']:>10.4f}s  x{record['count']}{memory}\n")
+
+        if report["awaits"]:
+            out.write("\nAwaits (run = executing on the event loop, wait = suspended)\n")
+            for label, record in report["awaits"].items():
+                out.write(f"  {label:<12} {record['wall_seconds']:>10.4f}s wall  {record['run_seconds']:.4f}s run  "
+                          f"{record['wait_seconds']:.4f}s wait  x{record['count']}\n")
+
+        for stage, rows in report["allocations"].items():
+            out.write(f"\nLargest live allocations at the end of {stage}\n")
+            for row in rows[:5]:
+                out.write(f"  {row['bytes'] / 1024:>10.1f} KiB  {row['location']}\n")
+
+        out.write(f"\nTop {self.top} functions by own time (event loop thread)\n")
+        stats.stream = out
+        stats.sort_stats("tottime").print_stats(self.top)
+        return out.getvalue()
+
+def profile_await(label: str, coro: Coroutine) -> Awaitable:
+    """
+    Returns the coroutine unchanged, or, while a profiler is active, wrapped so that its
+    run and wait time are recorded under `label`.
+    """
+    profiler = _active
+    if profiler is None:
+        return coro
+    return _timed(profiler, label, coro)
+
+async def _timed(profiler: PipelineProfiler, label: str, coro: Coroutine):
+    timed = TimedCoroutine(coro)
+    try:
+        return await timed
+    finally:
+        profiler.record_await(label, timed)
+
+def _function_name(func) -> str:
+    filename, line, name = func
+    return f"{name} ({os.path.basename(filename)}:{line})" if line else name
@@ -1,6 +1,7 @@
 import os
 import re
 import json
+from operator import le
 from typing import Any
 from app.utils.logger import get_logger
 
@@ -27,19 +28,80 @@ def sanitize_text_input(user_input: str) -> str:
     sanitized = user_input.replace("\x00", "")  # Remove null bytes
     return sanitized
 
+MANIFEST_REQUIRED_KEYS = ("filename", "start_marker", "end_marker")
+
+def validate_manifest_entry(entry: Any) -> bool:
+    """
+    Validates a single manifest entry: dict with non-empty string values for required keys.
+    """
+    if not isinstance(entry, dict):
+        return False
+    # Basic validations on values
+    return all(isinstance(entry.get(key), str) and entry[key].strip() for key in MANIFEST_REQUIRED_KEYS)
+
 def validate_json_manifest(manifest: Any) -> bool:
     """
     Validates JSON manifest structure: list of dicts with required keys.
     """
     if not isinstance(manifest, list):
         return False
-    required_keys = {"filename", "start_marker", "end_marker"}
-    for entry in manifest:
-        if not isinstance(entry, dict):
-            return False
-        if not required_keys.issubset(entry.keys()):
-            return False
-        # Basic validations on values
-        if not all(isinstance(entry[key], str) and entry[key].strip() for key in required_keys):
+    return all(validate_manifest_entry(entry) for entry in manifest)
+
+def validate_line_manifest(manifest: Any) -> bool:
+    """
+    Validates a line-range manifest (returned for compacted prompts): list of dicts with
+    a non-empty 'filename' and positive integer 'start_line'/'end_line'.
+    """
+    if not isinstance(manifest, list):
+        return False
+    return all(validate_line_entry(entry) for entry in manifest)
+
+def validate_line_entry(entry: Any) -> bool:
+    """
+    Validates a single line-range entry: dict with a non-empty 'filename' and positive
+    integer 'start_line'/'end_line'.
+    """
+    if not isinstance(entry, dict):
+        return False
+    if not (isinstance(entry.get("filename"), str) and entry["filename"].strip()):
+        return False
+    lines = (entry.get("start_line"), entry.get("end_line"))
+    return all(isinstance(line, int) and not isinstance(line, bool) and line > 0 for line in lines)
+
+def validate_span_table(spans, length: int) -> bool:
+    """
+    Validates a SpanTable against an input of `length` characters or bytes: every span
+    lies within the input with start <= end and has a non-empty filename. Checks whole
+    columns at once instead of entry by entry; output paths are checked by the writers.
+    """
+    if not len(spans):
+        return True
+    if min(spans.starts) < 0 or max(spans.ends) > length or not all(map(le, spans.starts, spans.ends)):
+        return False
+    return all(spans.filenames)
+
+TEMPLATE_LITERAL_MAX_LENGTH = 100
+TEMPLATE_LITERAL_KEYS = ("header_prefix", "header_suffix", "footer_prefix", "footer_suffix")
+
+def validate_template_spec(spec: Any) -> bool:
+    """
+    Validates a delimiter template returned by the LLM. Templates are literal text, never
+    regexes: a header line is `header_prefix` + path + `header_suffix`, and an optional
+    footer line is `footer_prefix` (+ path if `footer_path`) + `footer_suffix`. Each
+    literal is a single short line; the prefixes must contain non-whitespace so that a
+    template cannot match arbitrary lines.
+    """
+    if not isinstance(spec, dict):
+        return False
+    for key in TEMPLATE_LITERAL_KEYS:
+        value = spec.get(key)
+        if value is None and key != "header_prefix":
+            continue
+        if not isinstance(value, str) or len(value) > TEMPLATE_LITERAL_MAX_LENGTH or "\n" in value or "\r" in value:
             return False
-    return True
+    if not spec["header_prefix"].strip():
+        return False
+    footer_prefix = spec.get("footer_prefix")
+    if footer_prefix is not None and not footer_prefix.strip():
+        return False
+    return isinstance(spec.get("footer_path", False), bool)
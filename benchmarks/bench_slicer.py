@@ -0,0 +1,89 @@
+"""
+Benchmark: single-pass marker slicing (ContentSlicer) versus the previous per-entry
+`raw_text.index` search from offset 0.
+
+Usage:
+    python -m benchmarks.bench_slicer --files 100 1000 5000 --output bench_output.txt
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List
+
+from app.engine.content_slicer import ContentSlicer
+
+
+def legacy_slice_content(raw_text: str, manifest: List[Dict]) -> Dict[str, str]:
+    # Previous implementation: one search from the start of the text per manifest entry
+    extracted_files = {}
+    for item in manifest:
+        try:
+            start_idx = raw_text.index(item["start_marker"]) + len(item["start_marker"])
+            end_idx = raw_text.index(item["end_marker"], start_idx)
+            extracted_files[item["filename"]] = raw_text[start_idx:end_idx].strip()
+        except ValueError:
+            pass
+    return extracted_files
+
+
+def make_dump(files: int, lines_per_file: int = 20):
+    parts, manifest = [], []
+    for i in range(files):
+        name = f"pkg/module_{i}/file_{i}.py"
+        parts.append(f"### START {name}\n")
+        parts.append("".join(f"value_{j} = compute({i}, {j})  # line {j}\n" for j in range(lines_per_file)))
+        parts.append(f"### END {name}\n\n")
+        manifest.append({"filename": name, "start_marker": f"### START {name}", "end_marker": f"### END {name}"})
+    return "".join(parts), manifest
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(file_counts: List[int], repeat: int) -> List[Dict]:
+    results = []
+    slicer = ContentSlicer()
+    for files in file_counts:
+        raw_text, manifest = make_dump(files)
+        assert legacy_slice_content(raw_text, manifest) == slicer.slice_content(raw_text, manifest)
+        legacy = best_of(lambda: legacy_slice_content(raw_text, manifest), repeat)
+        single_pass = best_of(lambda: slicer.slice_content(raw_text, manifest), repeat)
+        results.append({
+            "files": files,
+            "bytes": len(raw_text),
+            "legacy_s": round(legacy, 6),
+            "single_pass_s": round(single_pass, 6),
+            "speedup": round(legacy / single_pass, 2) if single_pass else None,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ContentSlicer scaling")
+    parser.add_argument("--files", type=int, nargs="+", default=[100, 1000, 5000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=str, default=None, help="Write JSON results to this path")
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger("app.engine.content_slicer").setLevel(logging.WARNING)
+
+    results = run(args.files, args.repeat)
+    print(f"{'files':>8} {'bytes':>12} {'legacy (s)':>12} {'single-pass (s)':>16} {'speedup':>8}")
+    for row in results:
+        print(f"{row['files']:>8} {row['bytes']:>12} {row['legacy_s']:>12.4f} {row['single_pass_s']:>16.4f} {row['speedup']:>8}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
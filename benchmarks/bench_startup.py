@@ -0,0 +1,164 @@
+"""
+Benchmark: cold-start latency of the CLI.
+
+Every measurement starts a fresh interpreter, so module imports and settings loading
+are part of the timing:
+
+    python          bare interpreter start (the floor for everything else)
+    import          `import app.main`
+    recognizer      a full run on a small dump resolved by the marker recognizer
+    cache_hit       a full LLM-path run whose manifest is already in the on-disk cache
+
+The runs also report which heavy optional modules (httpx, dotenv, multiprocessing, ...)
+were loaded, which should be none for the recognizer and cache-hit runs, and the
+slowest modules of `import app.main` according to `python -X importtime`.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 10 --output startup.json
+    python -m benchmarks.bench_startup --budget-ms 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from app.core.manifest_cache import ManifestCache
+from app.core.prompts import LLM_BOUNDARY_DETECTION_PROMPT
+from app.engine.marker_recognizer import MarkerRecognizer
+from benchmarks.dumpgen import generate_dump
+
+# Modules that only specific features need; none of them belongs on the startup path
+HEAVY_MODULES = ("httpx", "h2", "dotenv", "multiprocessing", "tarfile", "zipfile", "tracemalloc", "cProfile")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the CLI with the given arguments and reports the heavy modules it loaded itself,
+# as opposed to those the interpreter already loaded at startup (e.g. by site hooks)
+_PROBE = (
+    "import sys\n"
+    "preloaded = set(sys.modules)\n"
+    "from app.main import main\n"
+    "sys.argv = ['app.main'] + sys.argv[1:]\n"
+    "main()\n"
+    f"print('heavy:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules and m not in preloaded))\n"
+)
+
+# The LLM endpoint of the cache-hit run; nothing listens there, so a cache miss fails the run
+_UNREACHABLE_ENDPOINT = "http://127.0.0.1:9/v1"
+
+
+def _environment(workdir: str, **overrides) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": REPO_ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+        "LOG_LEVEL": "WARNING",
+        "MANIFEST_CACHE_DIR": os.path.join(workdir, "cache"),
+        "LLM_ENDPOINT": _UNREACHABLE_ENDPOINT,
+    })
+    env.update(overrides)
+    return env
+
+
+def prepare(workdir: str, files: int) -> Dict[str, Dict]:
+    """Writes the input dumps and the cached manifest, and returns the scenarios to time."""
+    text, _ = generate_dump(files, 200, "start_end", seed=7)
+    with open(os.path.join(workdir, "dump.txt"), "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+    # The cache-hit run skips the recognizer, so its single window goes to the (cached) LLM path
+    manifest = MarkerRecognizer().recognize(text)
+    cache = ManifestCache(cache_dir=os.path.join(workdir, "cache"))
+    cache.put(ManifestCache.make_key(LLM_BOUNDARY_DETECTION_PROMPT, _UNREACHABLE_ENDPOINT, text), manifest)
+
+    cli = [sys.executable, "-c", _PROBE, "--input", "dump.txt"]
+    return {
+        "python": {"command": [sys.executable, "-c", "pass"], "env": _environment(workdir)},
+        "import": {"command": [sys.executable, "-c", "import app.main"], "env": _environment(workdir)},
+        "recognizer": {"command": cli + ["--output", "out_recognizer"], "env": _environment(workdir)},
+        "cache_hit": {"command": cli + ["--output", "out_cache_hit"],
+                      "env": _environment(workdir, RECOGNIZER_ENABLED="false",
+                                          BOUNDARY_WINDOW_SIZE=str(len(text) + 1))},
+    }
+
+
+def time_scenario(scenario: Dict, workdir: str, repeat: int) -> Dict:
+    timings, heavy = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(scenario["command"], cwd=workdir, env=scenario["env"],
+                                   capture_output=True, text=True)
+        timings.append(time.perf_counter() - started)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{' '.join(scenario['command'][:3])} failed: {completed.stderr.strip()[-500:]}")
+        for line in completed.stdout.splitlines():
+            if line.startswith("heavy:"):
+                heavy = [name for name in line[len("heavy:"):].split(",") if name]
+    result = {"ms": round(min(timings) * 1000, 2), "median_ms": round(sorted(timings)[len(timings) // 2] * 1000, 2)}
+    if heavy is not None:
+        result["heavy_modules"] = heavy
+    return result
+
+
+def import_profile(workdir: str, top: int) -> List[Dict]:
+    """Slowest modules of `import app.main` by cumulative import time (`-X importtime`)."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=workdir,
+                               env=_environment(workdir), capture_output=True, text=True, check=True)
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        rows.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def run(repeat: int, files: int, top: int) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="chaostocode-startup-") as workdir:
+        scenarios = prepare(workdir, files)
+        results = {name: time_scenario(scenario, workdir, repeat) for name, scenario in scenarios.items()}
+        return {"scenarios": results, "import_profile": import_profile(workdir, top)}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark CLI cold-start latency")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--files", type=int, default=20, help="Files in the small input dump")
+    parser.add_argument("--top", type=int, default=15, help="Modules listed in the import profile")
+    parser.add_argument("--output", type=str, default=None, help="Write JSON results to this path")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail if the recognizer or cache-hit run exceeds the interpreter start by more than this")
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.getLogger("app.engine.marker_recognizer").setLevel(logging.WARNING)
+
+    results = run(args.repeat, args.files, args.top)
+    scenarios = results["scenarios"]
+    floor = scenarios["python"]["ms"]
+    print(f"{'scenario':>12} {'best (ms)':>10} {'median (ms)':>12} {'over python (ms)':>17}  heavy modules")
+    for name, row in scenarios.items():
+        heavy = ", ".join(row.get("heavy_modules", [])) or "-"
+        print(f"{name:>12} {row['ms']:>10.1f} {row['median_ms']:>12.1f} {row['ms'] - floor:>17.1f}  {heavy}")
+    print(f"\n{'module':>40} {'cumulative (ms)':>16} {'self (ms)':>10}")
+    for row in results["import_profile"]:
+        print(f"{row['module']:>40} {row['cumulative_ms']:>16.1f} {row['self_ms']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    failures = [name for name in ("recognizer", "cache_hit")
+                if scenarios[name].get("heavy_modules")
+                or (args.budget_ms is not None and scenarios[name]["ms"] - floor > args.budget_ms)]
+    for name in failures:
+        print(f"OVER BUDGET {name}: {scenarios[name]['ms'] - floor:.1f} ms, "
+              f"heavy modules: {', '.join(scenarios[name].get('heavy_modules', [])) or '-'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
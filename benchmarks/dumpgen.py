@@ -0,0 +1,79 @@
+"""
+Synthetic project dump generator for benchmarks.
+
+Dumps are deterministic for a given seed and are parameterized by file count, target
+file size and marker style:
+
+    file_header     --- FILE: path ---
+    start_end       ### START path / ### END path
+    markdown_fence  ## path followed by a fenced code block
+
+Usage:
+    python -m benchmarks.dumpgen --files 1000 --file-size 2048 --style start_end --output dump.txt
+"""
+import argparse
+import random
+import sys
+from typing import Dict, Tuple
+
+STYLES = ("file_header", "start_end", "markdown_fence")
+
+_WORDS = ("value", "count", "items", "result", "config", "buffer", "index", "total", "cache", "state")
+
+
+def _make_content(rng: random.Random, index: int, file_size: int) -> str:
+    lines = [f"def function_{index}(items):"]
+    size = len(lines[0]) + 1
+    while size < file_size:
+        name, other = rng.choice(_WORDS), rng.choice(_WORDS)
+        line = f"    {name}_{rng.randrange(1000)} = {other}_{rng.randrange(1000)} + {rng.randrange(100000)}"
+        lines.append(line)
+        size += len(line) + 1
+    lines.append(f"    return {index}")
+    return "\n".join(lines)
+
+
+def _render(style: str, filename: str, content: str) -> str:
+    if style == "file_header":
+        return f"--- FILE: {filename} ---\n{content}\n\n"
+    if style == "start_end":
+        return f"### START {filename}\n{content}\n### END {filename}\n\n"
+    if style == "markdown_fence":
+        return f"## {filename}\n\n```python\n{content}\n```\n\n"
+    raise ValueError(f"Unknown marker style: {style}")
+
+
+def generate_dump(files: int, file_size: int = 1024, style: str = "start_end",
+                  seed: int = 0) -> Tuple[str, Dict[str, str]]:
+    """
+    Returns the dump text and the expected {filename: content} of every file in it.
+    """
+    rng = random.Random(seed)
+    parts = []
+    expected = {}
+    for index in range(files):
+        filename = f"pkg_{index % 50}/module_{index}.py"
+        content = _make_content(rng, index, file_size)
+        expected[filename] = content
+        parts.append(_render(style, filename, content))
+    return "".join(parts), expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic project dump")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--file-size", type=int, default=1024, help="Approximate size of each file in bytes")
+    parser.add_argument("--style", choices=STYLES, default="start_end")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, required=True)
+    args = parser.parse_args()
+
+    text, expected = generate_dump(args.files, args.file_size, args.style, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(text)
+    print(f"Wrote {len(expected)} files ({len(text.encode('utf-8'))} bytes) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
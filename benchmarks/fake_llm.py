@@ -0,0 +1,153 @@
+"""
+Local fake LLM HTTP server for benchmarks.
+
+Answers boundary requests like the real endpoint does, with configurable latency,
+jitter and error rate, and without any model: the manifest is derived from the text
+in the prompt with the deterministic marker grammars. Requests with `"stream": true`
+are answered with Ollama-style NDJSON, one small chunk per line.
+
+Usage:
+    python -m benchmarks.fake_llm --port 11434 --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from typing import List, Optional
+
+from app.engine.marker_recognizer import DEFAULT_GRAMMARS, MarkerRecognizer
+
+
+def manifest_for_prompt(prompt: str) -> List[dict]:
+    # The prompt ends with the window text after the instructions; the grammar that finds
+    # the most sections wins, as the recognizer would pick it
+    best = []
+    for grammar in DEFAULT_GRAMMARS:
+        entries = MarkerRecognizer([grammar], min_coverage=0.0).recognize(prompt) or []
+        if len(entries) > len(best):
+            best = entries
+    lines = [line.strip() for line in prompt.splitlines() if line.strip()]
+    manifest = []
+    for entry in best:
+        # A section still open at the end of the window ends at its last line, as an LLM would say
+        end_marker = entry["end_marker"] or (lines[-1] if lines else "")
+        if entry["start_marker"] and end_marker and end_marker != entry["start_marker"]:
+            manifest.append({"filename": entry["filename"], "start_marker": entry["start_marker"],
+                             "end_marker": end_marker})
+    return manifest
+
+
+class FakeLLMServer:
+    """
+    Minimal asyncio HTTP/1.1 server that imitates the boundary detection endpoint.
+    Every request waits `latency` ± `jitter` seconds and fails with 503 with probability
+    `error_rate`. Counters of served and failed requests are kept in `stats`.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0}
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/api/generate"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> "FakeLLMServer":
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def __aenter__(self) -> "FakeLLMServer":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader, writer) -> bool:
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", "0")))
+        self.stats["requests"] += 1
+
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        if delay:
+            await asyncio.sleep(delay)
+        if self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            self._respond(writer, 503, b'{"error": "injected failure"}')
+            await writer.drain()
+            return True
+
+        payload = json.loads(body or b"{}")
+        manifest = manifest_for_prompt(payload.get("prompt", ""))
+        if payload.get("stream"):
+            text = json.dumps(manifest)
+            chunks = [text[i:i + 16] for i in range(0, len(text), 16)]
+            lines = [json.dumps({"response": chunk, "done": False}) for chunk in chunks]
+            lines.append(json.dumps({"response": "", "done": True}))
+            self._respond(writer, 200, ("\n".join(lines) + "\n").encode("utf-8"), "application/x-ndjson")
+        else:
+            self._respond(writer, 200, json.dumps(manifest).encode("utf-8"))
+        await writer.drain()
+        return True
+
+    @staticmethod
+    def _respond(writer, status: int, body: bytes, content_type: str = "application/json"):
+        reason = "OK" if status == 200 else "Service Unavailable"
+        head = (f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+
+async def _serve(args):
+    server = await FakeLLMServer(args.latency, args.jitter, args.error_rate, args.seed).start(args.host, args.port)
+    print(f"Fake LLM listening on {server.url}")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake LLM boundary detection server")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+End-to-end and per-stage benchmark runner.
+
+For every combination of marker style, file count and file size a synthetic dump is
+generated and the read, recognize, slice and write stages are timed on their own, then
+the whole recognizer pipeline (process_file) and the LLM pipeline against the local fake
+LLM server. Each measurement reports the best wall time over --repeat runs, throughput
+and the peak traced Python heap of a separate run under tracemalloc.
+
+Results are written as JSON so that runs of different versions can be compared:
+
+    python -m benchmarks.run --files 100 1000 --output bench_results.json
+    python -m benchmarks.run --files 100 1000 --compare bench_results.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.llm_gateway import LLMGateway
+from app.engine.boundary_detector import BoundaryDetector
+from app.engine.content_slicer import ContentSlicer
+from app.engine.marker_recognizer import MarkerRecognizer
+from app.main import process_file
+from app.utils.file_io import read_input_file, write_output_files
+from benchmarks.dumpgen import STYLES, generate_dump
+from benchmarks.fake_llm import FakeLLMServer
+
+
+def measure(func: Callable[[], object], repeat: int, trace_memory: bool = True) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    result = {"seconds": round(min(timings), 6), "median_seconds": round(sorted(timings)[len(timings) // 2], 6)}
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            func()
+            result["peak_memory_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_scenario(style: str, files: int, file_size: int, repeat: int, llm_latency: float,
+                 llm_error_rate: float, workdir: str) -> List[Dict]:
+    text, expected = generate_dump(files, file_size, style)
+    size = len(text.encode("utf-8"))
+    scenario = {"style": style, "files": files, "file_size": file_size, "bytes": size}
+    with open(os.path.join(workdir, "dump.txt"), "w", encoding="utf-8") as f:
+        f.write(text)
+
+    manifest = MarkerRecognizer().recognize(text)
+    if manifest is None or len(manifest) != files:
+        raise RuntimeError(f"Recognizer found {0 if manifest is None else len(manifest)} of {files} files ({style})")
+    sliced = ContentSlicer().slice_content(text, manifest)
+    if sliced != expected:
+        raise RuntimeError(f"Sliced content does not match the generated files ({style})")
+
+    stages = {
+        "read": lambda: asyncio.run(read_input_file("dump.txt")),
+        "recognize": lambda: MarkerRecognizer().recognize(text),
+        "slice": lambda: ContentSlicer().slice_content(text, manifest),
+        "write": lambda: asyncio.run(write_output_files(sliced, "out_write")),
+        "end_to_end": lambda: asyncio.run(process_file("dump.txt", "out_e2e")),
+        "end_to_end_zero_copy": lambda: asyncio.run(process_file("dump.txt", "out_mmap", zero_copy=True)),
+    }
+    results = []
+    for stage, func in stages.items():
+        results.append(_row(scenario, stage, measure(func, repeat)))
+    results.append(_row(scenario, "end_to_end_llm", asyncio.run(_measure_llm(text, repeat, llm_latency, llm_error_rate))))
+    return results
+
+
+async def _measure_llm(text: str, repeat: int, latency: float, error_rate: float) -> Dict:
+    # The LLM path: windowed detection against the fake server, then slicing and writing
+    async with FakeLLMServer(latency=latency, error_rate=error_rate) as server:
+        async with LLMGateway(endpoint=server.url, api_key="benchmark", backoff_base=0.01) as gateway:
+            detector = BoundaryDetector(llm_gateway=gateway)
+
+            async def pipeline():
+                manifest = await detector.detect_boundaries(text)
+                files_content = ContentSlicer().slice_content(text, manifest)
+                await write_output_files(files_content, "out_llm")
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await pipeline()
+                timings.append(time.perf_counter() - started)
+            tracemalloc.start()
+            try:
+                await pipeline()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        runs = repeat + 1
+    return {"seconds": round(min(timings), 6), "median_seconds": round(sorted(timings)[len(timings) // 2], 6),
+            "peak_memory_kb": round(peak / 1024, 1), "llm_requests": server.stats["requests"] // runs,
+            "llm_errors": server.stats["errors"] // runs}
+
+
+def _row(scenario: Dict, stage: str, measured: Dict) -> Dict:
+    row = dict(scenario, stage=stage, **measured)
+    if measured["seconds"]:
+        row["mb_per_second"] = round(scenario["bytes"] / (1024 * 1024) / measured["seconds"], 3)
+        row["files_per_second"] = round(scenario["files"] / measured["seconds"], 1)
+    return row
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """Returns a description of every measurement that is slower than the baseline by more than `threshold`."""
+    key = lambda row: (row["style"], row["files"], row["file_size"], row["stage"])
+    previous = {key(row): row for row in baseline}
+    regressions = []
+    for row in results:
+        old = previous.get(key(row))
+        if old and old["seconds"] and row["seconds"] > old["seconds"] * (1 + threshold):
+            regressions.append(f"{'/'.join(map(str, key(row)))}: {old['seconds']:.4f}s -> {row['seconds']:.4f}s "
+                               f"({row['seconds'] / old['seconds'] - 1:+.0%})")
+    return regressions
+
+
+def _metadata() -> Dict:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {"revision": revision, "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+
+def _quiet_logs():
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("app"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the extraction pipeline")
+    parser.add_argument("--files", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--file-size", type=int, nargs="+", default=[1024])
+    parser.add_argument("--styles", nargs="+", choices=STYLES, default=list(STYLES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM latency per request in seconds")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of fake LLM requests failing with 503")
+    parser.add_argument("--output", type=str, default=None, help="Write JSON results to this path")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown fraction reported as a regression")
+    args = parser.parse_args(argv)
+
+    _quiet_logs()
+    # Every repetition must do the full work
+    settings.MANIFEST_CACHE_ENABLED = False
+
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="chaostocode-bench-") as workdir:
+        # process_file only accepts relative paths
+        os.chdir(workdir)
+        try:
+            for style in args.styles:
+                for files in args.files:
+                    for file_size in args.file_size:
+                        results.extend(run_scenario(style, files, file_size, args.repeat, args.llm_latency,
+                                                    args.llm_error_rate, workdir))
+        finally:
+            os.chdir(cwd)
+
+    print(f"{'style':>15} {'files':>7} {'stage':>22} {'seconds':>10} {'MB/s':>9} {'peak KB':>10}")
+    for row in results:
+        print(f"{row['style']:>15} {row['files']:>7} {row['stage']:>22} {row['seconds']:>10.4f} "
+              f"{row.get('mb_per_second', 0):>9.2f} {row.get('peak_memory_kb', 0):>10.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": _metadata(), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
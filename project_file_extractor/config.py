@@ -0,0 +1,31 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Config:
+    """
+    Application configuration, read from environment variables (and a local .env file).
+    """
+    # Ollama server and model (chat models with a 128k context window)
+    OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
+    OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "qwen2.5:32b")
+    OLLAMA_TIMEOUT: int = int(os.getenv("OLLAMA_TIMEOUT", "300"))
+    OLLAMA_TEMPERATURE: float = float(os.getenv("OLLAMA_TEMPERATURE", "0.1"))
+    OLLAMA_NUM_CTX: int = int(os.getenv("OLLAMA_NUM_CTX", "131072"))
+    # How long Ollama keeps the model, and the KV cache of the shared document prefix, loaded
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+    # Per-file code extraction requests sent to Ollama concurrently (1 = sequential)
+    MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "4"))
+
+    # Input validation
+    MAX_INPUT_FILE_SIZE_MB: float = float(os.getenv("MAX_INPUT_FILE_SIZE_MB", "10"))
+    ALLOWED_INPUT_EXTENSIONS = tuple(
+        ext.strip().lower() for ext in os.getenv("ALLOWED_INPUT_EXTENSIONS", ".txt,.md").split(",") if ext.strip()
+    )
+
+    # Output and logging
+    OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "extracted_project")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FILE: str = os.getenv("LOG_FILE", "")
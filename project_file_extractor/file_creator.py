@@ -0,0 +1,59 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+from file_extractor import is_safe_path
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+class FileCreator:
+    """
+    Writes extracted files below an output directory. Paths that are unsafe or would
+    resolve outside the output directory are refused. Each file is written atomically
+    (temporary file plus rename). Keeps track of created and failed files.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.created_files: List[str] = []
+        self.failed_files: List[str] = []
+
+    def write_file(self, file_path: str, content: Optional[str]) -> bool:
+        if content is None:
+            logger.warning(f"No content for {file_path}; not created.")
+            self.failed_files.append(file_path)
+            return False
+
+        target = self._resolve(file_path)
+        if target is None:
+            logger.error(f"Refusing to write outside the output directory: {file_path}")
+            self.failed_files.append(file_path)
+            return False
+
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(content if content.endswith("\n") else content + "\n")
+                os.replace(temp_path, target)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        except OSError as e:
+            logger.error(f"Failed to write {file_path}: {e}")
+            self.failed_files.append(file_path)
+            return False
+
+        self.created_files.append(file_path)
+        logger.info(f"Created {target}")
+        return True
+
+    def _resolve(self, file_path: str) -> Optional[Path]:
+        if not is_safe_path(file_path):
+            return None
+        root = self.output_dir.resolve()
+        target = (root / file_path).resolve()
+        return target if target.is_relative_to(root) and target != root else None
@@ -0,0 +1,237 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import Config
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Reply the model is asked to give when the document does not contain a requested file
+FILE_NOT_FOUND = "FILE_NOT_FOUND"
+
+SYSTEM_PROMPT = (
+    "You extract files from project documents. Answer only with what is asked for, "
+    "without explanations or markdown formatting."
+)
+
+# Every prompt starts with the same document block, so that the backend can reuse its
+# cached context for the shared prefix and only process the short per-request suffix
+DOCUMENT_PREFIX = "Project document:\n<document>\n{content}\n</document>\n\n"
+
+STRUCTURE_REQUEST = (
+    "Extract ALL file paths of the project described in the document above. "
+    "List one relative path per line, directories excluded, nothing else."
+)
+
+CODE_REQUEST = (
+    "Return the complete content of the file `{path}` exactly as it appears in the document above, "
+    "without markdown fences or commentary. If the document does not contain this file, "
+    f"reply with {FILE_NOT_FOUND}."
+)
+
+# A section header naming a file: "## path", "# File: `path`", "**path**" or "--- FILE: path ---"
+_HEADER = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]+|-{3,}[ \t]*FILE:[ \t]*|\*\*)(?:File:[ \t]*)?`?(?P<path>[^\s`*]+)`?"
+    r"(?:\*\*)?[ \t]*(?:-{3,})?[ \t]*:?[ \t]*$"
+)
+# Any level-2+ markdown heading ends an unfenced section
+_HEADING = re.compile(r"^[ \t]*#{2,6}[ \t]+\S")
+_FENCE = re.compile(r"^[ \t]*```")
+# Characters allowed in an extracted path
+_PATH_CHARS = re.compile(r"^[\w.\-/]+$")
+# Well-known file names without an extension
+PLAIN_FILE_NAMES = ("Makefile", "Dockerfile", "LICENSE", "Procfile", "Gemfile", "Rakefile", "Jenkinsfile")
+# Tree drawing prefixes ("├── ", "│   └── ") and list markers in LLM answers
+_TREE_PREFIX = re.compile(r"^[\s│├└─|`*\-•]*(?:\d+[.)][ \t]+)?")
+
+class FileExtractor:
+    """
+    Finds the files described in a project document and extracts their content.
+
+    Sections the document spells out in a regular form (a header naming the file followed
+    by a fenced block or plain lines) are resolved with regexes first, without an LLM
+    call; only files that cannot be resolved that way are requested from the LLM, with
+    prompts that all share the document as a common prefix.
+    """
+
+    def __init__(self, llm_client):
+        self.llm = llm_client
+
+    def extract_file_structure(self, content: str) -> List[str]:
+        """
+        Returns the relative file paths of the project, as listed by the LLM, falling back
+        to the headers (or the directory tree) of the document. Unsafe paths are dropped.
+        """
+        try:
+            response = self.llm.generate(prompt=DOCUMENT_PREFIX.format(content=content) + STRUCTURE_REQUEST,
+                                         system_prompt=SYSTEM_PROMPT)
+            paths = _unique_safe_paths(response.splitlines())
+            if paths:
+                logger.info(f"LLM listed {len(paths)} files.")
+                return paths
+            logger.warning("LLM returned no usable file paths; falling back to document parsing.")
+        except Exception as e:
+            logger.warning(f"LLM structure extraction failed ({e}); falling back to document parsing.")
+
+        paths = _unique_safe_paths(path for path, _ in _parse_sections(content))
+        if not paths:
+            paths = _unique_safe_paths(_tree_paths(content))
+        logger.info(f"Document parsing found {len(paths)} files.")
+        return paths
+
+    def extract_code_for_file(self, content: str, file_path: str) -> Optional[str]:
+        """
+        Returns the content of `file_path`, or None if the document does not contain it.
+        Tries the regex sections first and asks the LLM only when they do not resolve it.
+        """
+        code = self._regex_extract_code(content, file_path)
+        if code is not None:
+            logger.debug(f"Resolved {file_path} from the document without the LLM.")
+            return code
+
+        try:
+            response = self.llm.generate(prompt=DOCUMENT_PREFIX.format(content=content)
+                                         + CODE_REQUEST.format(path=file_path),
+                                         system_prompt=SYSTEM_PROMPT)
+        except Exception as e:
+            logger.error(f"LLM code extraction failed for {file_path}: {e}")
+            return None
+        code = self._clean_code_response(response or "")
+        if not code or code == FILE_NOT_FOUND:
+            logger.warning(f"No content found for {file_path}.")
+            return None
+        return code
+
+    def _regex_extract_code(self, content: str, file_path: str) -> Optional[str]:
+        target = _normalize(file_path)
+        sections = [(path, body) for path, body in _parse_sections(content) if body]
+        for path, body in sections:
+            if _normalize(path) == target:
+                return body
+        # A header may name the file relative to a different root ("main.py" for "src/main.py")
+        suffix_matches = [body for path, body in sections
+                          if _normalize(path).endswith("/" + target) or target.endswith("/" + _normalize(path))]
+        return suffix_matches[0] if len(suffix_matches) == 1 else None
+
+    @staticmethod
+    def _clean_code_response(response: str) -> str:
+        """Strips surrounding whitespace and a markdown code fence from an LLM answer."""
+        text = response.strip()
+        lines = text.splitlines()
+        if lines and _FENCE.match(lines[0]):
+            lines = lines[1:]
+            if lines and lines[-1].strip().startswith("```"):
+                lines = lines[:-1]
+            text = "\n".join(lines).strip()
+        return text
+
+def extract_files_concurrently(extractor: FileExtractor, content: str, paths: Sequence[str],
+                               max_workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """
+    Runs extract_code_for_file for every path with at most `max_workers` requests in
+    flight (default: Config.MAX_CONCURRENT_REQUESTS, read at call time) and returns
+    path -> content (None when not found) in the order of `paths`. A failure for one
+    file does not affect the others.
+    """
+    if max_workers is None:
+        max_workers = Config.MAX_CONCURRENT_REQUESTS
+
+    def extract(path: str) -> Optional[str]:
+        try:
+            return extractor.extract_code_for_file(content, path)
+        except Exception as e:
+            logger.error(f"Extraction failed for {path}: {e}")
+            return None
+
+    if max_workers <= 1 or len(paths) <= 1:
+        return {path: extract(path) for path in paths}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract") as executor:
+        return dict(zip(paths, executor.map(extract, paths)))
+
+def is_safe_path(path: str) -> bool:
+    """
+    Relative file path made of word characters, dots, dashes and slashes, without `..`,
+    whose name has an extension (or is a well-known extensionless file).
+    """
+    if not path or len(path) > 255 or path.startswith("/") or not _PATH_CHARS.match(path):
+        return False
+    parts = PurePosixPath(path).parts
+    if not parts or ".." in parts:
+        return False
+    return "." in parts[-1] or parts[-1] in PLAIN_FILE_NAMES
+
+def _normalize(path: str) -> str:
+    path = path.strip().strip("`").replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path
+
+def _unique_safe_paths(candidates) -> List[str]:
+    paths = []
+    for candidate in candidates:
+        path = _normalize(_TREE_PREFIX.sub("", candidate))
+        if path.endswith("/") or not is_safe_path(path):
+            continue
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+@lru_cache(maxsize=8)
+def _parse_sections(content: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    Splits the document into (path, body) sections in one pass. A fenced block right
+    after a header is taken verbatim; otherwise the section runs until the next header.
+    Cached, since every per-file lookup of a document parses the same text.
+    """
+    lines = content.splitlines()
+    sections = []
+    index = 0
+    while index < len(lines):
+        path = _header_path(lines[index])
+        if path is None:
+            index += 1
+            continue
+        body_start = index + 1
+        while body_start < len(lines) and not lines[body_start].strip():
+            body_start += 1
+        if body_start < len(lines) and _FENCE.match(lines[body_start]):
+            end = body_start + 1
+            while end < len(lines) and lines[end].strip() != "```":
+                end += 1
+            body = lines[body_start + 1:end]
+            index = end + 1
+        else:
+            end = body_start
+            while end < len(lines) and _header_path(lines[end]) is None and not _HEADING.match(lines[end]):
+                end += 1
+            body = lines[body_start:end]
+            index = end
+        sections.append((path, "\n".join(body).strip()))
+    return tuple(sections)
+
+def _header_path(line: str) -> Optional[str]:
+    match = _HEADER.match(line)
+    if match is None:
+        return None
+    path = match.group("path")
+    return path if "." in path or "/" in path else None
+
+def _tree_paths(content: str) -> List[str]:
+    """File paths from a `tree`-style listing, with the top-level directory line dropped."""
+    paths = []
+    stack: List[Tuple[int, str]] = []
+    for line in content.splitlines():
+        match = re.match(r"^([\s│|]*)[├└]──[ \t]*(\S.*?)[ \t]*$", line)
+        if match is None:
+            continue
+        depth = len(match.group(1).replace("\t", "    ")) // 4
+        name = match.group(2)
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        if name.endswith("/"):
+            stack.append((depth, name.rstrip("/")))
+        else:
+            paths.append("/".join([directory for _, directory in stack] + [name]))
+    return paths
@@ -0,0 +1,87 @@
+from typing import List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+class OllamaClient:
+    """
+    Minimal synchronous client for the Ollama HTTP API.
+
+    One requests.Session is kept for the lifetime of the client, with a connection pool
+    sized for `pool_size` (MAX_CONCURRENT_REQUESTS by default), so concurrent per-file extraction requests reuse
+    warm connections. The session may be shared by worker threads. Use it as a context
+    manager to close the session when done.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None,
+                 timeout: Optional[int] = None, pool_size: Optional[int] = None):
+        # Defaults are read from Config at construction time, not bound at import time
+        self.base_url = (base_url or Config.OLLAMA_BASE_URL).rstrip("/")
+        self.model = model or Config.OLLAMA_MODEL
+        self.timeout = timeout if timeout is not None else Config.OLLAMA_TIMEOUT
+        if pool_size is None:
+            pool_size = Config.MAX_CONCURRENT_REQUESTS
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self) -> "OllamaClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def check_connection(self) -> bool:
+        """Returns True if the Ollama server answers."""
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=10)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"Cannot reach Ollama at {self.base_url}: {e}")
+            return False
+
+    def list_models(self) -> List[str]:
+        """Names of the models available on the server."""
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=10)
+        response.raise_for_status()
+        return [model.get("name", "") for model in response.json().get("models", [])]
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None,
+                 temperature: float = Config.OLLAMA_TEMPERATURE) -> str:
+        """
+        Sends a single non-streamed generation request and returns the response text.
+
+        Raises:
+            ValueError: for an empty prompt or a temperature outside [0, 1].
+            requests.RequestException: on HTTP or connection errors.
+        """
+        if not prompt or not prompt.strip():
+            raise ValueError("Prompt must not be empty.")
+        if not 0.0 <= temperature <= 1.0:
+            raise ValueError(f"Temperature must be between 0 and 1, got {temperature}.")
+
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": Config.OLLAMA_KEEP_ALIVE,
+            "options": {"temperature": temperature, "num_ctx": Config.OLLAMA_NUM_CTX},
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+
+        try:
+            response = self.session.post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json().get("response", "")
+        except Exception as e:
+            logger.error(f"Ollama generate request failed: {e}")
+            raise
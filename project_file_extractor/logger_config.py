@@ -0,0 +1,25 @@
+import logging
+import sys
+from config import Config
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+def setup_logging(level: str = Config.LOG_LEVEL, log_file: str = Config.LOG_FILE) -> logging.Logger:
+    """
+    Configures the root logger once: console output plus an optional log file.
+    Avoids logging document content or other sensitive data.
+    """
+    root = logging.getLogger()
+    if not root.handlers:
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+        for handler in handlers:
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            root.addHandler(handler)
+    level_value = logging.getLevelName(level.upper())
+    root.setLevel(level_value if isinstance(level_value, int) else logging.INFO)
+    return root
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
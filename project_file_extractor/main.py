@@ -0,0 +1,98 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional
+from config import Config
+from file_creator import FileCreator
+from file_extractor import FileExtractor, extract_files_concurrently
+from llm_client import OllamaClient
+from logger_config import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+MAX_FILE_SIZE_BYTES = int(Config.MAX_INPUT_FILE_SIZE_MB * 1024 * 1024)
+
+def validate_input_file(file_path) -> bool:
+    """Checks that the input exists, has an allowed extension, and is non-empty and not too large."""
+    path = Path(file_path)
+    if not path.is_file():
+        logger.error(f"Input file not found: {path}")
+        return False
+    if path.suffix.lower() not in Config.ALLOWED_INPUT_EXTENSIONS:
+        logger.error(f"Unsupported input file type {path.suffix!r}; allowed: {', '.join(Config.ALLOWED_INPUT_EXTENSIONS)}")
+        return False
+    size = path.stat().st_size
+    if size == 0:
+        logger.error(f"Input file is empty: {path}")
+        return False
+    # Read at call time, so a changed limit takes effect without re-importing the module
+    max_bytes = int(Config.MAX_INPUT_FILE_SIZE_MB * 1024 * 1024)
+    if size > max_bytes:
+        logger.error(f"Input file is too large: {size} bytes (limit {max_bytes} bytes)")
+        return False
+    return True
+
+def read_input_file(file_path) -> Optional[str]:
+    """Returns the file content, or None if it cannot be read or holds only whitespace."""
+    try:
+        content = Path(file_path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error(f"Cannot read {file_path}: {e}")
+        return None
+    if not content.strip():
+        logger.error(f"Input file has no content: {file_path}")
+        return None
+    return content
+
+def main(input_file, output_dir=None, max_workers: Optional[int] = None) -> int:
+    """
+    Extracts the project described in `input_file` into `output_dir`.
+    Returns 0 when every listed file was created, 1 otherwise.
+    """
+    setup_logging()
+    if not validate_input_file(input_file):
+        return 1
+    content = read_input_file(input_file)
+    if content is None:
+        return 1
+
+    workers = max_workers or Config.MAX_CONCURRENT_REQUESTS
+    # One pooled connection per worker thread, so no request waits for a free connection
+    with OllamaClient(pool_size=workers) as client:
+        if not client.check_connection():
+            return 1
+        models = client.list_models()
+        if Config.OLLAMA_MODEL not in models and f"{Config.OLLAMA_MODEL}:latest" not in models:
+            logger.error(f"Model {Config.OLLAMA_MODEL} is not available; pull it with `ollama pull {Config.OLLAMA_MODEL}`.")
+            return 1
+
+        extractor = FileExtractor(client)
+        paths = extractor.extract_file_structure(content)
+        if not paths:
+            logger.error("No files found in the input document.")
+            return 1
+
+        logger.info(f"Extracting {len(paths)} files with up to {workers} concurrent requests.")
+        codes = extract_files_concurrently(extractor, content, paths, workers)
+
+    creator = FileCreator(output_dir or Config.OUTPUT_DIR)
+    for path in paths:
+        creator.write_file(path, codes.get(path))
+
+    logger.info(f"Created {len(creator.created_files)} files, {len(creator.failed_files)} failed.")
+    if creator.failed_files:
+        logger.warning(f"Failed files: {', '.join(creator.failed_files)}")
+        return 1
+    return 0
+
+def cli() -> int:
+    parser = argparse.ArgumentParser(description="Extract project files from a project document with a local LLM.")
+    parser.add_argument("input_file", help="Project document (.txt or .md)")
+    parser.add_argument("-o", "--output", default=Config.OUTPUT_DIR, help="Output directory")
+    parser.add_argument("-w", "--workers", type=int, default=Config.MAX_CONCURRENT_REQUESTS,
+                        help="Maximum concurrent per-file extraction requests (1 = sequential)")
+    args = parser.parse_args()
+    return main(args.input_file, args.output, max(1, args.workers))
+
+if __name__ == "__main__":
+    sys.exit(cli())
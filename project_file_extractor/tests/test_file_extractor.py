@@ -1,8 +1,13 @@
-"""Unit tests for file_extractor.py: structure extraction, code extraction, and fallback logic."""
+"""Unit tests for file_extractor.py: structure extraction, code extraction, fallback logic and concurrent extraction."""
+
+import re
+import threading
+import time
 
 import pytest
 from unittest.mock import MagicMock
-from file_extractor import FileExtractor
+from config import Config
+from file_extractor import FileExtractor, extract_files_concurrently
 from llm_client import OllamaClient
 
 CONTENT = """
@@ -61,3 +66,60 @@ def test_clean_code_response():
     ext = FileExtractor(MagicMock())
     resp = "```python\nprint('x')\n```"
     assert ext._clean_code_response(resp) == "print('x')"
+
+
+class RecordingClient:
+    """Fake LLM client that answers code requests slowly and records how many overlap."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.requested = []
+
+    def generate(self, prompt, system_prompt=None):
+        path = re.search(r"content of the file `([^`]+)`", prompt).group(1)
+        with self.lock:
+            self.requested.append(path)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if path == "bad.py":
+                raise RuntimeError("backend failed")
+            return f"# {path}"
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+LLM_ONLY_PATHS = [f"pkg/m{i}.py" for i in range(8)] + ["bad.py"]
+
+
+def test_concurrent_extraction_bounds_workers_and_keeps_order():
+    client = RecordingClient()
+    paths = list(reversed(LLM_ONLY_PATHS))
+    results = extract_files_concurrently(FileExtractor(client), "no sections here", paths, max_workers=3)
+
+    assert list(results) == paths
+    assert 2 <= client.peak <= 3
+    assert results["bad.py"] is None
+    assert all(results[path] == f"# {path}" for path in paths if path != "bad.py")
+
+
+def test_concurrent_extraction_resolves_regex_sections_without_llm():
+    document = "## src/a.py\n```python\nx = 1\n```\n\n## src/b.py\n```\ny = 2\n```\n"
+    client = RecordingClient(delay=0)
+    results = extract_files_concurrently(FileExtractor(client), document, ["src/a.py", "src/b.py", "src/c.py"],
+                                         max_workers=4)
+
+    assert results == {"src/a.py": "x = 1", "src/b.py": "y = 2", "src/c.py": "# src/c.py"}
+    assert client.requested == ["src/c.py"]
+
+
+def test_concurrent_extraction_reads_default_workers_at_call_time(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_CONCURRENT_REQUESTS", 1)
+    client = RecordingClient(delay=0.005)
+    extract_files_concurrently(FileExtractor(client), "no sections here", LLM_ONLY_PATHS[:4])
+    assert client.peak == 1
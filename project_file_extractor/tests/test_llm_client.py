@@ -50,3 +50,17 @@ def test_generate_prompt_and_failures(mock_session):
     mock_post.side_effect = Exception("HTTP error!")
     with pytest.raises(Exception):
         client.generate(prompt="fail")
+
+@patch("llm_client.HTTPAdapter", autospec=True)
+@patch("llm_client.requests.Session", autospec=True)
+def test_defaults_are_read_from_config_at_construction(mock_session, mock_adapter, monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, "MAX_CONCURRENT_REQUESTS", 11)
+    monkeypatch.setattr(Config, "OLLAMA_MODEL", "late:model")
+    client = OllamaClient()
+    assert client.model == "late:model"
+    mock_adapter.assert_called_once_with(pool_connections=1, pool_maxsize=11)
+
+    mock_adapter.reset_mock()
+    OllamaClient(pool_size=2)
+    mock_adapter.assert_called_once_with(pool_connections=1, pool_maxsize=2)
@@ -118,3 +118,16 @@ def test_main_invalid_input_file(temp_dir):
     fake_file = temp_dir / "nonexistent.txt"
     exit_code = main(fake_file, temp_dir / "output")
     assert exit_code == 1
+
+@patch('main.OllamaClient')
+def test_main_sizes_client_pool_for_workers(mock_client_class, valid_input_file, temp_dir, monkeypatch):
+    mock_client = MagicMock()
+    mock_client.check_connection.return_value = False
+    mock_client_class.return_value.__enter__.return_value = mock_client
+    main(valid_input_file, temp_dir / "output", max_workers=7)
+    mock_client_class.assert_called_once_with(pool_size=7)
+
+    mock_client_class.reset_mock()
+    monkeypatch.setattr(Config, 'MAX_CONCURRENT_REQUESTS', 3)
+    main(valid_input_file, temp_dir / "output")
+    mock_client_class.assert_called_once_with(pool_size=3)
@@ -0,0 +1,67 @@
+"""Tests for app/batch.py: job discovery and concurrent batch processing."""
+
+import asyncio
+import json
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.batch import discover_jobs, run_batch
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def test_discover_jobs_from_directory_glob_and_jsonl(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dumps").mkdir()
+    (tmp_path / "dumps" / "one.txt").write_text("x")
+    (tmp_path / "dumps" / "two.md").write_text("y")
+    with open(tmp_path / "jobs.jsonl", "w") as f:
+        f.write(json.dumps({"request_id": "user-001", "body": "### START a.py\nx\n### END a.py"}) + "\n\n")
+        f.write(json.dumps({"id": "from file", "input": "dumps/one.txt", "output": "custom"}) + "\n")
+
+    assert [j["input"] for j in discover_jobs("dumps", "out")] == ["dumps/one.txt", "dumps/two.md"]
+    assert [j["output"] for j in discover_jobs("dumps/*.txt", "out")] == ["out/one"]
+    jsonl = discover_jobs("jobs.jsonl", "out")
+    assert jsonl[0] == {"id": "user-001", "text": "### START a.py\nx\n### END a.py", "output": "out/user-001"}
+    assert jsonl[1] == {"id": "from_file", "input": "dumps/one.txt", "output": "custom"}
+
+
+def test_run_batch_reports_per_job_results_and_throughput(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dumps").mkdir()
+    shutil.copy(REPO_ROOT / "dump.txt", tmp_path / "dumps" / "big.txt")
+    shutil.copy(REPO_ROOT / "input_data" / "dump.txt", tmp_path / "dumps" / "small.txt")
+    (tmp_path / "dumps" / "empty.txt").write_text("")
+
+    jobs = discover_jobs("dumps", "out")
+    summary = asyncio.run(run_batch(jobs, concurrency=2, workers=-1))
+
+    by_id = {r["id"]: r for r in summary["results"]}
+    assert by_id["small"]["status"] == "ok" and by_id["small"]["files"] == 2
+    assert by_id["big"]["status"] == "ok" and by_id["big"]["files"] > 50
+    assert by_id["empty"]["status"] == "error"
+    assert summary["succeeded"] == 2 and summary["failed"] == 1
+    assert summary["files"] == by_id["small"]["files"] + by_id["big"]["files"]
+    assert summary["files_per_second"] > 0 and summary["mb_per_second"] > 0
+    assert (tmp_path / "out" / "small" / "module1.py").exists()
+
+
+def test_process_pool_writes_the_same_files_as_inline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dumps").mkdir()
+    shutil.copy(REPO_ROOT / "dump.txt", tmp_path / "dumps" / "big.txt")
+    shutil.copy(REPO_ROOT / "input_data" / "dump.txt", tmp_path / "dumps" / "small.txt")
+
+    def tree(root: Path) -> dict:
+        return {p.relative_to(root).as_posix(): p.read_bytes() for p in root.rglob("*") if p.is_file()}
+
+    inline = asyncio.run(run_batch(discover_jobs("dumps", "inline"), concurrency=2, workers=-1))
+    pooled = asyncio.run(run_batch(discover_jobs("dumps", "pooled"), concurrency=2, workers=2))
+
+    assert pooled["succeeded"] == inline["succeeded"] == 2
+    assert pooled["files"] == inline["files"]
+    assert len(tree(tmp_path / "pooled")) > 50
+    assert tree(tmp_path / "pooled") == tree(tmp_path / "inline")
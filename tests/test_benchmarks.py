@@ -0,0 +1,63 @@
+"""Tests for the benchmark harness: synthetic dump generator, fake LLM server, result comparison and startup probe."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.llm_gateway import LLMGateway
+from app.engine.boundary_detector import BoundaryDetector
+from app.engine.content_slicer import ContentSlicer
+from app.engine.marker_recognizer import MarkerRecognizer
+from benchmarks.dumpgen import STYLES, generate_dump
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.bench_startup import run as run_startup
+from benchmarks.run import compare
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_generated_dumps_round_trip_through_recognizer(style):
+    text, expected = generate_dump(20, 300, style, seed=1)
+    assert generate_dump(20, 300, style, seed=1)[0] == text
+    manifest = MarkerRecognizer().recognize(text)
+    assert ContentSlicer().slice_content(text, manifest) == expected
+
+
+def test_fake_llm_serves_manifests_and_injects_errors(monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "MANIFEST_CACHE_ENABLED", False)
+    text, expected = generate_dump(10, 200, "start_end")
+
+    async def scenario():
+        async with FakeLLMServer() as server:
+            async with LLMGateway(endpoint=server.url, api_key="test") as gateway:
+                manifest = await BoundaryDetector(llm_gateway=gateway, window_size=len(text) + 1).detect_boundaries(text)
+        async with FakeLLMServer(error_rate=1.0) as failing:
+            async with LLMGateway(endpoint=failing.url, api_key="test", max_retries=0) as gateway:
+                with pytest.raises(httpx.HTTPStatusError):
+                    await gateway.post_boundary_request("### START a.py\nx\n### END a.py")
+        return manifest, failing.stats
+
+    manifest, stats = asyncio.run(scenario())
+    assert ContentSlicer().slice_content(text, manifest) == expected
+    assert stats == {"requests": 1, "errors": 1}
+
+
+def test_compare_reports_slowdowns_beyond_threshold():
+    row = {"style": "start_end", "files": 10, "file_size": 100, "stage": "slice"}
+    baseline = [dict(row, seconds=1.0), dict(row, stage="write", seconds=1.0)]
+    results = [dict(row, seconds=1.5), dict(row, stage="write", seconds=1.1)]
+    regressions = compare(results, baseline, threshold=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("start_end/10/100/slice")
+
+
+def test_recognizer_and_cache_hit_runs_start_without_heavy_modules():
+    results = run_startup(repeat=1, files=5, top=5)
+    scenarios = results["scenarios"]
+    assert scenarios["recognizer"]["heavy_modules"] == []
+    assert scenarios["cache_hit"]["heavy_modules"] == []
+    assert results["import_profile"][0]["module"] == "app.main"
@@ -0,0 +1,74 @@
+"""Unit tests for app/engine/boundary_detector.py: windowing, merging and concurrent detection."""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.manifest_cache import ManifestCache
+from app.engine.boundary_detector import BoundaryDetector, merge_manifests, split_into_windows
+
+
+def _make_text(files: int) -> str:
+    return "".join(f"### START f{i}.py\nprint({i})\n### END f{i}.py\n" for i in range(files))
+
+
+def test_small_input_is_single_window():
+    assert split_into_windows("abc\n", 100, 10) == [(0, "abc\n")]
+
+
+def test_windows_cover_text_on_line_boundaries():
+    text = _make_text(200)
+    windows = split_into_windows(text, 500, 100)
+    assert len(windows) > 1
+    for offset, window in windows:
+        assert text[offset:offset + len(window)] == window
+        assert offset == 0 or text[offset - 1] == "\n"
+        assert len(window) <= 500
+    # Consecutive windows overlap or touch so that no line is skipped
+    for (prev_off, prev), (off, _) in zip(windows, windows[1:]):
+        assert off <= prev_off + len(prev)
+    last_off, last = windows[-1]
+    assert last_off + len(last) == len(text)
+
+
+def test_merge_manifests_drops_duplicates():
+    a = [{"filename": "a.py", "start_marker": "s", "end_marker": "e"}]
+    b = [{"filename": "a.py", "start_marker": "s", "end_marker": "e"},
+         {"filename": "b.py", "start_marker": "s2", "end_marker": "e2"}]
+    assert [e["filename"] for e in merge_manifests([a, b])] == ["a.py", "b.py"]
+
+
+def test_detect_boundaries_windows_concurrently():
+    text = _make_text(300)
+    in_flight = {"now": 0, "peak": 0}
+
+    async def fake_post(prompt):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        names = [line.split()[-1] for line in prompt.splitlines() if line.startswith("### START")]
+        return [{"filename": n, "start_marker": f"### START {n}", "end_marker": f"### END {n}"} for n in names]
+
+    gateway = MagicMock()
+    gateway.post_boundary_request = AsyncMock(side_effect=fake_post)
+    gateway.close = AsyncMock()
+    detector = BoundaryDetector(gateway, window_size=1000, window_overlap=200, max_concurrency=3,
+                                manifest_cache=ManifestCache(cache_dir=None))
+
+    manifest = asyncio.run(detector.detect_boundaries(text))
+
+    assert [e["filename"] for e in manifest] == [f"f{i}.py" for i in range(300)]
+    assert gateway.post_boundary_request.await_count > 1
+    assert in_flight["peak"] == 3
+    # The gateway is shared and owned by the caller, so the detector must not close it
+    gateway.close.assert_not_awaited()
+
+    # A repeated run is served entirely from the manifest cache
+    calls = gateway.post_boundary_request.await_count
+    assert asyncio.run(detector.detect_boundaries(text)) == manifest
+    assert gateway.post_boundary_request.await_count == calls
+    assert detector.manifest_cache.hits == calls
@@ -0,0 +1,58 @@
+"""Unit tests for app/engine/content_slicer.py and the single-pass marker automaton."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.engine.content_slicer import ContentSlicer
+from app.engine.marker_automaton import MarkerAutomaton
+
+
+def test_automaton_finds_overlapping_markers():
+    occurrences = MarkerAutomaton(["he", "she", "his", "hers"]).find_all("ushers and his")
+    assert occurrences == {"he": [2], "she": [1], "his": [11], "hers": [2]}
+
+
+def test_automaton_on_bytes():
+    occurrences = MarkerAutomaton([b"END", b"START"]).find_all(b"START a\nEND\nSTART b\nEND")
+    assert occurrences == {b"START": [0, 12], b"END": [8, 20]}
+
+
+def test_slice_content_by_markers():
+    text = "### START a.py\nx = 1\n### END a.py\n### START b.py\ny = 2\n### END b.py\n"
+    manifest = [
+        {"filename": "b.py", "start_marker": "### START b.py", "end_marker": "### END b.py"},
+        {"filename": "a.py", "start_marker": "### START a.py", "end_marker": "### END a.py"},
+        {"filename": "broken.py", "start_marker": "### START missing", "end_marker": "### END b.py"},
+    ]
+    files = ContentSlicer().slice_content(text, manifest)
+    # Out-of-order entries still resolve and results come back in document order
+    assert list(files) == ["a.py", "b.py"]
+    assert files == {"a.py": "x = 1", "b.py": "y = 2"}
+
+
+def test_repeated_markers_resolve_to_successive_occurrences():
+    text = "BEGIN\none\nEND\nBEGIN\ntwo\nEND\n"
+    manifest = [
+        {"filename": "one.txt", "start_marker": "BEGIN", "end_marker": "END"},
+        {"filename": "two.txt", "start_marker": "BEGIN", "end_marker": "END"},
+    ]
+    assert ContentSlicer().slice_content(text, manifest) == {"one.txt": "one", "two.txt": "two"}
+
+
+def test_end_marker_shared_with_next_start():
+    text = "FILE a\nalpha\nFILE b\nbeta\nFILE end"
+    manifest = [
+        {"filename": "a", "start_marker": "FILE a", "end_marker": "FILE b"},
+        {"filename": "b", "start_marker": "FILE b", "end_marker": "FILE end"},
+    ]
+    assert ContentSlicer().slice_content(text, manifest) == {"a": "alpha", "b": "beta"}
+
+
+def test_slice_spans_over_bytes_are_trimmed_byte_offsets():
+    data = "### START ü.txt\n  héllo \n### END ü.txt\n".encode("utf-8")
+    manifest = [{"filename": "ü.txt", "start_marker": "### START ü.txt", "end_marker": "### END ü.txt"}]
+    [(filename, start, end)] = ContentSlicer().slice_spans(data, manifest)
+    assert filename == "ü.txt"
+    assert data[start:end] == "héllo".encode("utf-8")
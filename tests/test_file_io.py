@@ -0,0 +1,115 @@
+"""Tests for the output writer (app/utils/file_io.py) and the archive and content-addressed sinks."""
+
+import asyncio
+import json
+import os
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.file_io import safe_relative_path, write_atomic, write_output_files, write_output_spans
+from app.utils.output_sinks import CAS_INDEX_FILE, OutputSink, _SerialSink, open_sink
+
+FILES = {
+    "build.gradle.kts": "plugins { }\n",
+    "app/build.gradle.kts": "android { }\n",
+    "app/src/main/Main.kt": "fun main() {}\n",
+    "copy/Main.kt": "fun main() {}\n",
+}
+
+
+def _tree(root: Path) -> dict:
+    return {p.relative_to(root).as_posix(): p.read_text() for p in root.rglob("*") if p.is_file()}
+
+
+def test_safe_relative_path():
+    assert safe_relative_path("app\\src/./Main.kt") == "app/src/Main.kt"
+    assert safe_relative_path("a/../b.py") == "b.py"
+    for unsafe in ("/etc/passwd", "../escape.py", "a/../../b.py", "C:/x.py", "", "."):
+        assert safe_relative_path(unsafe) is None
+
+
+def test_writer_preserves_directories_and_skips_unchanged(tmp_path):
+    output_dir = tmp_path / "out"
+    files = dict(FILES, **{"../escape.py": "nope"})
+    assert asyncio.run(write_output_files(files, str(output_dir))) == 4
+    assert _tree(output_dir) == FILES
+    assert not (tmp_path / "escape.py").exists()
+
+    before = os.stat(output_dir / "app/build.gradle.kts")
+    changed = dict(FILES, **{"copy/Main.kt": "fun main() { println() }\n"})
+    assert asyncio.run(write_output_files(changed, str(output_dir))) == 1
+    assert os.stat(output_dir / "app/build.gradle.kts").st_ino == before.st_ino
+    assert _tree(output_dir) == changed
+
+
+def test_span_writer_matches_text_writer(tmp_path):
+    buffer = b"".join(content.encode("utf-8") for content in FILES.values())
+    spans, offset = [], 0
+    for filename, content in FILES.items():
+        spans.append((filename, offset, offset + len(content)))
+        offset += len(content)
+    assert asyncio.run(write_output_spans(buffer, spans, str(tmp_path))) == 4
+    assert _tree(tmp_path) == FILES
+
+
+@pytest.mark.parametrize("kind", ["tar", "zip"])
+def test_archive_sinks(tmp_path, kind):
+    async def scenario():
+        async with open_sink(kind, str(tmp_path / "out")) as sink:
+            await sink.write_files(dict(list(FILES.items())[:2]))
+            await sink.write_spans(b"xxfun main() {}\n", [("copy/Main.kt", 2, 16)])
+
+    asyncio.run(scenario())
+    path = tmp_path / f"out.{kind}"
+    if kind == "tar":
+        with tarfile.open(path) as archive:
+            members = {m.name: archive.extractfile(m).read().decode() for m in archive.getmembers()}
+    else:
+        with zipfile.ZipFile(path) as archive:
+            members = {name: archive.read(name).decode() for name in archive.namelist()}
+    assert members == {name: FILES[name] for name in ("build.gradle.kts", "app/build.gradle.kts", "copy/Main.kt")}
+
+
+def test_content_addressed_sink_deduplicates(tmp_path):
+    async def run():
+        async with open_sink("cas", str(tmp_path)) as sink:
+            return await sink.write_files(FILES)
+
+    assert asyncio.run(run()) == 3
+    index = json.loads((tmp_path / CAS_INDEX_FILE).read_text())["files"]
+    assert set(index) == set(FILES)
+    assert index["copy/Main.kt"] == index["app/src/main/Main.kt"]
+    digest = index["build.gradle.kts"]["sha256"]
+    assert (tmp_path / "objects" / digest[:2] / digest).read_text() == FILES["build.gradle.kts"]
+    # A second run into the same store finds every object already present
+    assert asyncio.run(run()) == 0
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permission bits")
+def test_atomic_write_applies_the_process_umask(tmp_path):
+    previous = os.umask(0o027)
+    try:
+        assert write_atomic(str(tmp_path / "a.txt"), b"x") == 1
+    finally:
+        os.umask(previous)
+    assert (tmp_path / "a.txt").stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == ["a.txt"]
+
+
+def test_sink_base_classes_are_abstract():
+    class PartialSink(OutputSink):
+        async def write_files(self, files_content):
+            return 0
+
+    class NoAddSink(_SerialSink):
+        pass
+
+    for sink_class in (OutputSink, PartialSink, NoAddSink):
+        with pytest.raises(TypeError):
+            sink_class()
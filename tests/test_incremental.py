@@ -0,0 +1,65 @@
+"""Tests for app/engine/incremental.py and incremental re-extraction through process_text."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.engine.incremental import chunk_text
+from app.main import extract_text, process_text
+
+
+def _file(index: int, body: str = "") -> str:
+    lines = "".join(f"    value_{index}_{line} = {line}\n" for line in range(12))
+    return f"--- FILE: src/module_{index}.py ---\ndef f_{index}():\n{lines}{body}    return {index}\n\n"
+
+
+def _dump(files: int, bodies=None) -> str:
+    bodies = bodies or {}
+    return "".join(_file(i, bodies.get(i, "")) for i in range(files))
+
+
+def _outputs(output_dir: Path) -> dict:
+    return {p.relative_to(output_dir).as_posix(): p.read_text() for p in output_dir.rglob("*")
+            if p.is_file() and p.name != settings.INCREMENTAL_STATE_FILE}
+
+
+def test_chunks_cover_text_and_resynchronise():
+    text = _dump(40)
+    chunks = chunk_text(text)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(text)
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+    edited = _dump(40, {20: "    extra = 1\n"})
+    old_digests = {digest for _, _, digest in chunks}
+    changed = [chunk for chunk in chunk_text(edited) if chunk[2] not in old_digests]
+    # Only the chunks around the edit differ
+    assert 0 < len(changed) <= 3
+
+
+def test_incremental_rewrites_only_changed_files(tmp_path):
+    output_dir = tmp_path / "out"
+    first = asyncio.run(process_text(_dump(40), str(output_dir), incremental=True))
+    assert first["files"] == 40 and first["written"] == 40 and first["reused"] == 0
+
+    edited = _dump(40, {7: "    extra = 'changed'\n"})
+    second = asyncio.run(process_text(edited, str(output_dir), incremental=True))
+    assert second["files"] == 40
+    assert second["written"] == 1
+    assert second["reused"] >= 30
+    assert _outputs(output_dir) == asyncio.run(extract_text(edited))
+
+
+def test_incremental_picks_up_renamed_and_appended_files(tmp_path):
+    output_dir = tmp_path / "out"
+    asyncio.run(process_text(_dump(30), str(output_dir), incremental=True))
+
+    edited = _dump(30).replace("--- FILE: src/module_12.py ---", "--- FILE: src/renamed.py ---") + _file(99)
+    summary = asyncio.run(process_text(edited, str(output_dir), incremental=True))
+    assert summary["files"] == 31
+    assert summary["written"] == 2
+    outputs = _outputs(output_dir)
+    assert outputs["src/renamed.py"].startswith("def f_12():")
+    assert outputs["src/module_99.py"].startswith("def f_99():")
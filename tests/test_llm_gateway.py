@@ -0,0 +1,248 @@
+"""Unit tests for app/core/llm_gateway.py using an in-process httpx mock transport."""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core import llm_gateway
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.llm_gateway import LLMGateway
+from app.utils.metrics import metrics
+
+MANIFEST = [{"filename": "a.py", "start_marker": "### START a.py", "end_marker": "### END a.py"}]
+
+
+def _transport(handler):
+    return httpx.MockTransport(handler)
+
+
+def test_in_flight_requests_are_bounded():
+    state = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        state["now"] += 1
+        state["peak"] = max(state["peak"], state["now"])
+        await asyncio.sleep(0.01)
+        state["now"] -= 1
+        return httpx.Response(200, json=MANIFEST)
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", max_in_flight=2, transport=_transport(handler)) as gateway:
+            results = await asyncio.gather(*(gateway.post_boundary_request(f"p{i}") for i in range(6)))
+        assert gateway.closed
+        return results
+
+    results = asyncio.run(scenario())
+    assert results == [MANIFEST] * 6
+    assert state["peak"] == 2
+
+
+def test_request_payload_and_validation():
+    async def handler(request):
+        body = json.loads(request.content)
+        assert body["prompt"] == "abc"
+        return httpx.Response(200, json=[{"filename": "a.py"}])
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", transport=_transport(handler)) as gateway:
+            await gateway.post_boundary_request("a\x00bc")
+
+    try:
+        asyncio.run(scenario())
+    except ValueError as ex:
+        assert "Invalid JSON manifest" in str(ex)
+    else:
+        raise AssertionError("invalid manifest should raise")
+
+
+def test_shared_gateway_is_reused_until_closed():
+    async def scenario():
+        first = llm_gateway.get_shared_gateway()
+        assert llm_gateway.get_shared_gateway() is first
+        await llm_gateway.close_shared_gateway()
+        assert first.closed
+        second = llm_gateway.get_shared_gateway()
+        assert second is not first
+        await llm_gateway.close_shared_gateway()
+
+    asyncio.run(scenario())
+
+
+def test_retries_transient_errors_with_backoff():
+    responses = [httpx.Response(503), httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200, json=MANIFEST)]
+
+    async def handler(request):
+        return responses.pop(0)
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", backoff_base=0.001,
+                              transport=_transport(handler)) as gateway:
+            result = await gateway.post_boundary_request("p")
+            return result, gateway.retry_count
+
+    metrics.reset()
+    assert asyncio.run(scenario()) == (MANIFEST, 2)
+    assert metrics.counter("llm_retries_total") == 2
+    assert metrics.counter("llm_requests_total", status="ok") == 1
+    assert metrics.counter("llm_prompt_tokens_total") == 1
+
+
+def test_client_errors_are_not_retried():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        return httpx.Response(400)
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", backoff_base=0.001,
+                              transport=_transport(handler)) as gateway:
+            await gateway.post_boundary_request("p")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_circuit_breaker_opens_and_refuses_requests():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError("down")
+
+    async def scenario():
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        async with LLMGateway(endpoint="http://llm.test/v1", max_retries=5, backoff_base=0.001,
+                              circuit_breaker=breaker, transport=_transport(handler)) as gateway:
+            with pytest.raises(CircuitOpenError):
+                await gateway.post_boundary_request("p")
+            with pytest.raises(CircuitOpenError):
+                await gateway.post_boundary_request("p")
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def _half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_half_open_trial_ending_in_decoding_error_is_released():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(200, headers={"Content-Encoding": "gzip"}, content=b"not gzip")
+        return httpx.Response(200, json=MANIFEST)
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", circuit_breaker=_half_open_breaker(),
+                              transport=_transport(handler)) as gateway:
+            with pytest.raises(httpx.DecodingError):
+                await gateway.post_boundary_request("p")
+            return await gateway.post_boundary_request("p")
+
+    assert asyncio.run(scenario()) == MANIFEST
+    assert len(calls) == 2
+
+
+def test_cancelled_half_open_trial_is_released():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json=MANIFEST)
+
+    async def scenario():
+        breaker = _half_open_breaker()
+        async with LLMGateway(endpoint="http://llm.test/v1", coalesce=False, circuit_breaker=breaker,
+                              transport=_transport(handler)) as gateway:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(gateway.post_boundary_request("p"), 0.05)
+            result = await gateway.post_boundary_request("p")
+        return result, breaker.state
+
+    assert asyncio.run(scenario()) == (MANIFEST, CircuitBreaker.CLOSED)
+    assert len(calls) == 2
+
+
+def test_hedged_request_wins_over_slow_primary():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json=MANIFEST)
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", hedge_enabled=True,
+                              transport=_transport(handler)) as gateway:
+            gateway._latencies.extend([0.01] * gateway.hedge_min_samples)
+            started = asyncio.get_running_loop().time()
+            result = await gateway.post_boundary_request("p")
+            return result, gateway.hedge_count, asyncio.get_running_loop().time() - started
+
+    result, hedges, elapsed = asyncio.run(scenario())
+    assert result == MANIFEST and hedges == 1
+    assert elapsed < 0.5
+
+
+def test_identical_concurrent_requests_share_one_call():
+    calls = []
+
+    async def handler(request):
+        calls.append(json.loads(request.content)["prompt"])
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json=MANIFEST)
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", transport=_transport(handler)) as gateway:
+            first = asyncio.gather(*(gateway.post_boundary_request("same") for _ in range(4)),
+                                   gateway.post_boundary_request("other"))
+            results = await first
+            # Once the shared call has landed, a new request goes to the LLM again
+            results.append(await gateway.post_boundary_request("same"))
+            return results
+
+    before = metrics.counter("llm_coalesced_total")
+    results = asyncio.run(scenario())
+    assert results == [MANIFEST] * 6
+    assert sorted(calls) == ["other", "same", "same"]
+    assert metrics.counter("llm_coalesced_total") - before == 3
+    # Every caller gets its own copy of the shared result
+    assert results[0] is not results[1]
+
+
+def test_coalesced_failure_reaches_all_callers_and_survives_cancellation():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return httpx.Response(400, text="bad request")
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", max_retries=0, transport=_transport(handler)) as gateway:
+            leader = asyncio.ensure_future(gateway.post_boundary_request("same"))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(gateway.post_boundary_request("same"))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with pytest.raises(httpx.HTTPStatusError):
+                await follower
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
@@ -0,0 +1,106 @@
+"""Tests for app/utils/logger.py: queued batched writer, sampling and level configuration."""
+
+import io
+import json
+import logging
+import queue
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.utils import logger as logger_module
+from app.utils.logger import AsyncQueueHandler, BatchingLogWriter, JsonFormatter, SamplingFilter
+
+
+def _record(message, level=logging.INFO, lineno=1, **attrs):
+    record = logging.LogRecord("app.test", level, __file__, lineno, message, None, None)
+    record.__dict__.update(attrs)
+    return record
+
+
+class _CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def _start_writer(batch_size, flush_interval, maxsize=0):
+    log_queue = queue.Queue(maxsize=maxsize)
+    stream = _CountingStream()
+    writer = BatchingLogWriter(log_queue, JsonFormatter(), batch_size, flush_interval, stream=stream)
+    return AsyncQueueHandler(log_queue, writer), writer, stream
+
+
+def test_writer_flushes_full_batches_in_one_write():
+    handler, writer, stream = _start_writer(batch_size=5, flush_interval=60)
+    writer.start()
+    try:
+        for i in range(10):
+            handler.handle(_record(f'message "{i}"'))
+        deadline = time.monotonic() + 5
+        while stream.writes < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        writer.queue.put(logger_module._STOP)
+        writer.join(5)
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["message"] for line in lines] == [f'message "{i}"' for i in range(10)]
+    assert stream.writes == 2
+
+
+def test_writer_flushes_partial_batch_after_interval():
+    handler, writer, stream = _start_writer(batch_size=100, flush_interval=0.05)
+    writer.start()
+    try:
+        handler.handle(_record("lonely"))
+        deadline = time.monotonic() + 5
+        while not stream.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert json.loads(stream.getvalue())["message"] == "lonely"
+    finally:
+        writer.queue.put(logger_module._STOP)
+        writer.join(5)
+
+
+def test_handler_serializes_exceptions_and_drops_when_full():
+    handler, writer, stream = _start_writer(batch_size=1, flush_interval=1, maxsize=1)
+    # Writer not started: pretend it is alive so records are queued rather than written inline
+    writer.is_alive = lambda: True
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        handler.handle(_record("failed", level=logging.ERROR, exc_info=sys.exc_info()))
+    handler.handle(_record("overflow"))
+    assert handler.dropped == 1
+
+    queued = writer.queue.get_nowait()
+    assert queued.exc_info is None
+    entry = json.loads(JsonFormatter().format(queued))
+    assert "ValueError: boom" in entry["exc_info"]
+
+
+def test_sampling_filter_keeps_burst_then_every_nth():
+    sampler = SamplingFilter(burst=3, every=10)
+    passed = [sampler.filter(_record("per file", sampled=True)) for _ in range(33)]
+    assert sum(passed) == 3 + 3
+    assert sampler.filter(_record("warning", level=logging.WARNING, sampled=True))
+    assert all(sampler.filter(_record("unflagged")) for _ in range(50))
+    # String keys are sampled independently of the call site
+    assert sampler.filter(_record("stage", sampled="stage:read"))
+
+
+def test_levels_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_LEVEL", "warning")
+    monkeypatch.setattr(settings, "LOG_LEVELS", "app.core=DEBUG, app.core.llm_gateway=ERROR")
+    assert logger_module._level_for("app.main") == logging.WARNING
+    assert logger_module._level_for("app.core.manifest_cache") == logging.DEBUG
+    assert logger_module._level_for("app.core.llm_gateway") == logging.ERROR
+    monkeypatch.setattr(settings, "LOG_LEVEL", "bogus")
+    assert logger_module._level_for("app.main") == logging.INFO
@@ -0,0 +1,79 @@
+"""Unit tests for app/core/manifest_cache.py: keys, LRU tier, disk tier and eviction."""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.manifest_cache import ManifestCache
+from app.utils.security import validate_line_manifest
+
+MANIFEST = [{"filename": "a.py", "start_marker": "### START a.py", "end_marker": "### END a.py"}]
+
+
+def test_key_depends_on_template_endpoint_and_text():
+    key = ManifestCache.make_key("tmpl", "http://e", "text")
+    assert key == ManifestCache.make_key("tmpl", "http://e", "text")
+    assert key != ManifestCache.make_key("tmpl2", "http://e", "text")
+    assert key != ManifestCache.make_key("tmpl", "http://other", "text")
+    assert key != ManifestCache.make_key("tmpl", "http://e", "text ")
+    assert ManifestCache.make_key("ab", "c", "") != ManifestCache.make_key("a", "bc", "")
+
+
+def test_memory_lru_and_counters():
+    cache = ManifestCache(cache_dir=None, max_entries=2)
+    assert cache.get("k1") is None
+    cache.put("k1", MANIFEST)
+    cache.put("k2", MANIFEST)
+    assert cache.get("k1") == MANIFEST
+    cache.put("k3", MANIFEST)  # evicts k2, the least recently used entry
+    assert cache.get("k2") is None
+    assert cache.stats["memory_hits"] == 1 and cache.misses == 2
+
+
+def test_disk_tier_persists_across_instances(tmp_path):
+    ManifestCache(cache_dir=str(tmp_path)).put("k1", MANIFEST)
+    fresh = ManifestCache(cache_dir=str(tmp_path))
+    assert fresh.get("k1") == MANIFEST
+    assert fresh.stats["disk_hits"] == 1
+    assert fresh.get("k1") == MANIFEST
+    assert fresh.stats["memory_hits"] == 1
+
+
+def test_disk_tier_evicts_oldest_beyond_size_limit(tmp_path):
+    entry_size = len('[{"filename":"a.py","start_marker":"### START a.py","end_marker":"### END a.py"}]')
+    cache = ManifestCache(cache_dir=str(tmp_path), max_disk_bytes=entry_size * 2)
+    for index in range(3):
+        cache.put(f"k{index}", MANIFEST)
+        # Backdate entries so that their age order is unambiguous
+        past = time.time() - 100 + index
+        os.utime(tmp_path / f"k{index}.json", (past, past))
+    cache.put("k3", MANIFEST)
+    remaining = sorted(p.stem for p in tmp_path.glob("*.json"))
+    assert remaining == ["k2", "k3"]
+    assert cache.stats["evictions"] == 2
+
+
+def test_corrupt_or_invalid_disk_entries_are_misses_and_deleted(tmp_path):
+    entries = {
+        "object": '{"filename": "a.py"}',
+        "malformed": '[{"filename": "a.py", "start_marker": ""}]',
+        "truncated": '[{"filename": "a.py", "start_',
+    }
+    for key, content in entries.items():
+        (tmp_path / f"{key}.json").write_text(content, encoding="utf-8")
+
+    cache = ManifestCache(cache_dir=str(tmp_path))
+    for key in entries:
+        assert cache.get(key) is None
+    assert cache.misses == 3 and cache.hits == 0
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_disk_entries_are_checked_with_the_callers_validator(tmp_path):
+    line_manifest = [{"filename": "a.py", "start_line": 2, "end_line": 3}]
+    ManifestCache(cache_dir=str(tmp_path)).put("lines", line_manifest)
+    assert ManifestCache(cache_dir=str(tmp_path)).get("lines", validate_line_manifest) == line_manifest
+    assert ManifestCache(cache_dir=str(tmp_path)).get("lines") is None
@@ -0,0 +1,77 @@
+"""Tests for streamed manifests: incremental parser, gateway streaming and streaming pipeline."""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.llm_gateway import LLMGateway
+from app.core.manifest_stream import IncrementalManifestParser, extract_stream_text
+from app.engine import boundary_detector
+from app.main import process_text
+
+MANIFEST = [
+    {"filename": "a.py", "start_marker": "<<a.py>>", "end_marker": "<</a.py>>"},
+    {"filename": "b {x}.py", "start_marker": "<<b \"}\">>", "end_marker": "<</b>>"},
+]
+TEXT = 'intro\n<<a.py>>\nx = 1\n<</a.py>>\n<<b "}">>\ny = "{"\n<</b>>\n'
+
+
+def _ndjson(text: str, piece: int = 7) -> bytes:
+    # Ollama-style envelopes, one small token per line
+    lines = [json.dumps({"response": text[i:i + piece], "done": False}) for i in range(0, len(text), piece)]
+    lines.append(json.dumps({"response": "", "done": True}))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def test_parser_emits_objects_as_they_close():
+    payload = "Here you go:\n```json\n" + json.dumps(MANIFEST) + "\n```"
+    parser = IncrementalManifestParser()
+    emitted = []
+    for i in range(0, len(payload), 3):
+        emitted.append(parser.feed(payload[i:i + 3]))
+    assert [entry for chunk in emitted for entry in chunk] == MANIFEST
+    # The first entry is available before the rest of the array has been fed
+    assert len([chunk for chunk in emitted if chunk]) == 2
+    assert parser.done
+
+
+def test_extract_stream_text_envelopes():
+    assert extract_stream_text('{"response": "[{", "done": false}') == "[{"
+    assert extract_stream_text('{"message": {"content": "x"}, "done": false}') == "x"
+    assert extract_stream_text('{"done": true}') is None
+    assert extract_stream_text('  {"filename": "a"},') == '  {"filename": "a"},\n'
+
+
+def test_gateway_streams_validated_entries():
+    async def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=_ndjson(json.dumps(MANIFEST)))
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", transport=httpx.MockTransport(handler)) as gateway:
+            return [entry async for entry in gateway.stream_boundary_request("p")]
+
+    assert asyncio.run(scenario()) == MANIFEST
+
+
+def test_streaming_pipeline_writes_files(tmp_path, monkeypatch):
+    async def handler(request):
+        return httpx.Response(200, content=_ndjson(json.dumps(MANIFEST)))
+
+    monkeypatch.setattr(settings, "MANIFEST_CACHE_ENABLED", False)
+    monkeypatch.chdir(tmp_path)
+
+    async def scenario():
+        async with LLMGateway(endpoint="http://llm.test/v1", transport=httpx.MockTransport(handler)) as gateway:
+            monkeypatch.setattr(boundary_detector, "get_shared_gateway", lambda: gateway)
+            return await process_text(TEXT, "out", stream=True)
+
+    assert asyncio.run(scenario()) == {"files": 2, "bytes": len('x = 1') + len('y = "{"')}
+    assert (tmp_path / "out" / "a.py").read_text() == "x = 1"
+    assert (tmp_path / "out" / "b {x}.py").read_text() == 'y = "{"'
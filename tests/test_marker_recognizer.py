@@ -0,0 +1,81 @@
+"""Unit tests for app/engine/marker_recognizer.py: built-in grammars, coverage and fallback."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.engine.content_slicer import ContentSlicer
+from app.engine.marker_recognizer import MarkerGrammar, MarkerRecognizer
+from app.engine.span_table import SpanTable
+
+REPO_ROOT = Path(__file__).parent.parent
+
+MARKDOWN_DUMP = """
+# My Python Project
+
+## src/main.py
+```python
+def main():
+    return 0
+```
+
+## requirements.txt
+```
+pytest>=7.0.0
+```
+"""
+
+
+def _slice(text, recognizer=None):
+    manifest = (recognizer or MarkerRecognizer()).recognize(text)
+    assert manifest is not None
+    return ContentSlicer().slice_content(text, manifest)
+
+
+def test_file_header_grammar_on_repo_dump():
+    text = (REPO_ROOT / "dump.txt").read_text(encoding="utf-8")
+    files = _slice(text)
+    assert len(files) == 62
+    assert files["settings.gradle.kts"].startswith("pluginManagement {")
+    assert "app/build.gradle.kts" in files and "build.gradle.kts" in files
+
+
+def test_start_end_grammar():
+    text = (REPO_ROOT / "input_data" / "dump.txt").read_text(encoding="utf-8")
+    files = _slice(text)
+    assert files == {"module1.py": 'def hello():\n    print("Hello World")', "module2.py": "class Foo:\n    pass"}
+
+
+def test_markdown_fence_grammar():
+    files = _slice(MARKDOWN_DUMP)
+    assert files == {"src/main.py": "def main():\n    return 0", "requirements.txt": "pytest>=7.0.0"}
+
+
+def test_low_coverage_returns_none():
+    text = "free text " * 100 + "\n### START a.py\nx = 1\n### END a.py\n"
+    assert MarkerRecognizer().recognize(text) is None
+    assert MarkerRecognizer().recognize("no markers at all") is None
+
+
+def test_register_custom_grammar():
+    recognizer = MarkerRecognizer(grammars=[])
+    recognizer.register(MarkerGrammar("eq", r"^==> (?P<path>\S+) <==\n"))
+    files = _slice("==> a.txt <==\nalpha\n==> b.txt <==\nbeta\n", recognizer)
+    assert files == {"a.txt": "alpha", "b.txt": "beta"}
+
+
+def test_scan_fills_a_span_table_and_markers_are_rebuilt_for_the_manifest():
+    text = "### START a.py\nx = 1\n### END a.py\n\n### START b.py\ny = 2\n### END b.py\n"
+    grammar = MarkerGrammar("eq", r"^==> (?P<path>\S+) <==\n")
+    result = grammar.scan("==> a.txt <==\nalpha\n==> b.txt <==\nbeta\n")
+    assert isinstance(result.spans, SpanTable)
+    assert [filename for filename, _, _ in result.spans] == ["a.txt", "b.txt"]
+    assert list(result.sections()) == [(0, 20), (20, 39)]
+
+    manifest = MarkerRecognizer().recognize(text)
+    assert [(entry["start_marker"], entry["end_marker"]) for entry in manifest] == [
+        ("### START a.py", "### END a.py"), ("### START b.py", "### END b.py")]
+    footerless = MarkerRecognizer([grammar]).recognize("==> a.txt <==\nalpha\n==> b.txt <==\nbeta\n")
+    assert [(entry["start_marker"], entry["end_marker"]) for entry in footerless] == [
+        ("==> a.txt <==", "==> b.txt <=="), ("==> b.txt <==", "")]
@@ -0,0 +1,70 @@
+"""Unit tests for app/engine/marker_resolver.py and the slicer's fuzzy marker fallback."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.engine.content_slicer import ContentSlicer, IncrementalSlicer
+from app.engine.marker_resolver import FuzzyMarkerResolver, bounded_levenshtein, normalize_marker
+
+DUMP = (
+    "--- FILE: src/app/main.py ---\n"
+    "print('main')\n"
+    "--- END FILE: src/app/main.py ---\n"
+    "--- FILE: src/app/util.py ---\n"
+    "def util():\n"
+    "    return \"util\"\n"
+    "--- END FILE: src/app/util.py ---\n"
+)
+
+
+def test_normalize_marker_ignores_whitespace_quotes_and_case():
+    assert normalize_marker("  --- File:  “a.py” ---") == normalize_marker("---FILE: \"a.py\"---")
+
+
+def test_bounded_levenshtein():
+    assert bounded_levenshtein("kitten", "sitting", 3) == 3
+    assert bounded_levenshtein("kitten", "sitting", 2) is None
+    assert bounded_levenshtein("abc", "abc", 0) == 0
+
+
+def test_resolver_strategies():
+    resolver = FuzzyMarkerResolver(DUMP)
+    util_start = DUMP.index("--- FILE: src/app/util.py")
+    util_end = DUMP.index("\n", util_start)
+    # Whitespace-mangled, truncated and misspelled versions of the same line
+    assert resolver.find("---   FILE:src/app/util.py ---") == (util_start, util_end)
+    assert resolver.find("--- FILE: src/app/util") == (util_start, util_end)
+    assert resolver.find("--- FIEL: src/app/utils.py ---") == (util_start, util_end)
+    assert resolver.find("completely unrelated marker text") is None
+    # Matches before `start` are ignored
+    assert resolver.find("--- FILE: src/app/util.py ---", start=len(DUMP)) is None
+
+
+def test_resolver_works_on_bytes():
+    buffer = DUMP.encode("utf-8")
+    match = FuzzyMarkerResolver(buffer).find(b"--- FILE: src/app/util.py---")
+    assert buffer[match[0]:match[1]] == b"--- FILE: src/app/util.py ---"
+
+
+def test_slicer_recovers_mangled_markers():
+    manifest = [
+        {"filename": "src/app/main.py", "start_marker": "--- FILE: src/app/main.py ---",
+         "end_marker": "--- END FILE: src/app/main.py ---"},
+        {"filename": "src/app/util.py", "start_marker": "---FILE: src/app/util.py---",
+         "end_marker": "--- END FILE: src/app/util.p"},
+    ]
+    expected = {"src/app/main.py": "print('main')", "src/app/util.py": "def util():\n    return \"util\""}
+    assert ContentSlicer().slice_content(DUMP, manifest) == expected
+
+    slicer = IncrementalSlicer(DUMP)
+    assert dict(filter(None, (slicer.slice_entry(item) for item in manifest))) == expected
+
+
+def test_slicer_drops_unresolvable_markers(monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "MARKER_FUZZY_ENABLED", False)
+    manifest = [{"filename": "a.py", "start_marker": "---FILE: src/app/util.py---",
+                 "end_marker": "--- END FILE: src/app/util.py ---"}]
+    assert ContentSlicer().slice_content(DUMP, manifest) == {}
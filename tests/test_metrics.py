@@ -0,0 +1,56 @@
+"""Tests for app/utils/metrics.py and the structured JSON log formatter."""
+
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import process_text
+from app.utils.logger import JsonFormatter
+from app.utils.metrics import MetricsRegistry, metrics
+
+
+def test_counters_and_summaries():
+    registry = MetricsRegistry()
+    registry.inc("files_total", 2)
+    registry.inc("files_total")
+    registry.inc("cache_hits_total", tier="disk")
+    registry.observe("stage_seconds", 0.5, stage="read")
+    registry.observe("stage_seconds", 1.5, stage="read")
+
+    assert registry.counter("files_total") == 3
+    snapshot = registry.snapshot()
+    assert snapshot["counters"]["cache_hits_total"] == {"tier=disk": 1}
+    assert snapshot["summaries"]["stage_seconds"]["stage=read"] == {"count": 2, "sum": 2.0, "max": 1.5}
+
+    text = registry.to_prometheus()
+    assert "# TYPE chaostocode_files_total counter\nchaostocode_files_total 3\n" in text
+    assert 'chaostocode_cache_hits_total{tier="disk"} 1' in text
+    assert 'chaostocode_stage_seconds_sum{stage="read"} 2.000000' in text
+
+
+def test_json_formatter_adds_structured_fields():
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, 'said "hi"', None, None)
+    record.fields = {"stage": "write", "bytes": 10}
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == 'said "hi"'
+    assert entry["stage"] == "write" and entry["bytes"] == 10
+
+
+def test_pipeline_records_stage_metrics(tmp_path):
+    metrics.reset()
+    dump = "### START a.py\nx = 1\n### END a.py\n### START b.py\ny = 2\n### END b.py\n"
+    asyncio.run(process_text(dump, str(tmp_path / "out")))
+
+    summaries = metrics.snapshot()["summaries"]["stage_seconds"]
+    assert {"stage=detect", "stage=slice", "stage=write"} <= set(summaries)
+    assert metrics.counter("manifests_total", source="recognizer") == 1
+    assert metrics.counter("files_written_total") == 2
+    assert metrics.counter("output_bytes_total") == len("x = 1") + len("y = 2")
+
+    out = tmp_path / "metrics.json"
+    metrics.write_summary(str(out))
+    assert json.loads(out.read_text())["counters"]["files_sliced_total"] == {"total": 2}
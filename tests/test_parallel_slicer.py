@@ -0,0 +1,64 @@
+"""Tests for app/engine/parallel_slicer.py: sharded marker search over mmap and shared memory."""
+
+import mmap
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.engine import parallel_slicer
+from app.engine.content_slicer import ContentSlicer
+from app.engine.parallel_slicer import ParallelSlicer, split_shards
+
+
+def _dump(files: int):
+    sections = [f"### START pkg/module_{i}.py\ndef f_{i}():\n    return 'é{i}'\n### END pkg/module_{i}.py\n"
+                for i in range(files)]
+    manifest = [{"filename": f"pkg/module_{i}.py", "start_marker": f"### START pkg/module_{i}.py",
+                 "end_marker": f"### END pkg/module_{i}.py"} for i in range(files)]
+    return "".join(sections), manifest
+
+
+def test_split_shards_cut_at_line_starts():
+    data = b"".join(b"line %d\n" % i for i in range(100))
+    shards = split_shards(data, 7)
+    assert shards[0][0] == 0 and shards[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(shards, shards[1:]))
+    assert all(data[start - 1:start] == b"\n" for start, _ in shards[1:])
+    assert split_shards(b"no newline at all", 4) == [(0, 17)]
+
+
+@pytest.fixture
+def many_shards(monkeypatch):
+    # Many small shards so that plenty of markers straddle shard boundaries
+    monkeypatch.setattr(parallel_slicer, "SHARDS_PER_WORKER", 40)
+
+
+def test_parallel_matches_sequential_for_text_and_bytes(many_shards):
+    text, manifest = _dump(60)
+    slicer = ParallelSlicer(workers=2, min_bytes=0)
+    assert slicer.slice_content(text, manifest) == ContentSlicer().slice_content(text, manifest)
+
+    data = text.encode("utf-8")
+    assert slicer.slice_spans(data, manifest) == ContentSlicer().slice_spans(data, manifest)
+
+
+def test_parallel_search_over_mmap_file(tmp_path, many_shards):
+    text, manifest = _dump(40)
+    path = tmp_path / "dump.txt"
+    path.write_bytes(text.encode("utf-8"))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        spans = ParallelSlicer(source_path=str(path), workers=2, min_bytes=0).slice_spans(buffer, manifest)
+        assert spans == ContentSlicer().slice_spans(buffer, manifest)
+        assert len(spans) == 40
+
+
+def test_caller_provided_executor_receives_markers_with_each_shard(many_shards):
+    from concurrent.futures import ProcessPoolExecutor
+
+    text, manifest = _dump(30)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        slicer = ParallelSlicer(workers=2, min_bytes=0, executor=executor)
+        assert slicer.slice_content(text, manifest) == ContentSlicer().slice_content(text, manifest)
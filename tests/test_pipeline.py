@@ -0,0 +1,58 @@
+"""End-to-end tests for app/main.py process_file on the recognizer path and with a faked LLM gateway."""
+
+import asyncio
+import shutil
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.engine import boundary_detector
+from app.main import process_file
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def _run(tmp_path, monkeypatch, source, **kwargs):
+    tmp_path.mkdir(parents=True, exist_ok=True)
+    shutil.copy(source, tmp_path / "dump.txt")
+    monkeypatch.chdir(tmp_path)
+    asyncio.run(process_file("dump.txt", "out", **kwargs))
+    return {p.relative_to(tmp_path / "out").as_posix(): p.read_bytes() for p in (tmp_path / "out").rglob("*") if p.is_file()}
+
+
+def test_process_file_start_end_dump(tmp_path, monkeypatch):
+    files = _run(tmp_path, monkeypatch, REPO_ROOT / "input_data" / "dump.txt")
+    assert files == {"module1.py": b'def hello():\n    print("Hello World")', "module2.py": b"class Foo:\n    pass"}
+
+
+def test_zero_copy_matches_text_mode(tmp_path, monkeypatch):
+    text_mode = _run(tmp_path / "text", monkeypatch, REPO_ROOT / "dump.txt")
+    zero_copy = _run(tmp_path / "mmap", monkeypatch, REPO_ROOT / "dump.txt", zero_copy=True)
+    assert zero_copy == text_mode
+    assert len(zero_copy) > 50
+
+
+def test_zero_copy_slices_compacted_llm_manifest_at_byte_offsets(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RECOGNIZER_ENABLED", False)
+    monkeypatch.setattr(settings, "MANIFEST_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "PROMPT_COMPACTION_ENABLED", True)
+    monkeypatch.setattr(settings, "PROMPT_COMPACTION_MIN_CHARS", 0)
+    gateway = MagicMock()
+    gateway.endpoint = "http://llm.test"
+    gateway.post_boundary_request = AsyncMock(return_value=[
+        {"filename": "a.py", "start_line": 3, "end_line": 4},
+        {"filename": "b.py", "start_line": 6, "end_line": 6},
+    ])
+    monkeypatch.setattr(boundary_detector, "get_shared_gateway", lambda: gateway)
+    source = tmp_path / "source.txt"
+    # Multi-byte characters before each boundary shift byte offsets away from character offsets
+    source.write_text("Résumé café naïve\n<<a.py>>\nprint('é')\nx = 1\n<<b.py>>\ny = 'ü'\n", encoding="utf-8")
+
+    text_mode = _run(tmp_path / "text", monkeypatch, source)
+    zero_copy = _run(tmp_path / "mmap", monkeypatch, source, zero_copy=True)
+    expected = {"a.py": "print('é')\nx = 1".encode("utf-8"), "b.py": "y = 'ü'".encode("utf-8")}
+    assert text_mode == expected
+    assert zero_copy == expected
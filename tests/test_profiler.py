@@ -0,0 +1,84 @@
+"""Unit tests for app/utils/profiler.py: wait/run split of awaits, stage records and the profile directory."""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.engine.boundary_detector import BoundaryDetector
+from app.utils.metrics import metrics
+from app.utils.profiler import PipelineProfiler, TimedCoroutine, profile_await
+
+
+def test_timed_coroutine_splits_run_and_wait_time():
+    async def work():
+        deadline = time.perf_counter() + 0.02
+        while time.perf_counter() < deadline:
+            pass
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        timed = TimedCoroutine(work())
+        return await timed, timed
+
+    result, timed = asyncio.run(scenario())
+    assert result == "done"
+    assert timed.run_seconds >= 0.02
+    assert timed.wait_seconds >= 0.045
+    assert abs(timed.run_seconds + timed.wait_seconds - timed.wall_seconds) < 1e-9
+
+
+def test_timed_coroutine_propagates_errors():
+    async def fail():
+        await asyncio.sleep(0)
+        raise KeyError("x")
+
+    async def scenario():
+        try:
+            await TimedCoroutine(fail())
+        except KeyError:
+            return True
+
+    assert asyncio.run(scenario())
+
+
+def test_profile_await_is_a_no_op_without_profiler():
+    async def value():
+        return 1
+
+    coro = value()
+    assert profile_await("llm", coro) is coro
+    assert asyncio.run(coro) == 1
+
+
+def test_profiler_records_stages_llm_awaits_and_writes_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MANIFEST_CACHE_ENABLED", False)
+
+    async def answer(prompt, **kwargs):
+        await asyncio.sleep(0.01)
+        return [{"filename": "a.py", "start_marker": "<a>", "end_marker": "</a>"}]
+
+    gateway = MagicMock()
+    gateway.endpoint = "http://llm.test"
+    gateway.post_boundary_request = answer
+
+    profile_dir = tmp_path / "profile"
+    with PipelineProfiler(str(profile_dir), trace_memory=True) as profiler:
+        with metrics.timer("detect"):
+            asyncio.run(BoundaryDetector(llm_gateway=gateway).detect_boundaries("<a>\nx\n</a>\n"))
+
+    assert profiler.stages["detect"]["count"] == 1
+    assert profiler.stages["detect"]["peak_bytes"] >= 0
+    assert profiler.awaits["llm"]["count"] == 1
+    assert profiler.awaits["llm"]["wait_seconds"] >= 0.009
+    assert {"cpu.prof", "profile.json", "summary.txt", "memory-detect.snapshot"} <= {p.name for p in profile_dir.iterdir()}
+    report = json.loads((profile_dir / "profile.json").read_text())
+    assert report["hot_spots"] and report["allocations"]["detect"]
+    summary = (profile_dir / "summary.txt").read_text()
+    assert "detect" in summary and "llm" in summary and "functions by own time" in summary
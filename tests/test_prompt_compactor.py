@@ -0,0 +1,121 @@
+"""Unit tests for app/engine/prompt_compactor.py and compacted boundary detection."""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.manifest_cache import ManifestCache
+from app.core.prompts import LLM_SKELETON_BOUNDARY_PROMPT
+from app.engine.boundary_detector import BoundaryDetector
+from app.engine.content_slicer import ContentSlicer
+from app.engine.prompt_compactor import LineIndex, build_skeleton, is_candidate_header, map_line_ranges
+from app.utils.security import validate_line_entry, validate_line_manifest
+
+DUMP = (
+    "## app/main.py\n"
+    "def main():\n"
+    "    return 1\n"
+    "\n"
+    "## app/util.py\n"
+    "X = 2\n"
+    "Y = 3\n"
+)
+
+
+def test_line_index_round_trips_offsets():
+    index = LineIndex(DUMP)
+    assert index.line_count == 7
+    assert index.line(1) == "## app/main.py"
+    assert index.line(7) == "Y = 3"
+    assert index.line_of(index.line_start(5)) == 5
+    assert DUMP[index.line_start(2):index.line_end(3)] == "def main():\n    return 1"
+
+
+def test_candidate_headers():
+    assert is_candidate_header("--- FILE: src/app.py ---")
+    assert is_candidate_header("File: src/app.py")
+    assert is_candidate_header("```python")
+    assert not is_candidate_header("x = a.b(c)")
+    assert not is_candidate_header("")
+
+
+def test_skeleton_elides_body_lines():
+    text = "## a.py\n" + "x = 1\n" * 50 + "## b.py\n" + "y = 2\n" * 50
+    skeleton = build_skeleton(LineIndex(text))
+    assert "L1: ## a.py" in skeleton
+    assert "L52: ## b.py" in skeleton
+    assert "... (49 lines elided)" in skeleton
+    assert len(skeleton) < len(text) // 4
+
+
+def test_map_line_ranges_produces_offsets_and_drops_invalid():
+    index = LineIndex(DUMP)
+    manifest = map_line_ranges(index, [
+        {"filename": "app/main.py", "start_line": 2, "end_line": 3},
+        {"filename": "app/util.py", "start_line": 6, "end_line": 99},
+        {"filename": "bad.py", "start_line": 5, "end_line": 4},
+    ])
+    assert [entry["filename"] for entry in manifest] == ["app/main.py", "app/util.py"]
+    files = ContentSlicer().slice_content(DUMP, manifest)
+    assert files == {"app/main.py": "def main():\n    return 1", "app/util.py": "X = 2\nY = 3"}
+
+
+def test_validate_line_manifest():
+    assert validate_line_manifest([{"filename": "a.py", "start_line": 1, "end_line": 2}])
+    assert not validate_line_manifest([{"filename": "a.py", "start_line": 0, "end_line": 2}])
+    assert not validate_line_manifest([{"filename": "a.py", "start_line": True, "end_line": 2}])
+    assert not validate_line_manifest({"filename": "a.py"})
+
+
+def test_detector_sends_skeleton_and_maps_line_ranges(monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_COMPACTION_MIN_CHARS", 0)
+    monkeypatch.setattr(settings, "MANIFEST_CACHE_ENABLED", False)
+    gateway = MagicMock()
+    gateway.endpoint = "http://llm.test"
+    gateway.post_boundary_request = AsyncMock(return_value=[
+        {"filename": "app/main.py", "start_line": 2, "end_line": 3},
+        {"filename": "app/util.py", "start_line": 6, "end_line": 7},
+    ])
+    detector = BoundaryDetector(llm_gateway=gateway, compaction=True)
+
+    manifest = asyncio.run(detector.detect_boundaries(DUMP))
+
+    prompt = gateway.post_boundary_request.call_args.args[0]
+    assert prompt.startswith(LLM_SKELETON_BOUNDARY_PROMPT)
+    assert "L5: ## app/util.py" in prompt
+    assert gateway.post_boundary_request.call_args.kwargs["validator"] is validate_line_manifest
+    assert manifest[0]["start"] == DUMP.index("def main")
+    assert ContentSlicer().slice_content(DUMP, manifest)["app/util.py"] == "X = 2\nY = 3"
+
+
+def test_streamed_boundaries_are_compacted_and_share_the_cache(monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_COMPACTION_MIN_CHARS", 0)
+    prompts = []
+
+    class Gateway:
+        endpoint = "http://llm.test"
+
+        async def stream_boundary_request(self, prompt, entry_validator=None):
+            prompts.append(prompt)
+            assert entry_validator is validate_line_entry
+            yield {"filename": "app/main.py", "start_line": 2, "end_line": 3}
+            yield {"filename": "app/util.py", "start_line": 6, "end_line": 7}
+
+    async def collect(detector):
+        return [entry async for entry in detector.stream_boundaries(DUMP)]
+
+    cache = ManifestCache(cache_dir=None)
+    detector = BoundaryDetector(llm_gateway=Gateway(), manifest_cache=cache, compaction=True)
+    streamed = asyncio.run(collect(detector))
+
+    assert len(prompts) == 1 and prompts[0].startswith(LLM_SKELETON_BOUNDARY_PROMPT)
+    assert ContentSlicer().slice_content(DUMP, streamed) == {
+        "app/main.py": "def main():\n    return 1", "app/util.py": "X = 2\nY = 3"}
+    # Streamed and non-streamed detection use the same cache keys
+    assert asyncio.run(collect(detector)) == streamed
+    assert asyncio.run(detector.detect_boundaries(DUMP)) == streamed
+    assert len(prompts) == 1 and cache.hits == 2
@@ -0,0 +1,165 @@
+"""Tests for app/service.py: the asyncio HTTP extraction service."""
+
+import asyncio
+import io
+import sys
+import tarfile
+import threading
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import main as main_module
+from app import service as service_module
+from app.service import ExtractionService
+
+DUMP = "### START a.py\nx = 1\n### END a.py\n### START pkg/b.py\ny = 2\n### END pkg/b.py\n"
+
+
+async def _with_service(scenario, **kwargs):
+    service = ExtractionService(**kwargs)
+    server = await service.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            return await scenario(client, service)
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+
+
+async def _raw_request(port: int, head: str, body: bytes = b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    return reader, writer
+
+
+async def _read_status(reader) -> int:
+    status_line = await asyncio.wait_for(reader.readline(), 5)
+    return int(status_line.split()[1])
+
+
+def test_extract_json_and_health():
+    async def scenario(client, service):
+        response = await client.post("/extract", content=DUMP)
+        health = await client.get("/healthz")
+        missing = await client.get("/nope")
+        return response, health, missing
+
+    response, health, missing = asyncio.run(_with_service(scenario))
+    assert response.status_code == 200
+    assert response.json() == {"count": 2, "files": {"a.py": "x = 1", "pkg/b.py": "y = 2"}}
+    assert health.json()["status"] == "ok"
+    assert missing.status_code == 404
+
+
+def test_extract_tar_stream():
+    async def scenario(client, service):
+        return await client.post("/extract?format=tar", content=DUMP)
+
+    response = asyncio.run(_with_service(scenario))
+    assert response.headers["content-type"] == "application/x-tar"
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as archive:
+        assert archive.getnames() == ["a.py", "pkg/b.py"]
+        assert archive.extractfile("pkg/b.py").read() == b"y = 2"
+
+
+def test_backpressure_counts_uploads_still_in_progress():
+    body = DUMP.encode("utf-8")
+    head = f"POST /extract HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n"
+
+    async def scenario(client, service):
+        port = int(str(client.base_url).rsplit(":", 1)[1].rstrip("/"))
+        # A slow upload: the head and half of the body, the rest arrives later
+        slow_reader, slow_writer = await _raw_request(port, head, body[:10])
+        await asyncio.sleep(0.05)
+        others = [await _raw_request(port, head, body[:10]) for _ in range(5)]
+        rejected = [await _read_status(reader) for reader, _ in others]
+        assert service.queued == 1
+
+        slow_writer.write(body[10:])
+        await slow_writer.drain()
+        accepted = await _read_status(slow_reader)
+        for _, writer in others + [(slow_reader, slow_writer)]:
+            writer.close()
+        return accepted, rejected, service.queued, service.active
+
+    accepted, rejected, queued, active = asyncio.run(_with_service(scenario, max_concurrency=1, max_queue=0))
+    assert accepted == 200
+    assert rejected == [503] * 5
+    assert queued == active == 0
+
+
+def test_invalid_content_length_is_a_client_error():
+    async def scenario(client, service):
+        port = int(str(client.base_url).rsplit(":", 1)[1].rstrip("/"))
+        statuses = []
+        for length in ("abc", "-5"):
+            reader, writer = await _raw_request(port, f"POST /extract HTTP/1.1\r\nContent-Length: {length}\r\n\r\n")
+            statuses.append(await _read_status(reader))
+            writer.close()
+        return statuses, service.queued
+
+    assert asyncio.run(_with_service(scenario)) == ([400, 400], 0)
+
+
+def test_invalid_llm_manifest_is_a_bad_gateway(monkeypatch):
+    async def invalid_manifest(raw_text, slice_executor=None):
+        raise ValueError("Invalid JSON manifest from LLM")
+
+    monkeypatch.setattr(service_module, "extract_text", invalid_manifest)
+
+    async def scenario(client, service):
+        return await client.post("/extract", content="no markers here")
+
+    assert asyncio.run(_with_service(scenario)).status_code == 502
+
+
+def test_recognizer_runs_off_the_event_loop(monkeypatch):
+    recognize_spans = main_module._recognize_spans
+    release = threading.Event()
+    threads = []
+
+    def slow_recognizer(raw_text):
+        threads.append(threading.current_thread())
+        release.wait(5)
+        return recognize_spans(raw_text)
+
+    monkeypatch.setattr(main_module, "_recognize_spans", slow_recognizer)
+
+    async def scenario(client, service):
+        extraction = asyncio.ensure_future(client.post("/extract", content=DUMP))
+        while not threads:
+            await asyncio.sleep(0.01)
+        # Answered while the recognizer is still scanning
+        health = await asyncio.wait_for(client.get("/healthz"), 2)
+        release.set()
+        return health, await extraction
+
+    health, response = asyncio.run(_with_service(scenario))
+    assert health.status_code == 200
+    assert response.json()["count"] == 2
+    assert threads[0] is not threading.main_thread()
+
+
+def test_empty_body_is_a_client_error():
+    async def scenario(client, service):
+        return await client.post("/extract", content="   ")
+
+    assert asyncio.run(_with_service(scenario)).status_code == 400
+
+
+def test_metrics_endpoint_exports_prometheus_text():
+    async def scenario(client, service):
+        await client.post("/extract", content=DUMP)
+        return await client.get("/metrics")
+
+    response = asyncio.run(_with_service(scenario))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'chaostocode_stage_seconds_count{stage="slice"}' in response.text
+    assert "chaostocode_service_requests_total 2" in response.text
@@ -0,0 +1,67 @@
+"""Unit tests for app/engine/span_table.py and the span-based manifest path through the slicer."""
+
+import pickle
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.engine.content_slicer import ContentSlicer
+from app.engine.incremental import IncrementalState
+from app.engine.marker_recognizer import MarkerRecognizer
+from app.engine.span_table import SpanTable
+from app.utils.security import validate_span_table
+
+DUMP = "### START b.py\ny = 2\n### END b.py\n### START a.py\nx = 1\n### END a.py\n"
+
+
+def test_table_iterates_as_tuples_and_interns_filenames():
+    name = "".join(["pkg/", "a.py"])
+    table = SpanTable([(name, 5, 9), ("pkg/b.py", 0, 3)])
+    assert list(table) == [("pkg/a.py", 5, 9), ("pkg/b.py", 0, 3)]
+    assert table[1] == ("pkg/b.py", 0, 3) and len(table) == 2
+    assert table.filenames[0] is sys.intern("pkg/a.py")
+    assert table.content_bytes() == 7
+
+
+def test_sort_is_stable_and_last_span_per_filename_wins():
+    table = SpanTable([("c", 9, 10), ("a", 1, 2), ("b", 1, 3), ("a", 4, 6)])
+    table.sort()
+    assert list(table) == [("a", 1, 2), ("b", 1, 3), ("a", 4, 6), ("c", 9, 10)]
+    assert list(table.last_per_filename()) == [("a", 4, 6), ("b", 1, 3), ("c", 9, 10)]
+
+
+def test_columns_and_pickle_round_trip():
+    table = SpanTable([("a.py", 0, 4), ("b.py", 6, 8)])
+    assert SpanTable.from_columns(**table.to_columns()) == table
+    assert pickle.loads(pickle.dumps(table)) == table
+
+
+def test_validate_span_table_checks_bounds_and_order():
+    assert validate_span_table(SpanTable([("a.py", 0, 4), ("b {x}.py", 4, 10)]), 10)
+    assert not validate_span_table(SpanTable([("a.py", 0, 11)]), 10)
+    assert not validate_span_table(SpanTable([("a.py", 5, 4)]), 10)
+    assert not validate_span_table(SpanTable([("", 0, 1)]), 10)
+
+
+def test_recognized_spans_slice_like_the_dict_manifest():
+    spans = MarkerRecognizer().recognize_spans(DUMP)
+    manifest = MarkerRecognizer().recognize(DUMP)
+    assert list(spans) == [(entry["filename"], entry["start"], entry["end"]) for entry in manifest]
+    slicer = ContentSlicer()
+    assert slicer.slice_content(DUMP, spans) == slicer.slice_content(DUMP, manifest) == {"b.py": "y = 2", "a.py": "x = 1"}
+    assert slicer.slice_spans(DUMP, spans) == slicer.slice_spans(DUMP, manifest)
+
+
+def test_out_of_range_offsets_are_dropped():
+    manifest = [{"filename": "a.py", "start": 0, "end": 5}, {"filename": "b.py", "start": 3, "end": 500}]
+    assert list(ContentSlicer().resolve_spans("x = 1\n", manifest)) == [("a.py", 0, 5)]
+
+
+def test_incremental_state_stores_span_columns(tmp_path):
+    spans = SpanTable([("a.py", 0, 5)])
+    IncrementalState([(0, 6, "digest")], spans, {"a.py": "hash"}).save(str(tmp_path))
+    assert IncrementalState.load(str(tmp_path)).spans == spans
+
+    IncrementalState([(0, 6, "digest")], SpanTable([("a.py", 0, 60)]), {}).save(str(tmp_path))
+    assert IncrementalState.load(str(tmp_path)) is None
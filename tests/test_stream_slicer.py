@@ -0,0 +1,64 @@
+"""Tests for app/engine/stream_slicer.py and the chunked input pipeline."""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.engine.marker_recognizer import DEFAULT_GRAMMARS
+from app.engine.stream_slicer import IncompleteSegmentError, StreamingSlicer, select_grammar
+from app.main import process_file
+from benchmarks.dumpgen import STYLES, generate_dump
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _grammar(name):
+    return next(grammar for grammar in DEFAULT_GRAMMARS if grammar.name == name)
+
+
+@pytest.mark.parametrize("style", STYLES)
+@pytest.mark.parametrize("chunk_size", [7, 100, 100000])
+def test_chunked_slicing_matches_in_memory(style, chunk_size):
+    text, expected = generate_dump(15, 200, style, seed=2)
+    data = text.encode("utf-8")
+    grammar = select_grammar(data[:max(chunk_size, 2000)], eof=len(data) <= max(chunk_size, 2000))
+    assert grammar is _grammar(style)
+
+    slicer = StreamingSlicer(grammar, max_marker_span=128)
+    extracted = {segment.filename: b"".join(segment).decode("utf-8") for segment in slicer.segments(_chunks(data, chunk_size))}
+    assert extracted == expected
+
+
+def test_unclosed_section_raises_and_skipped_segments_are_drained():
+    data = b"### START a.py\nprint(1)\n### END a.py\n### START b.py\nlost\n### START c.py\nx = 1\n### END c.py\n"
+    segments = StreamingSlicer(_grammar("start_end"), max_marker_span=16).segments(_chunks(data, 5))
+    first, second, third = next(segments), next(segments), next(segments)
+    assert first.filename == "a.py" and first.complete and not second.complete
+    with pytest.raises(IncompleteSegmentError):
+        b"".join(second)
+    assert b"".join(third) == b"x = 1"
+    assert next(segments, None) is None
+
+
+def test_process_file_chunked(tmp_path, monkeypatch):
+    text, expected = generate_dump(30, 500, "file_header", seed=3)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "INPUT_CHUNK_SIZE", 4096)
+    Path("dump.txt").write_text(text, encoding="utf-8")
+
+    summary = asyncio.run(process_file("dump.txt", "out", chunked=True))
+    assert summary["files"] == summary["written"] == 30
+    written = {p.relative_to("out").as_posix(): p.read_text(encoding="utf-8") for p in Path("out").rglob("*") if p.is_file()}
+    assert written == expected
+    assert not [name for name in os.listdir("out") if name.endswith(".tmp")]
+
+    # Unchanged files are detected after streaming and left in place
+    assert asyncio.run(process_file("dump.txt", "out", chunked=True))["written"] == 0
@@ -0,0 +1,95 @@
+"""Unit tests for app/engine/template_registry.py: validation, verification, persistence and reuse across dumps."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import main
+from app.config import settings
+from app.engine import boundary_detector, template_registry
+from app.engine.marker_recognizer import MarkerRecognizer
+from app.engine.template_registry import TemplateRegistry
+from app.utils.security import validate_template_spec
+
+DUMP = "=== BEGIN a.py ===\nx = 1\n=== END ===\n\n=== BEGIN pkg/b.py ===\ny = 2\n=== END ===\n"
+OTHER_DUMP = "=== BEGIN c.py ===\nz = 3\n=== END ===\n=== BEGIN d.txt ===\nhello\n=== END ===\n"
+MANIFEST = [
+    {"filename": "a.py", "start_marker": "=== BEGIN a.py ===", "end_marker": "=== END ==="},
+    {"filename": "pkg/b.py", "start_marker": "=== BEGIN pkg/b.py ===", "end_marker": "=== END ==="},
+]
+TEMPLATE = {
+    "header_prefix": "=== BEGIN ",
+    "header_suffix": " ===",
+    "footer_prefix": "=== END ===",
+    "footer_suffix": "",
+    "footer_path": False,
+}
+
+
+def test_validate_template_spec_rejects_unsafe_patterns():
+    assert validate_template_spec(TEMPLATE)
+    assert validate_template_spec({"header_prefix": "-- ", "header_suffix": " --"})
+    # Free regexes are not a template form at all, however harmless they look
+    assert not validate_template_spec({"header_pattern": r"^(?P<path>(?:a|aa)*)X"})
+    assert not validate_template_spec({"header_pattern": r"^(?:a?){25}a{25}(?P<path>x)"})
+    assert not validate_template_spec(dict(TEMPLATE, header_prefix="   "))
+    assert not validate_template_spec(dict(TEMPLATE, header_suffix="x\n=== BEGIN"))
+    assert not validate_template_spec(dict(TEMPLATE, footer_prefix=""))
+    assert not validate_template_spec(dict(TEMPLATE, header_prefix="#" * 101))
+    assert not validate_template_spec(dict(TEMPLATE, footer_path="yes"))
+
+
+def test_regex_syntax_in_a_template_is_matched_literally_in_linear_time():
+    spec = {"header_prefix": "(?:a|aa)*", "header_suffix": "(?:a?){25}a{25}", "name": "hostile"}
+    grammar = template_registry.grammar_from_spec(spec)
+    started = time.perf_counter()
+    assert len(grammar.scan(("a" * 5000 + "\n") * 200)) == 0
+    assert time.perf_counter() - started < 1.0
+    spans = grammar.scan("(?:a|aa)*x.py(?:a?){25}a{25}\nbody\n").spans
+    assert [filename for filename, _, _ in spans] == ["x.py"]
+
+
+def test_learned_template_is_persisted_and_recognizes_new_dumps(tmp_path):
+    path = str(tmp_path / "templates.json")
+    assert TemplateRegistry(path).learn(dict(TEMPLATE), DUMP, MANIFEST) is not None
+
+    registry = TemplateRegistry(path)
+    assert [spec["name"] for spec in registry.specs()] == [template_registry.template_name(TEMPLATE)]
+    spans = MarkerRecognizer(registry.grammars()).recognize_spans(OTHER_DUMP)
+    assert [filename for filename, _, _ in spans] == ["c.py", "d.txt"]
+
+
+def test_template_that_disagrees_with_the_manifest_is_rejected(tmp_path):
+    registry = TemplateRegistry(str(tmp_path / "templates.json"))
+    # Only matches headers of files whose path starts with 'a', so pkg/b.py would be lost
+    narrow = dict(TEMPLATE, header_prefix="=== BEGIN a")
+    assert registry.learn(narrow, DUMP, MANIFEST) is None
+    assert registry.learn({"header_pattern": "(a+)+"}, DUMP, MANIFEST) is None
+    assert registry.specs() == [] and not (tmp_path / "templates.json").exists()
+
+
+def test_second_dump_in_a_learned_format_skips_the_llm(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MANIFEST_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "TEMPLATE_INDUCTION_ENABLED", True)
+    monkeypatch.setattr(template_registry, "_shared_registry", TemplateRegistry(str(tmp_path / "templates.json")))
+    prompts = []
+
+    class Gateway:
+        endpoint = "http://llm.test"
+
+        async def post_boundary_request(self, prompt, validator=None):
+            prompts.append(prompt)
+            return dict(TEMPLATE) if validator is validate_template_spec else [dict(entry) for entry in MANIFEST]
+
+    monkeypatch.setattr(boundary_detector, "get_shared_gateway", lambda: Gateway())
+
+    first = asyncio.run(main.extract_text(DUMP))
+    assert first == {"a.py": "x = 1", "pkg/b.py": "y = 2"}
+    assert len(prompts) == 2
+
+    second = asyncio.run(main.extract_text(OTHER_DUMP))
+    assert second == {"c.py": "z = 3", "d.txt": "hello"}
+    assert len(prompts) == 2